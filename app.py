@@ -16,6 +16,12 @@ from pages.doctor.share_documents import show_shared_documents
 
 from pages.util.menu import patient_sidebar, doctor_sidebar
 from database.create_tables import create_tables
+from database.cache_bus import start_cache_bus
+from utils.event_dispatcher import start_dispatcher
+from utils.file_server import start_file_server
+from utils.storage_gc import start_storage_gc
+from utils.preview_utils import schedule_search_backfill
+from utils.rerun_profiler import profiled
 
 load_dotenv()
 st.set_page_config(page_title="Smart Health Hub", layout="wide")
@@ -38,6 +44,46 @@ def initialize_database():
     create_tables()
 initialize_database()
 
+# -----------------------------
+# Keep query caches coherent across server processes
+# -----------------------------
+@st.cache_resource
+def initialize_cache_bus():
+    return start_cache_bus()
+initialize_cache_bus()
+
+# -----------------------------
+# Start the notification outbox dispatcher
+# -----------------------------
+@st.cache_resource
+def initialize_dispatcher():
+    return start_dispatcher()
+initialize_dispatcher()
+
+# -----------------------------
+# Start the streaming download server
+# -----------------------------
+@st.cache_resource
+def initialize_file_server():
+    return start_file_server()
+initialize_file_server()
+
+# -----------------------------
+# Periodically remove orphaned uploads
+# -----------------------------
+@st.cache_resource
+def initialize_storage_gc():
+    return start_storage_gc()
+initialize_storage_gc()
+
+# -----------------------------
+# Index the text of documents uploaded before search existed
+# -----------------------------
+@st.cache_resource
+def initialize_search_backfill():
+    schedule_search_backfill(batch_size=500)
+initialize_search_backfill()
+
 # -----------------------------
 # Logout function
 # -----------------------------
@@ -217,6 +263,7 @@ def show_doctor_pages():
 # -----------------------------
 # Main app
 # -----------------------------
+@profiled("full_rerun")
 def main():
     # --- Load user and last page from cookie first ---
     user_cookie = cookies.get("user")
@@ -0,0 +1,149 @@
+# benchmarks/bench_availability_calendar.py
+"""
+Availability calendar for 500 doctors over 90 days.
+
+    python benchmarks/bench_availability_calendar.py             # engine only, no database needed
+    python benchmarks/bench_availability_calendar.py --database  # also get_availability_calendar (2 queries)
+
+--database seeds throwaway "bench-cal-*" doctors into DATABASE_URL and removes them afterwards.
+"""
+import argparse
+import os
+import random
+import sys
+import time as clock
+from datetime import date, time, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.availability_engine import DAYS_OF_WEEK, build_calendar
+
+DOCTORS = 500
+DAYS = 90
+PREFIX = "bench-cal-"
+
+
+def synthetic_doctor(rng):
+    """Weekly pattern and exceptions of one doctor: mornings and afternoons on most weekdays, some leave."""
+    weekly = {}
+    for day in DAYS_OF_WEEK[:6]:
+        if rng.random() < 0.8:
+            weekly[day] = [(time(rng.choice((8, 9))), time(12)), (time(13), time(rng.choice((16, 17, 18))))]
+    start = date.today()
+    exceptions = []
+    for _ in range(rng.randint(2, 8)):
+        first = start + timedelta(days=rng.randint(-10, DAYS + 10))
+        last = first + timedelta(days=rng.choice((0, 0, 1, 4, 13)))
+        kind = rng.choice(("block", "block", "add"))
+        if kind == "block" and rng.random() < 0.5:
+            exceptions.append((first, last, "block", None, None))
+        else:
+            opens = rng.randint(7, 17)
+            exceptions.append((first, last, kind, time(opens), time(opens + rng.randint(1, 3))))
+    return weekly, exceptions
+
+
+def timed(label, fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = clock.perf_counter()
+        result = fn()
+        best = min(best, clock.perf_counter() - started)
+    print(f"{label:<45} {best * 1000:9.1f} ms (best of {repeat})")
+    return result
+
+
+def bench_engine(doctors, repeat):
+    start, end = date.today(), date.today() + timedelta(days=DAYS - 1)
+    return timed(
+        f"build_calendar x {len(doctors)} doctors x {DAYS} days",
+        lambda: {i: build_calendar(weekly, exceptions, start, end) for i, (weekly, exceptions) in enumerate(doctors)},
+        repeat,
+    )
+
+
+# ---------- Database ----------
+def seed(session, doctors):
+    from database.models.User import User, UserRole
+    from database.models.Doctor import Doctor, DoctorAvailability
+    from database.models.AvailabilityException import AvailabilityException
+
+    doctor_ids = []
+    for i, (weekly, exceptions) in enumerate(doctors):
+        user_id = f"{PREFIX}{i}"
+        session.add(User(
+            user_id=user_id, name=f"Bench Doctor {i}", email=f"{user_id}@bench.invalid",
+            password_hash="-", role=UserRole.doctor, is_verified=True,
+        ))
+        doctor = Doctor(
+            user_id=user_id, name=f"Bench Doctor {i}", email=f"{user_id}@bench.invalid",
+            license_number=f"{PREFIX}{i}",
+        )
+        session.add(doctor)
+        session.flush()
+        doctor_ids.append(doctor.doctor_id)
+        for day, intervals in weekly.items():
+            for start, end in intervals:
+                session.add(DoctorAvailability(doctor_id=doctor.doctor_id, day_of_week=day, start_time=start, end_time=end))
+        for first, last, kind, start, end in exceptions:
+            session.add(AvailabilityException(
+                doctor_id=doctor.doctor_id, start_date=first, end_date=last, kind=kind, start_time=start, end_time=end,
+            ))
+    session.commit()
+    return doctor_ids
+
+
+def cleanup(session):
+    from database.models.User import User
+    from database.models.Doctor import Doctor, DoctorAvailability
+    from database.models.AvailabilityException import AvailabilityException
+
+    bench_doctors = session.query(Doctor.doctor_id).filter(Doctor.user_id.like(f"{PREFIX}%"))
+    # doctor_availability has no ON DELETE CASCADE
+    session.query(DoctorAvailability).filter(DoctorAvailability.doctor_id.in_(bench_doctors)).delete(synchronize_session=False)
+    session.query(AvailabilityException).filter(AvailabilityException.doctor_id.in_(bench_doctors)).delete(synchronize_session=False)
+    session.query(User).filter(User.user_id.like(f"{PREFIX}%")).delete(synchronize_session=False)
+    session.commit()
+
+
+def bench_database(doctors, repeat):
+    from database.connection import SessionLocal
+    from database.queries.availability_queries import get_availability_calendar
+
+    start, end = date.today(), date.today() + timedelta(days=DAYS - 1)
+    with SessionLocal() as session:
+        cleanup(session)  # Leftovers of an interrupted run
+        try:
+            doctor_ids = seed(session, doctors)
+            return timed(
+                "get_availability_calendar (2 queries + engine)",
+                lambda: get_availability_calendar(doctor_ids, start, end),
+                repeat,
+            )
+        finally:
+            session.rollback()
+            cleanup(session)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--database", action="store_true", help="also time the two queries against DATABASE_URL")
+    parser.add_argument("--doctors", type=int, default=DOCTORS)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    doctors = [synthetic_doctor(rng) for _ in range(args.doctors)]
+    calendar = bench_engine(doctors, args.repeat)
+    open_days = sum(len(days) for days in calendar.values())
+    print(f"{'open doctor-days':<45} {open_days:9d}")
+
+    if args.database:
+        from_db = bench_database(doctors, args.repeat)
+        # Same input through the database must give the same calendar
+        assert sorted(map(len, from_db.values())) == sorted(map(len, calendar.values()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+# benchmarks/bench_booking_conflicts.py
+"""
+Concurrent bookings against one doctor's heavily booked day, two ways of detecting a clash:
+
+    probe  insert and let excl_appointments_doctor_slot reject an overlap (one GiST index probe)
+    scan   the old way: lock the doctor, read the day's time_slot strings, compare them in Python, insert
+
+    python benchmarks/bench_booking_conflicts.py --bookings 500 --workers 16 --attempts 50
+
+Seeds a throwaway "bench-book-*" doctor and patients into DATABASE_URL and removes them afterwards.
+"""
+import argparse
+import itertools
+import os
+import random
+import sys
+import time as clock
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+
+from database.connection import SessionLocal
+from database.create_tables import create_tables
+from database.models.Appointment import Appointment
+from database.models.Doctor import Doctor
+from database.models.Patient import Patient
+from database.models.Treatment import Treatment
+from database.models.User import User, UserRole
+from database.queries.appointment_queries import is_slot_conflict
+from utils.time_utils import parse_time_slot
+
+PREFIX = "bench-book-"
+SLOT_MINUTES = 2
+DAY = datetime.combine(date.today() + timedelta(days=90), datetime.min.time())
+
+
+def _label(start):
+    end = start + timedelta(minutes=SLOT_MINUTES)
+    return f"{start.strftime('%H:%M')} - {end.strftime('%H:%M')}"
+
+
+def _day_slots():
+    """Every 2-minute slot of the day that does not cross midnight."""
+    count = 24 * 60 // SLOT_MINUTES - 1
+    return [DAY + timedelta(minutes=SLOT_MINUTES * i) for i in range(count)]
+
+
+# ---------- Seeding ----------
+def cleanup():
+    with SessionLocal() as session:
+        # Doctor, patients, treatment and appointments cascade from the users
+        session.query(User).filter(User.user_id.like(f"{PREFIX}%")).delete(synchronize_session=False)
+        session.commit()
+
+
+def seed(bookings, workers, rng):
+    """A doctor with `bookings` live appointments on DAY, one patient per worker. Returns the ids."""
+    with SessionLocal() as session:
+        def user(kind, role):
+            user_id = f"{PREFIX}{kind}"
+            session.add(User(
+                user_id=user_id, name=f"Bench {kind}", email=f"{user_id}@bench.invalid",
+                password_hash="-", role=role, is_verified=True,
+            ))
+            return user_id
+
+        doctor_user = user("doctor", UserRole.doctor)
+        doctor = Doctor(user_id=doctor_user, name="Bench Doctor", email=f"{doctor_user}@bench.invalid", license_number=doctor_user)
+        patients = []
+        for i in range(workers + 1):
+            patient_user = user(f"patient{i}", UserRole.patient)
+            patients.append(Patient(user_id=patient_user, name=f"Bench Patient {i}", email=f"{patient_user}@bench.invalid"))
+        session.add_all([doctor, *patients])
+        session.flush()
+        treatment = Treatment(doctor_id=doctor.doctor_id, treatment_name="Consultation", cost=Decimal("10.00"))
+        session.add(treatment)
+        session.flush()
+
+        # The day's bookings belong to the extra patient; a few cancelled rows stay in the way of the scan
+        owner = patients[-1].patient_id
+        taken = rng.sample(_day_slots(), bookings)
+        for no, start in enumerate(taken, start=1):
+            session.add(Appointment(
+                patient_id=owner, doctor_id=doctor.doctor_id, treatment_id=treatment.treatment_id,
+                appointment_date=DAY, time_slot=_label(start),
+                slot_start=start, slot_end=start + timedelta(minutes=SLOT_MINUTES),
+                reference_number=f"{PREFIX}{uuid.uuid4().hex[:12]}",
+                status="cancelled" if no % 10 == 0 else "scheduled",
+                patient_appointment_no=no,
+            ))
+        session.commit()
+        return doctor.doctor_id, treatment.treatment_id, [patient.patient_id for patient in patients[:-1]]
+
+
+def reset(doctor_id, patient_ids):
+    """Drop the bookings made by the workers so every mode starts from the same day."""
+    with SessionLocal() as session:
+        session.query(Appointment).filter(
+            Appointment.doctor_id == doctor_id, Appointment.patient_id.in_(patient_ids)
+        ).delete(synchronize_session=False)
+        session.commit()
+
+
+# ---------- Booking strategies ----------
+def _new_appointment(doctor_id, treatment_id, patient_id, no, start):
+    return Appointment(
+        patient_id=patient_id, doctor_id=doctor_id, treatment_id=treatment_id,
+        appointment_date=DAY, time_slot=_label(start),
+        slot_start=start, slot_end=start + timedelta(minutes=SLOT_MINUTES),
+        reference_number=f"{PREFIX}{uuid.uuid4().hex[:12]}", status="scheduled", patient_appointment_no=no,
+    )
+
+
+def book_probe(doctor_id, treatment_id, patient_id, no, start):
+    with SessionLocal() as session:
+        session.add(_new_appointment(doctor_id, treatment_id, patient_id, no, start))
+        try:
+            session.commit()
+            return True
+        except IntegrityError as e:
+            session.rollback()
+            if is_slot_conflict(e):
+                return False
+            raise
+
+
+def book_scan(doctor_id, treatment_id, patient_id, no, start):
+    new_start, new_end = parse_time_slot(_label(start))
+    with SessionLocal() as session:
+        # Without the row lock two scans can both see the slot free
+        session.query(Doctor.doctor_id).filter(Doctor.doctor_id == doctor_id).with_for_update().one()
+        booked = session.query(Appointment.time_slot, Appointment.status).filter(
+            Appointment.doctor_id == doctor_id,
+            func.date(Appointment.appointment_date) == DAY.date(),
+        ).all()
+        for time_slot, status in booked:
+            parsed = parse_time_slot(time_slot)
+            if status != "cancelled" and parsed and parsed[0] < new_end and new_start < parsed[1]:
+                session.rollback()
+                return False
+        session.add(_new_appointment(doctor_id, treatment_id, patient_id, no, start))
+        session.commit()
+        return True
+
+
+STRATEGIES = {"probe": book_probe, "scan": book_scan}
+
+
+def run(strategy, doctor_id, treatment_id, patient_ids, attempts, rng_seed):
+    """Every worker books `attempts` random slots of the day as its own patient. Returns (seconds, booked)."""
+    book = STRATEGIES[strategy]
+    slots = _day_slots()
+
+    def worker(patient_id):
+        rng = random.Random(rng_seed + patient_id)
+        numbers = itertools.count(10_000)
+        return sum(book(doctor_id, treatment_id, patient_id, next(numbers), rng.choice(slots)) for _ in range(attempts))
+
+    started = clock.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(patient_ids)) as pool:
+        booked = sum(pool.map(worker, patient_ids))
+    return clock.perf_counter() - started, booked
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--bookings", type=int, default=500, help="appointments already on the day")
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--attempts", type=int, default=50, help="bookings tried by each worker")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    if args.bookings > len(_day_slots()):
+        parser.error(f"a day has only {len(_day_slots())} slots of {SLOT_MINUTES} minutes")
+
+    create_tables()
+    cleanup()  # Leftovers of an interrupted run
+    try:
+        doctor_id, treatment_id, patient_ids = seed(args.bookings, args.workers, random.Random(args.seed))
+        total = args.workers * args.attempts
+        print(f"{args.bookings} bookings on {DAY.date()}, {args.workers} workers x {args.attempts} attempts")
+        for strategy in STRATEGIES:
+            reset(doctor_id, patient_ids)
+            seconds, booked = run(strategy, doctor_id, treatment_id, patient_ids, args.attempts, args.seed)
+            print(f"{strategy:<6} {seconds * 1000:9.1f} ms  {total / seconds:8.1f} attempts/s  {booked} booked, {total - booked} clashes")
+    finally:
+        cleanup()
+
+
+if __name__ == "__main__":
+    main()
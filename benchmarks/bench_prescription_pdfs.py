@@ -0,0 +1,74 @@
+# benchmarks/bench_prescription_pdfs.py
+"""
+Prescription ZIP export throughput, worker pool against serial rendering.
+
+    python benchmarks/bench_prescription_pdfs.py --sizes 1 3 4 16 64 256
+
+Batches below POOL_MIN_BATCH render inline either way. Every run uses fresh prescription ids,
+so the per-process render cache never serves a PDF that was already built.
+"""
+import argparse
+import itertools
+import os
+import sys
+import time as clock
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import pdf_generator
+from utils.pdf_generator import POOL_MIN_BATCH, export_prescriptions_zip
+
+_ids = itertools.count(1)
+
+
+def synthetic_prescriptions(count):
+    """Plain prescription dicts shaped like to_prescription_record output."""
+    created = datetime(2026, 1, 1)
+    return [
+        {
+            "prescription_id": prescription_id,
+            "created_at": created + timedelta(minutes=prescription_id),
+            "patient_name": f"Patient {prescription_id % 97}",
+            "doctor_name": f"Doctor {prescription_id % 13}",
+            "medication_name": "Amoxicillin 500 mg",
+            "dosage": "1 capsule three times a day",
+            "duration": "7 days",
+        }
+        for prescription_id in itertools.islice(_ids, count)
+    ]
+
+
+def export(size, serial):
+    """Seconds to export one batch of new prescriptions."""
+    prescriptions = synthetic_prescriptions(size)
+    # Raising the threshold keeps every batch inline, which is the serial baseline
+    pdf_generator.POOL_MIN_BATCH = float("inf") if serial else POOL_MIN_BATCH
+    try:
+        started = clock.perf_counter()
+        export_prescriptions_zip(prescriptions)
+        return clock.perf_counter() - started
+    finally:
+        pdf_generator.POOL_MIN_BATCH = POOL_MIN_BATCH
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, POOL_MIN_BATCH - 1, POOL_MIN_BATCH, 16, 64, 256])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    # Worker processes start on first use; keep that one-off cost out of the timings
+    export(POOL_MIN_BATCH, serial=False)
+
+    print(f"POOL_MIN_BATCH = {POOL_MIN_BATCH}, {os.cpu_count()} CPUs")
+    print(f"{'batch':>6} {'serial PDFs/s':>14} {'pool PDFs/s':>12} {'speedup':>8}")
+    for size in args.sizes:
+        serial = min(export(size, serial=True) for _ in range(args.repeat))
+        pooled = min(export(size, serial=False) for _ in range(args.repeat))
+        note = "" if size >= POOL_MIN_BATCH else "  (inline, below POOL_MIN_BATCH)"
+        print(f"{size:>6} {size / serial:>14.1f} {size / pooled:>12.1f} {serial / pooled:>7.2f}x{note}")
+
+
+if __name__ == "__main__":
+    main()
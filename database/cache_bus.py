@@ -0,0 +1,121 @@
+# database/cache_bus.py
+import json
+import os
+import queue
+import select
+import socket
+import threading
+import time
+
+from database.connection import get_connection
+from database import query_cache
+
+# Every server process listens here; payloads are {"name": cached function, "scope": value, "all": bool}
+CHANNEL = "cache_invalidation"
+HEARTBEAT_SECONDS = int(os.getenv("CACHE_BUS_HEARTBEAT_SECONDS", 30))
+RECONNECT_DELAY_SECONDS = 5
+
+_outgoing = queue.Queue()
+# A socket pair (not a pipe) so select() can wait on it next to the connection on Windows too
+_wake_recv, _wake_send = socket.socketpair()
+_wake_recv.setblocking(False)
+_wake_send.setblocking(False)
+_bus_thread = None
+_start_lock = threading.Lock()
+
+
+def publish(name, scope_value, everything=False):
+    """Queue an invalidation for the other processes; sent by the bus thread on its own connection."""
+    _outgoing.put(json.dumps({"name": name, "scope": scope_value, "all": everything}))
+    try:
+        _wake_send.send(b"\0")
+    except BlockingIOError:
+        pass  # The thread is already due to wake up
+
+
+def _apply(payload):
+    message = json.loads(payload)
+    if message.get("all"):
+        query_cache.invalidate_local(message["name"])
+    else:
+        query_cache.invalidate_local(message["name"], message.get("scope"))
+
+
+def _send_pending(cur):
+    payloads = []
+    while True:
+        try:
+            payloads.append(_outgoing.get_nowait())
+        except queue.Empty:
+            break
+    if not payloads:
+        return
+    try:
+        # One round trip for the whole batch; a single write usually evicts several functions
+        cur.execute(
+            "SELECT pg_notify(%s, payload) FROM unnest(%s::text[]) AS payload",
+            (CHANNEL, list(dict.fromkeys(payloads))),
+        )
+    except Exception:
+        for payload in payloads:
+            _outgoing.put(payload)
+        raise
+
+
+def _drain_wakeups():
+    try:
+        while _wake_recv.recv(4096):
+            pass
+    except BlockingIOError:
+        pass
+
+
+def _listen():
+    conn = get_connection()
+    try:
+        conn.autocommit = True
+        cur = conn.cursor()
+        cur.execute(f"LISTEN {CHANNEL}")
+        own_pid = conn.get_backend_pid()
+        # Invalidations sent while we were not listening are lost, so start from an empty cache
+        query_cache.clear_all()
+
+        while True:
+            _send_pending(cur)
+            readable, _, _ = select.select([conn, _wake_recv], [], [], HEARTBEAT_SECONDS)
+            if _wake_recv in readable:
+                _drain_wakeups()
+            if not readable:
+                # Idle: make sure the connection is still alive rather than silently deaf
+                cur.execute("SELECT 1")
+            conn.poll()
+            while conn.notifies:
+                notify = conn.notifies.pop(0)
+                if notify.pid == own_pid:
+                    continue
+                try:
+                    _apply(notify.payload)
+                except (ValueError, KeyError) as e:
+                    print(f"[WARN] Ignoring malformed cache invalidation {notify.payload!r}: {e}")
+    finally:
+        conn.close()
+
+
+def _run():
+    while True:
+        try:
+            _listen()
+        except Exception as e:
+            print(f"[WARN] Cache invalidation bus error: {e}")
+        time.sleep(RECONNECT_DELAY_SECONDS)
+
+
+def start_cache_bus():
+    """Listen for invalidations from other processes and broadcast ours, once per process."""
+    global _bus_thread
+    with _start_lock:
+        if _bus_thread is None or not _bus_thread.is_alive():
+            query_cache.set_publisher(publish)
+            _bus_thread = threading.Thread(target=_run, name="cache-bus", daemon=True)
+            _bus_thread.start()
+    return _bus_thread
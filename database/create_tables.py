@@ -1,8 +1,75 @@
 # database/create_tables.py
+from sqlalchemy import text
 from database.connection import Base, engine
 from database import models
+from database.models.MedicalDocument import SEARCH_VECTOR_SQL
+from database.models.Appointment import SLOT_RANGE_SQL
+
+# Extensions the models rely on; created before create_all so their constraints can be built
+EXTENSIONS = ["btree_gist"]
+
+# create_all only creates missing tables, so columns added to existing tables are applied here.
+# Every statement must be idempotent because it runs on each startup.
+SCHEMA_UPGRADES = [
+    "ALTER TABLE medical_documents ADD COLUMN IF NOT EXISTS sha256 VARCHAR(64) REFERENCES blobs(sha256)",
+    "CREATE INDEX IF NOT EXISTS ix_medical_documents_sha256 ON medical_documents (sha256)",
+    "ALTER TABLE medical_documents ADD COLUMN IF NOT EXISTS content_text TEXT",
+    f"ALTER TABLE medical_documents ADD COLUMN IF NOT EXISTS search_vector TSVECTOR GENERATED ALWAYS AS ({SEARCH_VECTOR_SQL}) STORED",
+    "CREATE INDEX IF NOT EXISTS ix_medical_documents_search_vector ON medical_documents USING GIN (search_vector)",
+    "ALTER TABLE medical_documents ADD COLUMN IF NOT EXISTS size_bytes BIGINT",
+    """UPDATE medical_documents d SET size_bytes = b.size_bytes
+       FROM blobs b WHERE d.sha256 = b.sha256 AND d.size_bytes IS NULL""",
+    # Seed usage counters once for patients who uploaded before quotas existed
+    """INSERT INTO patient_storage_usage (patient_id, bytes_used, document_count)
+       SELECT patient_id, COALESCE(SUM(size_bytes), 0), COUNT(*) FROM medical_documents GROUP BY patient_id
+       ON CONFLICT (patient_id) DO NOTHING""",
+    "ALTER TABLE document_previews ADD COLUMN IF NOT EXISTS claimed_at TIMESTAMPTZ DEFAULT now()",
+    "ALTER TABLE media_jobs ADD COLUMN IF NOT EXISTS started_at TIMESTAMPTZ DEFAULT now()",
+    "ALTER TABLE appointments ADD COLUMN IF NOT EXISTS slot_start TIMESTAMP",
+    "ALTER TABLE appointments ADD COLUMN IF NOT EXISTS slot_end TIMESTAMP",
+    # Backfill the typed bounds from "HH:MM - HH:MM"; rows whose string cannot be parsed stay NULL
+    r"""UPDATE appointments a
+       SET slot_start = a.appointment_date::date + s.start_at, slot_end = a.appointment_date::date + s.end_at
+       FROM (
+           SELECT appointment_id, m[1]::time AS start_at, m[2]::time AS end_at
+           FROM (
+               SELECT appointment_id,
+                      regexp_match(time_slot, '((?:[01]?\d|2[0-3]):[0-5]\d)\s*-\s*((?:[01]?\d|2[0-3]):[0-5]\d)') AS m
+               FROM appointments WHERE slot_start IS NULL
+           ) parsed
+           WHERE m IS NOT NULL
+       ) s
+       WHERE a.appointment_id = s.appointment_id AND s.end_at > s.start_at""",
+    """DO $$ BEGIN
+           ALTER TABLE appointments ADD CONSTRAINT ck_appointments_slot_order CHECK (slot_end > slot_start);
+       EXCEPTION WHEN duplicate_object THEN NULL;
+       END $$""",
+    "CREATE INDEX IF NOT EXISTS ix_appointments_doctor_slot_start ON appointments (doctor_id, slot_start)",
+    f"ALTER TABLE appointments ADD COLUMN IF NOT EXISTS slot TSRANGE GENERATED ALWAYS AS ({SLOT_RANGE_SQL}) STORED",
+    # Existing overlaps are reported instead of failing startup; the old unique constraint then stays
+    """DO $$ BEGIN
+           ALTER TABLE appointments ADD CONSTRAINT excl_appointments_doctor_slot
+               EXCLUDE USING gist (doctor_id WITH =, slot WITH &&) WHERE (status IS DISTINCT FROM 'cancelled');
+       EXCEPTION
+           WHEN duplicate_table OR duplicate_object THEN NULL;
+           WHEN exclusion_violation THEN
+               RAISE WARNING 'Overlapping appointments exist; resolve them to enable excl_appointments_doctor_slot';
+       END $$""",
+    # Exact-string uniqueness is superseded by the range constraint (and wrongly blocked rebooking cancelled slots)
+    """DO $$ BEGIN
+           IF EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'excl_appointments_doctor_slot') THEN
+               ALTER TABLE appointments DROP CONSTRAINT IF EXISTS unique_doctor_timeslot;
+           END IF;
+       END $$""",
+]
 
 def create_tables():
+    with engine.begin() as conn:
+        for extension in EXTENSIONS:
+            conn.execute(text(f"CREATE EXTENSION IF NOT EXISTS {extension}"))
     # This will create all tables that inherit from Base and don't exist yet
     Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        for statement in SCHEMA_UPGRADES:
+            conn.execute(text(statement))
     print("Tables created successfully!")
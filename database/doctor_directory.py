@@ -0,0 +1,67 @@
+# database/doctor_directory.py
+from collections import Counter
+
+from database.connection import SessionLocal
+from database.models.Doctor import Doctor
+from database.query_cache import cached
+
+# Rebuilt on doctor insert/update (in every process, via the cache bus); the TTL is only a backstop
+DIRECTORY_TTL_SECONDS = 600
+
+
+class DoctorRecord:
+    """The few doctor fields the booking pages need, without an ORM instance per doctor."""
+    __slots__ = ("doctor_id", "user_id", "name", "email", "department", "specialization", "gender")
+
+    def __init__(self, doctor_id, user_id, name, email, department, specialization, gender):
+        self.doctor_id = doctor_id
+        self.user_id = user_id
+        self.name = name
+        self.email = email
+        self.department = department
+        self.specialization = specialization
+        self.gender = gender
+
+    def __repr__(self):
+        return f"<DoctorRecord(doctor_id={self.doctor_id}, name={self.name}, specialization={self.specialization})>"
+
+
+class DoctorDirectory:
+    """Every doctor, indexed by id, specialization and department. Treat it as read-only."""
+
+    def __init__(self, records):
+        records = sorted(records, key=lambda r: (r.name or "").lower())
+        self.by_id = {r.doctor_id: r for r in records}
+        self.by_specialization = {}
+        self.by_department = {}
+        for record in records:
+            self.by_specialization.setdefault(record.specialization, []).append(record)
+            self.by_department.setdefault(record.department, []).append(record)
+        self.specialization_counts = Counter({spec: len(docs) for spec, docs in self.by_specialization.items()})
+        self.department_counts = Counter({dep: len(docs) for dep, docs in self.by_department.items()})
+
+    def get(self, doctor_id):
+        return self.by_id.get(doctor_id)
+
+    def doctors(self, specialization=None, department=None):
+        if specialization:
+            records = self.by_specialization.get(specialization, [])
+            return [r for r in records if not department or r.department == department]
+        if department:
+            return list(self.by_department.get(department, []))
+        return list(self.by_id.values())
+
+
+@cached(ttl=DIRECTORY_TTL_SECONDS)
+def get_doctor_directory():
+    """The process-wide directory, loaded with a single query on first use."""
+    with SessionLocal() as session:
+        rows = session.query(
+            Doctor.doctor_id, Doctor.user_id, Doctor.name, Doctor.email,
+            Doctor.department, Doctor.specialization, Doctor.gender,
+        ).all()
+    return DoctorDirectory(DoctorRecord(*row) for row in rows)
+
+
+def invalidate_doctor_directory():
+    get_doctor_directory.invalidate()
@@ -1,8 +1,11 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, func, UniqueConstraint
-from sqlalchemy.dialects.postgresql import TIMESTAMP
+from sqlalchemy import Column, Integer, String, ForeignKey, func, UniqueConstraint, CheckConstraint, Index, Computed
+from sqlalchemy.dialects.postgresql import TIMESTAMP, TSRANGE, ExcludeConstraint
 from sqlalchemy.orm import relationship
 from database.connection import Base
 
+# NULL (not an unbounded range) when the slot string could not be parsed, so such rows never conflict
+SLOT_RANGE_SQL = "CASE WHEN slot_start IS NOT NULL AND slot_end IS NOT NULL THEN tsrange(slot_start, slot_end) END"
+
 class Appointment(Base):
     __tablename__ = "appointments"
 
@@ -15,14 +18,25 @@ class Appointment(Base):
 
     appointment_date = Column(TIMESTAMP, nullable=False)
     time_slot = Column(String(50), nullable=False)
+    # Typed bounds of time_slot on appointment_date, so durations and overlaps are computed in SQL
+    slot_start = Column(TIMESTAMP)
+    slot_end = Column(TIMESTAMP)
+    slot = Column(TSRANGE, Computed(SLOT_RANGE_SQL, persisted=True))
     reference_number = Column(String(50), unique=True, nullable=False)
     status = Column(String(50), default="scheduled")
     created_at = Column(TIMESTAMP, server_default=func.current_timestamp())
     updated_at = Column(TIMESTAMP, server_default=func.current_timestamp(), onupdate=func.current_timestamp())
 
     __table_args__ = (
-        UniqueConstraint("doctor_id", "appointment_date", "time_slot", name="unique_doctor_timeslot"),
         UniqueConstraint("patient_id", "patient_appointment_no", name="unique_patient_appointment_no"),
+        CheckConstraint("slot_end > slot_start", name="ck_appointments_slot_order"),
+        Index("ix_appointments_doctor_slot_start", "doctor_id", "slot_start"),
+        # A doctor cannot have two live appointments whose ranges overlap (needs btree_gist for doctor_id)
+        ExcludeConstraint(
+            ("doctor_id", "="), ("slot", "&&"),
+            using="gist", where="status IS DISTINCT FROM 'cancelled'",
+            name="excl_appointments_doctor_slot",
+        ),
     )
 
     patient = relationship("Patient", back_populates="appointments")
@@ -0,0 +1,37 @@
+# database/models/AvailabilityException.py
+from sqlalchemy import Column, Integer, String, Date, Time, DateTime, ForeignKey, CheckConstraint, Index, func
+from sqlalchemy.orm import relationship
+from database.connection import Base
+
+class AvailabilityException(Base):
+    """
+    A date range that overrides a doctor's weekly pattern: "block" removes hours (the whole day
+    when no times are given) and "add" opens extra hours on those dates.
+    """
+    __tablename__ = "availability_exceptions"
+
+    exception_id = Column(Integer, primary_key=True, autoincrement=True)
+    doctor_id = Column(Integer, ForeignKey("doctors.doctor_id", ondelete="CASCADE"), nullable=False)
+    start_date = Column(Date, nullable=False)
+    end_date = Column(Date, nullable=False)
+    kind = Column(String(10), nullable=False)  # "block" or "add"
+    start_time = Column(Time)
+    end_time = Column(Time)
+    reason = Column(String(255))
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    doctor = relationship("Doctor", backref="availability_exceptions")
+
+    __table_args__ = (
+        CheckConstraint("kind IN ('block', 'add')", name="ck_availability_exceptions_kind"),
+        CheckConstraint("end_date >= start_date", name="ck_availability_exceptions_dates"),
+        CheckConstraint(
+            "(start_time IS NULL AND end_time IS NULL AND kind = 'block') OR start_time < end_time",
+            name="ck_availability_exceptions_times",
+        ),
+        # Calendar queries ask for every exception of some doctors that touches a date window
+        Index("ix_availability_exceptions_doctor_dates", "doctor_id", "start_date", "end_date"),
+    )
+
+    def __repr__(self):
+        return f"<AvailabilityException(doctor_id={self.doctor_id}, {self.kind} {self.start_date}..{self.end_date})>"
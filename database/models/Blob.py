@@ -0,0 +1,17 @@
+# database/models/Blob.py
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, func
+from database.connection import Base
+
+class Blob(Base):
+    """A stored file, addressed by the SHA-256 of its content and shared by every document that uploads it."""
+    __tablename__ = "blobs"
+
+    sha256 = Column(String(64), primary_key=True)
+    file_path = Column(String(500), unique=True, nullable=False)
+    size_bytes = Column(BigInteger, nullable=False)
+    ref_count = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<Blob(sha256={self.sha256[:12]}, refs={self.ref_count}, size={self.size_bytes})>"
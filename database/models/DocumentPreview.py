@@ -0,0 +1,21 @@
+# database/models/DocumentPreview.py
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, func
+from database.connection import Base
+
+class DocumentPreview(Base):
+    """Lightweight preview of a stored blob, generated once after upload and shared by duplicates."""
+    __tablename__ = "document_previews"
+
+    sha256 = Column(String(64), ForeignKey("blobs.sha256", ondelete="CASCADE"), primary_key=True)
+    status = Column(String(20), nullable=False, default="pending")
+    text_snippet = Column(Text)
+    thumbnail_path = Column(String(500))
+    page_count = Column(Integer)
+    error = Column(Text)
+    # When the current worker took the job; a pending row with an old claim belongs to a dead process
+    claimed_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<DocumentPreview(sha256={self.sha256[:12]}, status={self.status})>"
@@ -0,0 +1,24 @@
+# database/models/MediaJob.py
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, func
+from sqlalchemy.dialects.postgresql import JSONB
+from database.connection import Base
+
+class MediaJob(Base):
+    """Transcoding job for an uploaded audio/video blob and the renditions it produced."""
+    __tablename__ = "media_jobs"
+
+    job_id = Column(Integer, primary_key=True, autoincrement=True)
+    sha256 = Column(String(64), ForeignKey("blobs.sha256", ondelete="CASCADE"), unique=True, nullable=False)
+    kind = Column(String(10), nullable=False)  # "video" or "audio"
+    status = Column(String(20), nullable=False, default="queued")
+    rendition_path = Column(String(500))
+    poster_path = Column(String(500))
+    waveform = Column(JSONB)
+    error = Column(Text)
+    # When the current worker took the job; a queued job older than the claim timeout is handed out again
+    started_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<MediaJob(id={self.job_id}, kind={self.kind}, status={self.status})>"
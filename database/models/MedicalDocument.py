@@ -1,8 +1,17 @@
 # database/models/document_model.py
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, func
+from sqlalchemy import Column, Integer, BigInteger, String, Text, DateTime, ForeignKey, Computed, Index, func
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.orm import relationship
 from database.connection import Base
 
+# Weighted so matches in the name rank above the description, and both above the file's body text
+SEARCH_VECTOR_SQL = (
+    "setweight(to_tsvector('english'::regconfig, coalesce(document_name, '')), 'A') || "
+    "setweight(to_tsvector('english'::regconfig, coalesce(document_type, '') || ' ' || coalesce(category_name, '')), 'B') || "
+    "setweight(to_tsvector('english'::regconfig, coalesce(description, '')), 'B') || "
+    "setweight(to_tsvector('english'::regconfig, coalesce(content_text, '')), 'C')"
+)
+
 class MedicalDocument(Base):
     __tablename__ = "medical_documents"
 
@@ -13,8 +22,18 @@ class MedicalDocument(Base):
     category_name = Column(String(100))
     description = Column(Text)
     file_path = Column(String(500))
+    sha256 = Column(String(64), ForeignKey("blobs.sha256"), index=True)
+    size_bytes = Column(BigInteger)
     uploaded_at = Column(DateTime(timezone=True), server_default=func.now())
 
+    # Text extracted from PDF/DOCX/TXT files after upload; the search vector is maintained by Postgres
+    content_text = Column(Text)
+    search_vector = Column(TSVECTOR, Computed(SEARCH_VECTOR_SQL, persisted=True))
+
+    __table_args__ = (
+        Index("ix_medical_documents_search_vector", "search_vector", postgresql_using="gin"),
+    )
+
     patient = relationship("Patient", back_populates="medical_documents")
 
     # ✅ if shared with doctors, link via shared_documents table
@@ -0,0 +1,28 @@
+# database/models/OutboxEvent.py
+from sqlalchemy import Column, Integer, String, Text, DateTime, Index, func
+from sqlalchemy.dialects.postgresql import JSONB
+from database.connection import Base
+
+
+class OutboxEvent(Base):
+    """Domain event written in the same transaction as the change that caused it."""
+    __tablename__ = "outbox_events"
+
+    event_id = Column(Integer, primary_key=True, autoincrement=True)
+    event_type = Column(String(100), nullable=False)
+    payload = Column(JSONB, nullable=False, default=dict)
+    # Channels (email, chat, waitlist) that still have to be delivered
+    pending_channels = Column(JSONB, nullable=False, default=list)
+    status = Column(String(20), nullable=False, default="pending")
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    claimed_at = Column(DateTime(timezone=True))
+    dispatched_at = Column(DateTime(timezone=True))
+
+    __table_args__ = (
+        Index("ix_outbox_events_status_created", "status", "created_at"),
+    )
+
+    def __repr__(self):
+        return f"<OutboxEvent(id={self.event_id}, type={self.event_type}, status={self.status})>"
@@ -0,0 +1,15 @@
+# database/models/StorageUsage.py
+from sqlalchemy import Column, Integer, BigInteger, DateTime, ForeignKey, func
+from database.connection import Base
+
+class StorageUsage(Base):
+    """Running total of a patient's uploaded bytes, kept in step with medical_documents by the document queries."""
+    __tablename__ = "patient_storage_usage"
+
+    patient_id = Column(Integer, ForeignKey("patients.patient_id", ondelete="CASCADE"), primary_key=True)
+    bytes_used = Column(BigInteger, nullable=False, default=0, index=True)
+    document_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<StorageUsage(patient_id={self.patient_id}, bytes={self.bytes_used}, docs={self.document_count})>"
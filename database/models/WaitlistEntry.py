@@ -0,0 +1,41 @@
+# database/models/WaitlistEntry.py
+from sqlalchemy import Column, Integer, String, Date, DateTime, ForeignKey, CheckConstraint, Index, func, text
+from sqlalchemy.orm import relationship
+from database.connection import Base
+
+class WaitlistEntry(Base):
+    """
+    A patient waiting for any slot with a doctor between two dates. When a slot frees up the first
+    waiting entry gets it on hold ("offered") until hold_expires_at, then confirms or loses it.
+    """
+    __tablename__ = "waitlist_entries"
+
+    waitlist_id = Column(Integer, primary_key=True, autoincrement=True)
+    patient_id = Column(Integer, ForeignKey("patients.patient_id", ondelete="CASCADE"), nullable=False)
+    doctor_id = Column(Integer, ForeignKey("doctors.doctor_id", ondelete="CASCADE"), nullable=False)
+    treatment_id = Column(Integer, ForeignKey("treatments.treatment_id", ondelete="SET NULL"))
+    earliest_date = Column(Date, nullable=False)
+    latest_date = Column(Date, nullable=False)
+    status = Column(String(20), nullable=False, default="waiting")  # waiting, offered, booked, expired, left
+    # The "held" appointment reserving the offered slot
+    offered_appointment_id = Column(Integer, ForeignKey("appointments.appointment_id", ondelete="SET NULL"))
+    hold_expires_at = Column(DateTime(timezone=True))
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    patient = relationship("Patient")
+    doctor = relationship("Doctor")
+    treatment = relationship("Treatment")
+    offered_appointment = relationship("Appointment")
+
+    __table_args__ = (
+        CheckConstraint("latest_date >= earliest_date", name="ck_waitlist_entries_dates"),
+        # The matcher looks for the oldest waiting entry of a doctor whose range covers the freed date
+        Index(
+            "ix_waitlist_entries_doctor_dates", "doctor_id", "earliest_date", "latest_date",
+            postgresql_where=text("status = 'waiting'"),
+        ),
+        Index("ix_waitlist_entries_hold_expiry", "hold_expires_at", postgresql_where=text("status = 'offered'")),
+    )
+
+    def __repr__(self):
+        return f"<WaitlistEntry(patient_id={self.patient_id}, doctor_id={self.doctor_id}, {self.earliest_date}..{self.latest_date}, {self.status})>"
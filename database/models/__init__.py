@@ -5,5 +5,12 @@ from .Treatment import Treatment
 from .Appointment import Appointment
 from .Patient import Patient
 from .Prescription import Prescription
+from .Blob import Blob
 from .MedicalDocument import MedicalDocument
-from .SharedDocument import SharedDocument
\ No newline at end of file
+from .SharedDocument import SharedDocument
+from .OutboxEvent import OutboxEvent
+from .DocumentPreview import DocumentPreview
+from .MediaJob import MediaJob
+from .StorageUsage import StorageUsage
+from .AvailabilityException import AvailabilityException
+from .WaitlistEntry import WaitlistEntry
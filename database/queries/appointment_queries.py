@@ -1,18 +1,85 @@
 import pandas as pd
-from sqlalchemy import func
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import joinedload
-from datetime import datetime, timedelta
+from datetime import datetime
 
 from database.connection import SessionLocal
-from utils.email_utils import send_cancellation_email, send_reschedule_email, send_cancellation_email_doctor
+from database.queries.outbox_queries import enqueue_event, DEFAULT_CHANNELS
+from utils.event_dispatcher import notify_dispatcher
 from database.models.Appointment import Appointment
 from database.models.Patient import Patient
-from database.models.Doctor import Doctor, DoctorAvailability
+from database.models.Doctor import Doctor
 from database.models.User import User
 from database.models.Treatment import Treatment
+from database.queries.paging import keyset_page
+from database.query_cache import cached
+from database.queries.availability_queries import get_availability_calendar, get_month_calendar
+from utils.availability_engine import split_into_slots
+from utils.time_utils import slot_bounds
+
+APPOINTMENT_SORTS = {
+    "Date": Appointment.appointment_date,
+    "Reference": Appointment.reference_number,
+}
+APPOINTMENT_STATUSES = ["scheduled", "held", "completed", "cancelled"]
+# Cancelling or moving an appointment also runs the waitlist matcher for the freed slot
+# (see utils/event_dispatcher.py)
+FREED_SLOT_CHANNELS = DEFAULT_CHANNELS + ["waitlist"]
+
+
+SLOT_TAKEN_MESSAGE = "❌ That time slot has just been booked. Please choose another one."
+# Constraints that reject a booking overlapping another live appointment of the same doctor
+SLOT_CONFLICT_CONSTRAINTS = ("excl_appointments_doctor_slot", "unique_doctor_timeslot")
+
+
+def is_slot_conflict(error: IntegrityError):
+    """True if the database rejected the write because the doctor is already booked at that time."""
+    diag = getattr(error.orig, "diag", None)
+    return getattr(diag, "constraint_name", None) in SLOT_CONFLICT_CONSTRAINTS
+
+
+def appointment_event_payload(appointment, **extra):
+    """Snapshot everything the notification channels need while the session is still open."""
+    patient, doctor = appointment.patient, appointment.doctor
+    payload = {
+        "appointment_id": appointment.appointment_id,
+        "reference_number": appointment.reference_number,
+        "appointment_date": appointment.appointment_date.isoformat() if appointment.appointment_date else None,
+        "time_slot": appointment.time_slot,
+        "slot_start": appointment.slot_start.isoformat() if appointment.slot_start else None,
+        "slot_end": appointment.slot_end.isoformat() if appointment.slot_end else None,
+        "patient_uid": patient.user_id if patient else None,
+        "patient_name": patient.name if patient else None,
+        "patient_email": patient.email if patient else None,
+        "patient_phone": patient.phone_number if patient else None,
+        "patient_gender": patient.gender if patient else None,
+        "patient_dob": patient.date_of_birth.isoformat() if patient and patient.date_of_birth else None,
+        "doctor_id": appointment.doctor_id,
+        "doctor_uid": doctor.user_id if doctor else None,
+        "doctor_name": doctor.name if doctor else None,
+        "doctor_email": doctor.email if doctor else None,
+    }
+    payload.update(extra)
+    return payload
+
+
+def invalidate_appointment_caches(patient_email: str, doctor_email: str, doctor_id: int):
+    """Evict the cached appointment reads of the patient and the doctor of an appointment that changed."""
+    for read in (get_patient_appointments, get_patient_appointments_page, get_patient_appointment_summary,
+                 get_upcoming_appointments):
+        read.invalidate(patient_email)
+    get_appointments_for_doctor.invalidate(doctor_email)
+    for read in (get_doctor_appointments_page, get_appointment_counts, get_appointments_by_department, get_month_calendar):
+        read.invalidate(doctor_id)
+
+
+def _invalidate_for(payload, doctor_id):
+    invalidate_appointment_caches(payload["patient_email"], payload["doctor_email"], doctor_id)
 
 
 # ✅ Get all appointments for a specific patient (properly scoped)
+@cached(scope="email")
 def get_patient_appointments(email: str):
     """Fetch all appointments for a specific patient with full details — safely scoped to that patient only."""
     with SessionLocal() as session:
@@ -58,6 +125,127 @@ def get_patient_appointments(email: str):
 
         return df
 
+@cached(scope="email")
+def get_patient_appointments_page(email: str, search: str = None, status: str = None, sort: str = "Date",
+                                  descending: bool = True, cursor=None, page_size: int = 20):
+    """One keyset page of a patient's appointments, with the same columns as get_patient_appointments."""
+    with SessionLocal() as session:
+        query = (
+            session.query(
+                Appointment.patient_appointment_no,
+                Appointment.appointment_date,
+                Appointment.time_slot,
+                Doctor.name,
+                Doctor.user_id.label("doctor_uid"),
+                Patient.user_id.label("patient_uid"),
+                Appointment.status,
+                Appointment.reference_number,
+                Treatment.treatment_name,
+                Doctor.email,
+                Appointment.appointment_id,
+            )
+            .join(Patient, Appointment.patient_id == Patient.patient_id)
+            .join(Doctor, Appointment.doctor_id == Doctor.doctor_id)
+            .outerjoin(Treatment, Appointment.treatment_id == Treatment.treatment_id)
+            .filter(Patient.email == email)
+        )
+        return keyset_page(
+            query,
+            [(APPOINTMENT_SORTS[sort], descending), (Appointment.appointment_id, descending)],
+            cursor, page_size,
+            filters={Appointment.status: status},
+            search=search,
+            search_columns=[Doctor.name, Treatment.treatment_name, Appointment.reference_number],
+        )
+
+
+@cached(scope="email")
+def get_patient_appointment_summary(email: str):
+    """Appointment counts per status and per doctor for the patient's charts, aggregated in SQL."""
+    with SessionLocal() as session:
+        base = (
+            session.query(Appointment)
+            .join(Patient, Appointment.patient_id == Patient.patient_id)
+            .filter(Patient.email == email)
+        )
+        by_status = (
+            base.with_entities(Appointment.status, func.count())
+            .group_by(Appointment.status)
+            .all()
+        )
+        by_doctor = (
+            base.join(Doctor, Appointment.doctor_id == Doctor.doctor_id)
+            .with_entities(Doctor.name, func.count())
+            .group_by(Doctor.name)
+            .all()
+        )
+        return (
+            pd.DataFrame(by_status, columns=["Status", "Count"]),
+            pd.DataFrame(by_doctor, columns=["Doctor", "Count"]),
+        )
+
+
+@cached(scope="email")
+def get_upcoming_appointments(email: str):
+    """
+    (appointment_id, doctor_id, doctor name, appointment_date, time_slot, reference_number)
+    of a patient's scheduled appointments from today on, soonest first.
+    """
+    with SessionLocal() as session:
+        return (
+            session.query(
+                Appointment.appointment_id,
+                Appointment.doctor_id,
+                Doctor.name,
+                Appointment.appointment_date,
+                Appointment.time_slot,
+                Appointment.reference_number,
+            )
+            .join(Patient, Appointment.patient_id == Patient.patient_id)
+            .join(Doctor, Appointment.doctor_id == Doctor.doctor_id)
+            .filter(
+                Patient.email == email,
+                Appointment.status == "scheduled",
+                Appointment.appointment_date >= datetime.combine(datetime.now().date(), datetime.min.time()),
+            )
+            .order_by(Appointment.appointment_date, Appointment.slot_start)
+            .all()
+        )
+
+
+@cached(scope="doctor_id")
+def get_doctor_appointments_page(doctor_id: int, status: str = None, search: str = None, sort: str = "Date",
+                                 descending: bool = False, cursor=None, page_size: int = 20):
+    """One keyset page of a doctor's appointments with patient and treatment details."""
+    with SessionLocal() as session:
+        query = (
+            session.query(
+                Appointment.appointment_id,
+                Appointment.appointment_date,
+                Patient.name,
+                Appointment.status,
+                Patient.date_of_birth,
+                Patient.gender,
+                Treatment.treatment_name,
+                Appointment.time_slot,
+                Appointment.reference_number,
+                (func.extract("epoch", Appointment.slot_end - Appointment.slot_start) / 3600).label("duration_hours"),
+            )
+            .join(Patient, Appointment.patient_id == Patient.patient_id)
+            .outerjoin(Treatment, Appointment.treatment_id == Treatment.treatment_id)
+            .filter(Appointment.doctor_id == doctor_id)
+        )
+        return keyset_page(
+            query,
+            [(APPOINTMENT_SORTS[sort], descending), (Appointment.appointment_id, descending)],
+            cursor, page_size,
+            filters={Appointment.status: status},
+            search=search,
+            search_columns=[Patient.name, Treatment.treatment_name, Appointment.reference_number],
+        )
+
+
+@cached(scope="email")
 def get_appointments_for_doctor(email: str):
     """Fetch all appointments for a doctor with patient & treatment info (fixed)."""
     with SessionLocal() as session:
@@ -78,6 +266,7 @@ def get_appointments_for_doctor(email: str):
         return appointments
 
 # ✅ Appointment counts summary for doctor dashboard
+@cached(scope="doctor_id")
 def get_appointment_counts(doctor_id: int):
     with SessionLocal() as session:
         total = session.query(Appointment).filter(Appointment.doctor_id == doctor_id).count()
@@ -93,6 +282,7 @@ def get_appointment_counts(doctor_id: int):
 
 
 # ✅ Appointments grouped by department (for analytics)
+@cached(scope="doctor_id")
 def get_appointments_by_department(doctor_id: int):
     with SessionLocal() as session:
         results = (
@@ -104,6 +294,16 @@ def get_appointments_by_department(doctor_id: int):
         )
         return results
 
+def next_patient_appointment_no(session, patient_id: int):
+    """The patient's own running appointment number for a new booking."""
+    last_no = (
+        session.query(func.max(Appointment.patient_appointment_no))
+        .filter(Appointment.patient_id == patient_id)
+        .scalar()
+    )
+    return 1 if last_no is None else last_no + 1
+
+
 # ✅ Create appointment safely
 def create_appointment(patient_id: int, doctor_id: int, treatment_id: int,
                        appointment_date: datetime, time_slot: str,
@@ -122,13 +322,10 @@ def create_appointment(patient_id: int, doctor_id: int, treatment_id: int,
             if not treatment:
                 return None, "❌ Treatment not found."
 
-            # --- 🔹 Determine the next patient appointment number ---
-            last_no = (
-                session.query(func.max(Appointment.patient_appointment_no))
-                .filter(Appointment.patient_id == patient_id)
-                .scalar()
-            )
-            next_no = 1 if last_no is None else last_no + 1
+            next_no = next_patient_appointment_no(session, patient_id)
+            slot_start, slot_end = slot_bounds(appointment_date, time_slot)
+            if slot_start is None:
+                return None, "❌ Invalid time slot."
 
             # --- 🔹 Create the appointment ---
             new_appointment = Appointment(
@@ -137,56 +334,70 @@ def create_appointment(patient_id: int, doctor_id: int, treatment_id: int,
                 treatment_id=treatment_id,
                 appointment_date=appointment_date,
                 time_slot=time_slot,
+                slot_start=slot_start,
+                slot_end=slot_end,
                 reference_number=reference_number,
                 status="scheduled",
                 patient_appointment_no=next_no
             )
 
             session.add(new_appointment)
+            session.flush()
+            payload = appointment_event_payload(new_appointment)
+            enqueue_event(session, "appointment_booked", payload)
             session.commit()
             session.refresh(new_appointment)
             session.close()
+            notify_dispatcher()
+            _invalidate_for(payload, doctor_id)
             return new_appointment
 
+        except IntegrityError as e:
+            session.rollback()
+            # Overlap checks happen in the database, so two patients racing for a slot cannot both win
+            if is_slot_conflict(e):
+                return None, SLOT_TAKEN_MESSAGE
+            return f"❌ Error creating appointment: {e}"
         except Exception as e:
             session.rollback()
             return f"❌ Error creating appointment: {e}"
 
-def get_available_slots(doctor_id: int, appointment_date: datetime, day_name: str):
+def _slot_label(start, end):
+    return f"{start.strftime('%H:%M')} - {end.strftime('%H:%M')}"
+
+
+def _free_slots(session, doctor_id: int, day, exclude_appointment_id: int = None):
+    """
+    Bookable (start, end) slots of a doctor's day that no live appointment overlaps. The day's
+    bookings come from one range query served by the exclusion constraint's index.
+    """
+    # Weekly hours merged per day, with leave and extra clinics for that date applied
+    intervals = get_availability_calendar([doctor_id], day, day)[doctor_id].get(day, [])
+    all_slots = split_into_slots(day, intervals)
+    if not all_slots:
+        return []
+
+    day_start, day_end = all_slots[0][0], all_slots[-1][1]
+    query = session.query(Appointment.slot_start, Appointment.slot_end).filter(
+        Appointment.doctor_id == doctor_id,
+        Appointment.status.is_distinct_from("cancelled"),
+        Appointment.slot.overlaps(func.tsrange(day_start, day_end)),
+    )
+    if exclude_appointment_id is not None:
+        query = query.filter(Appointment.appointment_id != exclude_appointment_id)
+    booked = query.all()
+
+    return [
+        (start, end) for start, end in all_slots
+        if not any(b_start < end and start < b_end for b_start, b_end in booked)
+    ]
+
+
+def get_available_slots(doctor_id: int, appointment_date: datetime, day_name: str = None):
+    # The weekday comes from the date itself; day_name is kept for existing callers
+    day = appointment_date.date() if isinstance(appointment_date, datetime) else appointment_date
     with SessionLocal() as session:
-        availabilities = session.query(DoctorAvailability).filter(
-            DoctorAvailability.doctor_id == doctor_id,
-            DoctorAvailability.day_of_week == day_name
-        ).all()
-
-        if not availabilities:
-            return []  # Doctor not available
-
-        # Generate 30-min slots
-        slot_duration = timedelta(minutes=30)
-        all_slots = []
-
-        for availability in availabilities:
-            start_time = datetime.combine(appointment_date, availability.start_time)
-            end_time = datetime.combine(appointment_date, availability.end_time)
-
-            current_start = start_time
-            while current_start + slot_duration <= end_time:
-                slot_str = f"{current_start.strftime('%H:%M')} - {(current_start + slot_duration).strftime('%H:%M')}"
-                all_slots.append(slot_str)
-                current_start += slot_duration
-
-        # Fetch already booked slots
-        booked_slots = [
-            s[0] for s in session.query(Appointment.time_slot)
-            .filter(
-                Appointment.doctor_id == doctor_id,
-                func.date(Appointment.appointment_date) == appointment_date
-            ).all()
-        ]
-
-        # Return available slots after removing booked ones
-        return [slot for slot in all_slots if slot not in booked_slots]
+        return [_slot_label(start, end) for start, end in _free_slots(session, doctor_id, day)]
 
 
 def cancel_appointment(appointment_id: int, patient_id: int):
@@ -205,15 +416,15 @@ def cancel_appointment(appointment_id: int, patient_id: int):
             return False
 
         appointment.status = "cancelled"
+        payload = appointment_event_payload(appointment, cancelled_by="patient")
+        enqueue_event(session, "appointment_cancelled", payload, FREED_SLOT_CHANNELS)
+        doctor_id = appointment.doctor_id
         session.commit()
 
-        # Optional safety: try sending email but don’t crash system if it fails
-        try:
-            send_cancellation_email(appointment.doctor.user.email, appointment.appointment_id)
-        except Exception as e:
-            print(f"[WARN] Failed to send cancellation email: {e}")
-
-        return True
+    # Notifications are delivered by the outbox dispatcher once the session is released
+    notify_dispatcher()
+    _invalidate_for(payload, doctor_id)
+    return True
     
 def cancel_appointment_doctor(appointment_id: int, patient_id: int = None):
     """Cancel an appointment. If patient_id provided, ensure patient owns it."""
@@ -227,18 +438,28 @@ def cancel_appointment_doctor(appointment_id: int, patient_id: int = None):
             return False
 
         appointment.status = "cancelled"
+        payload = appointment_event_payload(appointment, cancelled_by="doctor")
+        enqueue_event(session, "appointment_cancelled", payload, FREED_SLOT_CHANNELS)
+        doctor_id = appointment.doctor_id
         session.commit()
 
-        # send email to patient
-        try:
-            send_cancellation_email_doctor(appointment.patient.user.email, appointment.reference_number)
-        except Exception as e:
-            print(f"[WARN] Failed to send cancellation email: {e}")
-
-        return True
+    notify_dispatcher()
+    _invalidate_for(payload, doctor_id)
+    return True
 
 def reschedule_appointment(appointment_id: int, patient_id: int, new_date, new_time):
-    """Reschedule a patient's appointment and notify the doctor."""
+    """
+    Move a patient's scheduled appointment to another slot and notify the doctor.
+    Returns (success, message, alternatives); on a conflict, alternatives are the doctor's
+    other free slots that day, from the same query that rejected the move.
+    """
+    new_day = new_date.date() if isinstance(new_date, datetime) else new_date
+    new_start, new_end = slot_bounds(new_day, new_time)
+    if new_start is None:
+        return False, "❌ Invalid time slot.", []
+    if new_start <= datetime.now():
+        return False, "❌ Please choose a time in the future.", []
+
     with SessionLocal() as session:
         appointment = (
             session.query(Appointment)
@@ -246,26 +467,42 @@ def reschedule_appointment(appointment_id: int, patient_id: int, new_date, new_t
                 Appointment.appointment_id == appointment_id,
                 Appointment.patient_id == patient_id
             )
+            .with_for_update()
             .first()
         )
-
         if not appointment:
-            return False
-
-        appointment.appointment_date = new_date
-        appointment.time_slot = new_time
-        appointment.status = "scheduled"
-        session.commit()
-
-        # Notify doctor safely
+            return False, "❌ Appointment not found.", []
+        if appointment.status != "scheduled":
+            return False, "❌ Only scheduled appointments can be rescheduled.", []
+
+        doctor_id = appointment.doctor_id
+        # Moves into the same doctor and day queue up here, so the check below still holds at commit;
+        # direct bookings are kept out by the exclusion constraint
+        session.execute(select(func.pg_advisory_xact_lock(doctor_id, new_day.toordinal())))
+        free = _free_slots(session, doctor_id, new_day, exclude_appointment_id=appointment_id)
+        alternatives = [_slot_label(start, end) for start, end in free if (start, end) != (new_start, new_end)]
+        if (new_start, new_end) not in free:
+            return False, "❌ That time is not available.", alternatives
+
+        freed_start, freed_end = appointment.slot_start, appointment.slot_end
+        appointment.appointment_date = new_day
+        appointment.time_slot = _slot_label(new_start, new_end)
+        appointment.slot_start, appointment.slot_end = new_start, new_end
+        payload = appointment_event_payload(
+            appointment,
+            freed_slot_start=freed_start.isoformat() if freed_start else None,
+            freed_slot_end=freed_end.isoformat() if freed_end else None,
+        )
+        enqueue_event(session, "appointment_rescheduled", payload, FREED_SLOT_CHANNELS)
         try:
-            send_reschedule_email(
-                appointment.doctor.user.email,
-                appointment.appointment_id,
-                new_date,
-                new_time
-            )
-        except Exception as e:
-            print(f"[WARN] Failed to send reschedule email: {e}")
-
-        return True
\ No newline at end of file
+            session.commit()
+        except IntegrityError as e:
+            session.rollback()
+            if is_slot_conflict(e):
+                return False, SLOT_TAKEN_MESSAGE, alternatives
+            raise
+
+    # Emails and notices go out from the outbox dispatcher once the session is released
+    notify_dispatcher()
+    _invalidate_for(payload, doctor_id)
+    return True, f"✅ Appointment moved to {new_day.strftime('%Y-%m-%d')} {payload['time_slot']}.", []
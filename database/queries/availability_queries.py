@@ -1,7 +1,17 @@
+from calendar import monthrange
+from datetime import date, timedelta
 from database.connection import SessionLocal
-from sqlalchemy import and_
+from sqlalchemy import delete, func, insert, update
+from database.models.Appointment import Appointment
 from database.models.Doctor import Doctor, DoctorAvailability  # Assuming ORM models are defined here
 from database.models.User import User
+from database.models.AvailabilityException import AvailabilityException
+from database.query_cache import cached
+from utils.availability_engine import (
+    DAYS_OF_WEEK, add_intervals, build_calendar, diff_schedule, normalize_schedule, overlaps, schedule_from_rows,
+    split_into_slots
+)
+from collections import defaultdict
 
 def get_doctor_id_by_email(email):
     session = SessionLocal()
@@ -20,6 +30,7 @@ def get_doctor_id_by_email(email):
         session.close()
 
 
+@cached(scope="doctor_id")
 def get_doctor_slots(doctor_id):
     session = SessionLocal()
     try:
@@ -28,15 +39,8 @@ def get_doctor_slots(doctor_id):
             .filter(DoctorAvailability.doctor_id == doctor_id)
             .all()
         )
-        return [
-            (
-                s.availability_id,
-                s.day_of_week,
-                s.start_time.strftime("%I:%M %p") if s.start_time else None,
-                s.end_time.strftime("%I:%M %p") if s.end_time else None
-            )
-            for s in slots
-        ]
+        slots.sort(key=lambda s: (_day_index(s.day_of_week), s.start_time))
+        return [(s.availability_id, s.day_of_week, s.start_time, s.end_time) for s in slots]
 
     except Exception as e:
         print(f"[ORM ERROR] get_doctor_slots: {e}")
@@ -45,47 +49,148 @@ def get_doctor_slots(doctor_id):
         session.close()
 
 
-def add_doctor_availability(doctor_id, days, start_time, end_time):
+def _day_index(day):
+    return DAYS_OF_WEEK.index(day) if day in DAYS_OF_WEEK else len(DAYS_OF_WEEK)
+
+
+def _apply_schedule(doctor_id, change):
+    """
+    Rewrite a doctor's weekly schedule in one transaction. change(rows) receives the stored
+    (availability_id, day, start, end) rows and returns the wanted {day: [(start, end), ...]};
+    overlaps in it are merged and only the row-level difference is written, with bulk statements.
+    """
     session = SessionLocal()
     try:
-        for day in days:
-            slot = DoctorAvailability(
-                doctor_id=doctor_id,
-                day_of_week=day,
-                start_time=start_time,
-                end_time=end_time
+        # Lock the doctor row so two concurrent edits cannot both diff against the same state
+        session.query(Doctor.doctor_id).filter(Doctor.doctor_id == doctor_id).with_for_update().scalar()
+        rows = (
+            session.query(
+                DoctorAvailability.availability_id,
+                DoctorAvailability.day_of_week,
+                DoctorAvailability.start_time,
+                DoctorAvailability.end_time,
+            )
+            .filter(DoctorAvailability.doctor_id == doctor_id)
+            .all()
+        )
+        inserts, updates, deletes = diff_schedule(rows, normalize_schedule(change(rows)))
+
+        if deletes:
+            session.execute(
+                delete(DoctorAvailability)
+                .where(DoctorAvailability.availability_id.in_(deletes))
+                .execution_options(synchronize_session=False)
             )
-            session.add(slot)
+        if updates:
+            session.execute(update(DoctorAvailability), [
+                {"availability_id": availability_id, "start_time": start, "end_time": end}
+                for availability_id, start, end in updates
+            ])
+        if inserts:
+            session.execute(insert(DoctorAvailability), [
+                {"doctor_id": doctor_id, "day_of_week": day, "start_time": start, "end_time": end}
+                for day, start, end in inserts
+            ])
         session.commit()
-        return True, "Availability slots added successfully!"
-    except Exception as e:
+        get_doctor_slots.invalidate(doctor_id)
+        get_month_calendar.invalidate(doctor_id)
+    except Exception:
         session.rollback()
-        return False, str(e)
+        raise
     finally:
         session.close()
 
 
+def _merge_note(merged_days):
+    if not merged_days:
+        return ""
+    return f" Overlapping hours were merged on {', '.join(sorted(merged_days, key=_day_index))}."
+
+
+def add_doctor_availability(doctor_id, days, start_time, end_time):
+    merged_days = []
+
+    def change(rows):
+        current = schedule_from_rows(rows)
+        merged_days.extend(overlaps(current, days, start_time, end_time))
+        return add_intervals(current, days, start_time, end_time)
+
+    try:
+        _apply_schedule(doctor_id, change)
+        return True, "Availability slots added successfully!" + _merge_note(merged_days)
+    except Exception as e:
+        return False, str(e)
+
+
 def update_doctor_availability(doctor_id, availability_id, days, start_time, end_time):
-    session = SessionLocal()
+    merged_days = []
+
+    def change(rows):
+        if not any(row.availability_id == availability_id for row in rows):
+            raise ValueError("Availability slot not found.")
+        current = schedule_from_rows(row for row in rows if row.availability_id != availability_id)
+        merged_days.extend(overlaps(current, days, start_time, end_time))
+        return add_intervals(current, days, start_time, end_time)
+
     try:
-        session.query(DoctorAvailability).filter(
-            and_(
-                DoctorAvailability.availability_id == availability_id,
-                DoctorAvailability.doctor_id == doctor_id
-            )
-        ).delete()
-
-        for day in days:
-            new_slot = DoctorAvailability(
-                doctor_id=doctor_id,
-                day_of_week=day,
-                start_time=start_time,
-                end_time=end_time
-            )
-            session.add(new_slot)
+        _apply_schedule(doctor_id, change)
+        return True, "Availability slot updated successfully!" + _merge_note(merged_days)
+    except Exception as e:
+        return False, str(e)
 
+
+def delete_doctor_availability(doctor_id, availability_ids):
+    removed = set(availability_ids)
+    try:
+        _apply_schedule(
+            doctor_id,
+            lambda rows: schedule_from_rows(row for row in rows if row.availability_id not in removed),
+        )
+        return True, "Availability slots deleted successfully!"
+    except Exception as e:
+        return False, str(e)
+
+
+# ---------- Date-specific exceptions ----------
+@cached(scope="doctor_id")
+def get_availability_exceptions(doctor_id, from_date=None):
+    """A doctor's exceptions ending on or after from_date, as (id, start, end, kind, start_time, end_time, reason)."""
+    with SessionLocal() as session:
+        query = session.query(
+            AvailabilityException.exception_id,
+            AvailabilityException.start_date,
+            AvailabilityException.end_date,
+            AvailabilityException.kind,
+            AvailabilityException.start_time,
+            AvailabilityException.end_time,
+            AvailabilityException.reason,
+        ).filter(AvailabilityException.doctor_id == doctor_id)
+        if from_date:
+            query = query.filter(AvailabilityException.end_date >= from_date)
+        return [tuple(row) for row in query.order_by(AvailabilityException.start_date).all()]
+
+
+def add_availability_exception(doctor_id, start_date, end_date, kind, start_time=None, end_time=None, reason=None):
+    """Block (leave, holidays) or add (extra clinics) hours on a date range without touching the weekly pattern."""
+    if kind not in ("block", "add"):
+        return False, "Unknown exception type."
+    if end_date < start_date:
+        return False, "End date must not be before the start date."
+    if (start_time is None) != (end_time is None) or (kind == "add" and start_time is None):
+        return False, "Give both a start and an end time (only a block can cover whole days)."
+    if start_time is not None and start_time >= end_time:
+        return False, "Start time must be before the end time."
+
+    session = SessionLocal()
+    try:
+        session.add(AvailabilityException(
+            doctor_id=doctor_id, start_date=start_date, end_date=end_date, kind=kind,
+            start_time=start_time, end_time=end_time, reason=reason,
+        ))
         session.commit()
-        return True, "Availability slot updated successfully!"
+        get_availability_exceptions.invalidate(doctor_id)
+        get_month_calendar.invalidate(doctor_id)
+        return True, "Leave blocked successfully!" if kind == "block" else "Extra hours added successfully!"
     except Exception as e:
         session.rollback()
         return False, str(e)
@@ -93,19 +198,104 @@ def update_doctor_availability(doctor_id, availability_id, days, start_time, end
         session.close()
 
 
-def delete_doctor_availability(doctor_id, availability_ids):
+def delete_availability_exceptions(doctor_id, exception_ids):
     session = SessionLocal()
     try:
-        session.query(DoctorAvailability).filter(
-            and_(
-                DoctorAvailability.doctor_id == doctor_id,
-                DoctorAvailability.availability_id.in_(availability_ids)
+        session.execute(
+            delete(AvailabilityException)
+            .where(
+                AvailabilityException.doctor_id == doctor_id,
+                AvailabilityException.exception_id.in_(exception_ids),
             )
-        ).delete(synchronize_session=False)
+            .execution_options(synchronize_session=False)
+        )
         session.commit()
-        return True, "Availability slots deleted successfully!"
+        get_availability_exceptions.invalidate(doctor_id)
+        get_month_calendar.invalidate(doctor_id)
+        return True, "Exceptions deleted successfully!"
     except Exception as e:
         session.rollback()
         return False, str(e)
     finally:
         session.close()
+
+
+def get_availability_calendar(doctor_ids, start_date, end_date):
+    """
+    {doctor_id: {date: [(start, end), ...]}} for a date window: the weekly pattern with every
+    exception in the window applied. Two queries in total, however many doctors and days.
+    """
+    doctor_ids = list(doctor_ids)
+    with SessionLocal() as session:
+        weekly_rows = (
+            session.query(
+                DoctorAvailability.doctor_id,
+                DoctorAvailability.day_of_week,
+                DoctorAvailability.start_time,
+                DoctorAvailability.end_time,
+            )
+            .filter(DoctorAvailability.doctor_id.in_(doctor_ids))
+            .all()
+        )
+        exception_rows = (
+            session.query(
+                AvailabilityException.doctor_id,
+                AvailabilityException.start_date,
+                AvailabilityException.end_date,
+                AvailabilityException.kind,
+                AvailabilityException.start_time,
+                AvailabilityException.end_time,
+            )
+            .filter(
+                AvailabilityException.doctor_id.in_(doctor_ids),
+                AvailabilityException.start_date <= end_date,
+                AvailabilityException.end_date >= start_date,
+            )
+            .all()
+        )
+
+    weekly = defaultdict(lambda: defaultdict(list))
+    for doctor_id, day, start, end in weekly_rows:
+        weekly[doctor_id][day].append((start, end))
+    exceptions = defaultdict(list)
+    for doctor_id, *exception in exception_rows:
+        exceptions[doctor_id].append(exception)
+
+    return {
+        doctor_id: build_calendar(normalize_schedule(weekly[doctor_id]), exceptions[doctor_id], start_date, end_date)
+        for doctor_id in doctor_ids
+    }
+
+
+# ---------- Month view ----------
+@cached(ttl=300, scope="doctor_id")
+def get_month_calendar(doctor_id, year, month):
+    """
+    (date, bookable slots, booked appointments) for every day of a month. Bookings are counted
+    by one grouped query; slots come from the weekly pattern with that month's exceptions applied.
+    """
+    first = date(year, month, 1)
+    last = date(year, month, monthrange(year, month)[1])
+    hours = get_availability_calendar([doctor_id], first, last)[doctor_id]
+
+    day = func.date_trunc("day", Appointment.slot_start)
+    with SessionLocal() as session:
+        booked = dict(
+            session.query(day, func.count(Appointment.appointment_id))
+            .filter(
+                Appointment.doctor_id == doctor_id,
+                Appointment.status.is_distinct_from("cancelled"),
+                Appointment.slot_start >= first,
+                Appointment.slot_start < last + timedelta(days=1),
+            )
+            .group_by(day)
+            .all()
+        )
+    booked = {started.date(): count for started, count in booked.items()}
+
+    month = []
+    for offset in range(last.day):
+        current = first + timedelta(days=offset)
+        slots = len(split_into_slots(current, hours.get(current, [])))
+        month.append((current, slots, booked.get(current, 0)))
+    return month
@@ -0,0 +1,33 @@
+from collections import Counter
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from database.models.Blob import Blob
+
+
+def acquire_blob(session: Session, sha256: str, file_path: str, size_bytes: int):
+    """Register a reference to a stored blob, creating its row on first use. Does not commit."""
+    stmt = insert(Blob).values(
+        sha256=sha256,
+        file_path=file_path,
+        size_bytes=size_bytes,
+        ref_count=1,
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Blob.sha256],
+        set_={"ref_count": Blob.ref_count + 1, "updated_at": func.now()},
+    )
+    session.execute(stmt)
+
+
+def release_blobs(session: Session, sha256_list: list[str]):
+    """Drop one reference per entry; blobs that reach zero are left for the storage GC. Does not commit."""
+    for sha256, count in Counter(s for s in sha256_list if s).items():
+        (
+            session.query(Blob)
+            .filter(Blob.sha256 == sha256)
+            .update(
+                {Blob.ref_count: func.greatest(Blob.ref_count - count, 0), Blob.updated_at: func.now()},
+                synchronize_session=False
+            )
+        )
@@ -1,8 +1,10 @@
 from database.connection import SessionLocal
 from database.models.Doctor import Doctor  # adjust the import path as per your structure
 from database.models.User import User
-from database.models.Treatment import Treatment
 from utils.hash_utils import hash_password
+from database.query_cache import cached
+from database.doctor_directory import get_doctor_directory, invalidate_doctor_directory
+from database.treatment_catalog import get_treatment_catalog
 
 def insert_doctor_local(uid, name, email, phone=None, department=None, specialization=None, license_no=None, gender=None):
     """Insert a new doctor into the local database."""
@@ -20,6 +22,7 @@ def insert_doctor_local(uid, name, email, phone=None, department=None, specializ
         )
         session.add(doctor)
         session.commit()
+        invalidate_doctor_directory()
         print(f"✅ Doctor {name} successfully added.")
         return True
     except Exception as e:
@@ -53,21 +56,19 @@ def get_doctor_name_by_user_id(user_id: str):
 
 # ✅ Doctor utilities
 def get_doctors(specialization: str = None):
-    with SessionLocal() as session:
-        query = session.query(Doctor)
-        if specialization:
-            query = query.filter(Doctor.specialization == specialization)
-        return query.all()
+    """Doctors (as DoctorRecords) from the in-process directory, optionally for one specialization."""
+    return get_doctor_directory().doctors(specialization)
+
+
+def get_specialization_counts():
+    """Number of doctors per specialization, for hiding empty choices."""
+    return get_doctor_directory().specialization_counts
 
 
 # ✅ Get treatments by doctor
 def get_treatments_by_doctor(doctor_id: int):
-    with SessionLocal() as session:
-        return (
-            session.query(Treatment)
-            .filter(Treatment.doctor_id == doctor_id)
-            .all()
-        )
+    """The doctor's treatments as TreatmentRecords, from the cached catalog."""
+    return list(get_treatment_catalog(doctor_id).values())
 
 
 # ✅ Get doctor email by ID
@@ -81,6 +82,7 @@ def get_doctor_email(doctor_id: int):
         )
         return doctor.email if doctor else None
 
+@cached(scope="email")
 def get_doctor_profile(email: str):
     """Fetch a doctor's profile based on their email (using ORM)."""
     session = SessionLocal()
@@ -129,6 +131,8 @@ def update_doctor_profile(email: str, name: str, phone: str, department: str, sp
             doctor.user.password_hash = hash_password(password)
 
         session.commit()
+        get_doctor_profile.invalidate(email)
+        invalidate_doctor_directory()
         return True
     except Exception as e:
         session.rollback()
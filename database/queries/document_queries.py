@@ -1,10 +1,24 @@
+from sqlalchemy import func, literal
 from sqlalchemy.orm import Session
 from datetime import datetime
+from database.models.Appointment import Appointment
 from database.models.MedicalDocument import MedicalDocument
 from database.models.Patient import Patient
+from database.models.SharedDocument import SharedDocument
 from database.models.User import User
+from database.queries.blob_queries import acquire_blob, release_blobs
+from database.queries.storage_usage_queries import adjust_usage
+from database.queries.paging import keyset_page
+from database.query_cache import cached
 
+DOCUMENT_SORTS = {
+    "Uploaded": MedicalDocument.uploaded_at,
+    "Name": MedicalDocument.document_name,
+}
 
+
+# A patient's id never changes, so this one is only bounded by its TTL
+@cached(ttl=3600, scope="email")
 def get_patient_id_by_email(session: Session, email: str):
     """Return the patient_id for a given user's email."""
     result = (
@@ -34,24 +48,85 @@ def fetch_documents_by_patient(session, patient_id):
     )
     return records
 
-def insert_document(session: Session, patient_id: int, name: str, doc_type: str, category: str, file_path: str, description: str):
-    """Insert a new document for a patient."""
+def _known_content_text(session: Session, sha256: str):
+    """Extracted text of another document with the same content, so duplicates are searchable immediately."""
+    if not sha256:
+        return None
+    row = (
+        session.query(MedicalDocument.content_text)
+        .filter(MedicalDocument.sha256 == sha256, MedicalDocument.content_text.isnot(None))
+        .first()
+    )
+    return row[0] if row else None
+
+
+@cached(scope="patient_id")
+def has_documents(session: Session, patient_id: int):
+    return session.query(
+        session.query(MedicalDocument.document_id).filter(MedicalDocument.patient_id == patient_id).exists()
+    ).scalar()
+
+
+@cached(scope="patient_id")
+def fetch_documents_page(session: Session, patient_id: int, search: str = None, doc_type: str = None,
+                         category: str = None, sort: str = "Uploaded", descending: bool = True,
+                         cursor=None, page_size: int = 20):
+    """One keyset page of a patient's documents for the paged grid."""
+    query = (
+        session.query(
+            MedicalDocument.document_id,
+            MedicalDocument.document_name,
+            MedicalDocument.document_type,
+            MedicalDocument.description,
+            MedicalDocument.uploaded_at,
+            MedicalDocument.category_name,
+            MedicalDocument.file_path,
+        )
+        .filter(MedicalDocument.patient_id == patient_id)
+    )
+    return keyset_page(
+        query,
+        [(DOCUMENT_SORTS[sort], descending), (MedicalDocument.document_id, descending)],
+        cursor, page_size,
+        filters={MedicalDocument.document_type: doc_type, MedicalDocument.category_name: category},
+        search=search,
+        search_columns=[MedicalDocument.document_name, MedicalDocument.description],
+    )
+
+
+def _invalidate_documents(patient_id: int):
+    has_documents.invalidate(patient_id)
+    fetch_documents_page.invalidate(patient_id)
+
+
+def insert_document(session: Session, patient_id: int, name: str, doc_type: str, category: str, file_path: str, description: str,
+                    sha256: str = None, size_bytes: int = None):
+    """Insert a new document for a patient, take a reference on its blob and count it towards the quota."""
+    if sha256:
+        acquire_blob(session, sha256, file_path, size_bytes)
+    adjust_usage(session, patient_id, size_bytes or 0, 1)
+
     new_doc = MedicalDocument(
         patient_id=patient_id,
         document_name=name,
         document_type=doc_type,
         category_name=category,
         file_path=file_path,
+        sha256=sha256,
+        size_bytes=size_bytes,
         description=description,
+        content_text=_known_content_text(session, sha256),
         uploaded_at=datetime.utcnow()
     )
     session.add(new_doc)
     session.commit()
+    _invalidate_documents(patient_id)
     return new_doc
 
 
-def update_document(session: Session, patient_id: int, document_id: int, name: str, doc_type: str, category: str, description: str, file_path: str):
-    """Update an existing patient document."""
+def update_document(session: Session, patient_id: int, document_id: int, name: str, doc_type: str, category: str, description: str, file_path: str,
+                    sha256: str = None, size_bytes: int = None):
+    """Update an existing patient document, moving its blob reference if the file changed."""
     doc = (
         session.query(MedicalDocument)
         .filter(
@@ -64,6 +139,15 @@ def update_document(session: Session, patient_id: int, document_id: int, name: s
     if not doc:
         return None
 
+    if file_path != doc.file_path:
+        if sha256:
+            acquire_blob(session, sha256, file_path, size_bytes)
+        release_blobs(session, [doc.sha256])
+        adjust_usage(session, patient_id, (size_bytes or 0) - (doc.size_bytes or 0))
+        doc.sha256 = sha256
+        doc.size_bytes = size_bytes
+        doc.content_text = _known_content_text(session, sha256)
+
     doc.document_name = name
     doc.document_type = doc_type
     doc.category_name = category
@@ -72,11 +156,22 @@ def update_document(session: Session, patient_id: int, document_id: int, name: s
     doc.uploaded_at = datetime.utcnow()
 
     session.commit()
+    _invalidate_documents(patient_id)
     return doc
 
 
 def delete_documents(session: Session, patient_id: int, document_ids: list[int]):
-    """Delete selected documents for a specific patient."""
+    """Delete selected documents for a specific patient, release their blobs and their quota."""
+    rows = (
+        session.query(MedicalDocument.sha256, MedicalDocument.size_bytes)
+        .filter(
+            MedicalDocument.patient_id == patient_id,
+            MedicalDocument.document_id.in_(document_ids)
+        )
+        .all()
+    )
+    release_blobs(session, [row.sha256 for row in rows])
+    adjust_usage(session, patient_id, -sum(row.size_bytes or 0 for row in rows), -len(rows))
     (
         session.query(MedicalDocument)
         .filter(
@@ -86,3 +181,78 @@ def delete_documents(session: Session, patient_id: int, document_ids: list[int])
         .delete(synchronize_session=False)
     )
     session.commit()
+    _invalidate_documents(patient_id)
+
+
+# ---------- Full-text search ----------
+SEARCH_PAGE_SIZE = 10
+HEADLINE_OPTIONS = "MaxFragments=2, MaxWords=20, MinWords=8, FragmentDelimiter= … , StartSel=**, StopSel=**"
+
+
+def search_documents(session: Session, query: str, patient_id: int = None, doctor_id: int = None,
+                     reference_number: str = None, page: int = 1, page_size: int = SEARCH_PAGE_SIZE):
+    """
+    Ranked full-text search over a patient's own documents, or over the documents shared with a doctor
+    (optionally for one appointment reference). Returns (hits, total) for the requested page.
+    """
+    if patient_id is None and doctor_id is None:
+        raise ValueError("search_documents needs a patient_id or doctor_id scope")
+
+    ts_query = func.websearch_to_tsquery("english", query)
+    rank = func.ts_rank_cd(MedicalDocument.search_vector, ts_query).label("rank")
+
+    if doctor_id is not None:
+        scoped = (
+            session.query(
+                MedicalDocument.document_id,
+                Appointment.reference_number,
+                Patient.name.label("patient_name"),
+                rank,
+            )
+            .join(SharedDocument, SharedDocument.document_id == MedicalDocument.document_id)
+            .join(Appointment, Appointment.appointment_id == SharedDocument.appointment_id)
+            .join(Patient, Patient.patient_id == SharedDocument.patient_id)
+            .filter(SharedDocument.doctor_id == doctor_id)
+        )
+        if reference_number:
+            scoped = scoped.filter(Appointment.reference_number.ilike(f"%{reference_number.strip()}%"))
+    else:
+        scoped = (
+            session.query(
+                MedicalDocument.document_id,
+                literal(None).label("reference_number"),
+                literal(None).label("patient_name"),
+                rank,
+            )
+            .filter(MedicalDocument.patient_id == patient_id)
+        )
+
+    scoped = scoped.filter(MedicalDocument.search_vector.op("@@")(ts_query))
+    total = scoped.order_by(None).count()
+
+    # Only the rows on this page pay for ts_headline, which re-parses the document text
+    page_rows = (
+        scoped.order_by(rank.desc(), MedicalDocument.document_id.desc())
+        .limit(page_size)
+        .offset((max(page, 1) - 1) * page_size)
+        .subquery()
+    )
+    headline_source = func.coalesce(MedicalDocument.content_text, MedicalDocument.description, "")
+    hits = (
+        session.query(
+            MedicalDocument.document_id,
+            MedicalDocument.document_name,
+            MedicalDocument.document_type,
+            MedicalDocument.category_name,
+            MedicalDocument.uploaded_at,
+            MedicalDocument.file_path,
+            page_rows.c.reference_number,
+            page_rows.c.patient_name,
+            page_rows.c.rank,
+            func.ts_headline("english", headline_source, ts_query, HEADLINE_OPTIONS).label("snippet"),
+        )
+        .join(page_rows, page_rows.c.document_id == MedicalDocument.document_id)
+        .order_by(page_rows.c.rank.desc(), MedicalDocument.document_id.desc())
+        .all()
+    )
+    return hits, total
@@ -0,0 +1,52 @@
+from datetime import timedelta
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert
+from database.connection import SessionLocal
+from database.models.Blob import Blob
+from database.models.MediaJob import MediaJob
+
+# A job still queued this long after it was started was lost with its worker and is handed out again
+MEDIA_CLAIM_TIMEOUT = timedelta(minutes=30)
+
+
+def claim_media_job(sha256: str, kind: str):
+    """
+    Queue a transcoding job for a blob, or take over one whose worker died (queued past
+    MEDIA_CLAIM_TIMEOUT). Returns False if the content already has a live or finished job.
+    """
+    statement = insert(MediaJob).values(sha256=sha256, kind=kind, status="queued", started_at=func.now())
+    with SessionLocal() as session:
+        result = session.execute(
+            statement.on_conflict_do_update(
+                index_elements=[MediaJob.sha256],
+                set_={"started_at": func.now()},
+                where=(MediaJob.status == "queued")
+                & (func.coalesce(MediaJob.started_at, MediaJob.updated_at) < func.now() - MEDIA_CLAIM_TIMEOUT),
+            )
+        )
+        session.commit()
+        return result.rowcount == 1
+
+
+def finish_media_job(sha256: str, status: str, rendition_path: str = None, poster_path: str = None,
+                     waveform: list = None, error: str = None):
+    with SessionLocal() as session:
+        session.query(MediaJob).filter(MediaJob.sha256 == sha256).update({
+            MediaJob.status: status,
+            MediaJob.rendition_path: rendition_path,
+            MediaJob.poster_path: poster_path,
+            MediaJob.waveform: waveform,
+            MediaJob.error: error,
+        }, synchronize_session=False)
+        session.commit()
+
+
+def get_media_job_for_path(file_path: str):
+    """Return the transcoding job of the blob stored at file_path, if any."""
+    with SessionLocal() as session:
+        return (
+            session.query(MediaJob)
+            .join(Blob, Blob.sha256 == MediaJob.sha256)
+            .filter(Blob.file_path == file_path)
+            .first()
+        )
@@ -0,0 +1,93 @@
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import or_, and_
+from sqlalchemy.orm import Session
+
+from database.connection import SessionLocal
+from database.models.OutboxEvent import OutboxEvent
+
+# Channels every appointment event is routed to unless the caller narrows it down
+DEFAULT_CHANNELS = ["email", "chat"]
+MAX_ATTEMPTS = 5
+# A claimed event whose dispatcher died is handed out again after this long
+CLAIM_TIMEOUT = timedelta(minutes=5)
+
+
+def enqueue_event(session: Session, event_type: str, payload: dict, channels: list[str] = None):
+    """
+    Add a domain event to the outbox without committing.
+    The caller commits it together with the write that produced it.
+    """
+    event = OutboxEvent(
+        event_type=event_type,
+        payload=payload,
+        pending_channels=list(channels or DEFAULT_CHANNELS),
+        status="pending",
+        attempts=0,
+    )
+    session.add(event)
+    return event
+
+
+def claim_pending_events(limit: int = 20):
+    """
+    Claim a batch of undelivered events and return them as plain dicts.
+    Rows are locked with SKIP LOCKED so several dispatchers never claim the same event,
+    and the session is closed before any network I/O happens.
+    """
+    now = datetime.now(timezone.utc)
+    with SessionLocal() as session:
+        events = (
+            session.query(OutboxEvent)
+            .filter(
+                or_(
+                    OutboxEvent.status == "pending",
+                    and_(
+                        OutboxEvent.status == "processing",
+                        OutboxEvent.claimed_at < now - CLAIM_TIMEOUT
+                    )
+                )
+            )
+            .order_by(OutboxEvent.created_at.asc())
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+            .all()
+        )
+
+        claimed = []
+        for event in events:
+            event.status = "processing"
+            event.claimed_at = now
+            claimed.append({
+                "event_id": event.event_id,
+                "event_type": event.event_type,
+                "payload": dict(event.payload or {}),
+                "pending_channels": list(event.pending_channels or []),
+                "attempts": event.attempts,
+            })
+        session.commit()
+        return claimed
+
+
+def record_dispatch_result(event_id: int, failed_channels: list[str], error: str = None):
+    """Store the outcome of one dispatch attempt; failed channels are retried later."""
+    with SessionLocal() as session:
+        event = session.query(OutboxEvent).filter_by(event_id=event_id).first()
+        if not event:
+            return
+
+        event.attempts = (event.attempts or 0) + 1
+        event.pending_channels = list(failed_channels)
+        event.claimed_at = None
+
+        if not failed_channels:
+            event.status = "dispatched"
+            event.dispatched_at = datetime.now(timezone.utc)
+            event.last_error = None
+        elif event.attempts >= MAX_ATTEMPTS:
+            event.status = "failed"
+            event.last_error = error
+        else:
+            event.status = "pending"
+            event.last_error = error
+
+        session.commit()
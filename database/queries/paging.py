@@ -0,0 +1,46 @@
+from sqlalchemy import and_, or_
+
+
+def keyset_page(query, sort_columns, cursor=None, page_size=20, filters=None, search=None, search_columns=()):
+    """
+    Fetch one page of a query with keyset (seek) pagination instead of OFFSET.
+
+    sort_columns is a list of (column, descending) pairs whose last entry must be unique (usually the
+    primary key) so the order is total; the columns must also be selected, unlabelled, by the query.
+    cursor holds their values for the last row of the previous page. filters maps column -> exact
+    value; search is matched case-insensitively against search_columns.
+    Returns (rows, next_cursor); next_cursor is None on the last page.
+    """
+    for column, value in (filters or {}).items():
+        if value not in (None, ""):
+            query = query.filter(column == value)
+
+    if search and search_columns:
+        pattern = f"%{search.strip()}%"
+        query = query.filter(or_(*[column.ilike(pattern) for column in search_columns]))
+
+    if cursor is not None:
+        query = query.filter(_after(sort_columns, cursor))
+
+    query = query.order_by(*[column.desc() if descending else column.asc() for column, descending in sort_columns])
+    # One extra row tells us whether another page exists without a COUNT(*)
+    rows = query.limit(page_size + 1).all()
+
+    if len(rows) <= page_size:
+        return rows, None
+    rows = rows[:page_size]
+    return rows, _cursor_of(rows[-1], sort_columns)
+
+
+def _after(sort_columns, cursor):
+    """Rows strictly after cursor in the sort order; expanded so mixed ASC/DESC keys work too."""
+    clauses = []
+    for i, (column, descending) in enumerate(sort_columns):
+        equal_prefix = [sort_columns[j][0] == cursor[j] for j in range(i)]
+        step = column < cursor[i] if descending else column > cursor[i]
+        clauses.append(and_(*equal_prefix, step))
+    return or_(*clauses)
+
+
+def _cursor_of(row, sort_columns):
+    return tuple(getattr(row, column.key) for column, _ in sort_columns)
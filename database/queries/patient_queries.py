@@ -4,6 +4,7 @@ from database.models.Patient import Patient
 from database.models.User import User
 from utils.hash_utils import hash_password
 from datetime import datetime
+from database.query_cache import cached
 
 def insert_patient_local(uid, name, email, phone=None, dob=None, gender=None):
     session = SessionLocal()
@@ -37,6 +38,7 @@ def get_patient_by_user_id(user_id: str):
     finally:
         session.close()
 
+@cached(scope="email")
 def get_patient_profile(email: str):
     session = SessionLocal()
     try:
@@ -84,6 +86,7 @@ def update_patient_profile(name, phone, dob, email, password=None):
 
             # Step 4: Commit transaction
             session.commit()
+            get_patient_profile.invalidate(email)
             return True
 
         except Exception as e:
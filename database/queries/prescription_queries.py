@@ -4,7 +4,9 @@ from database.models.Patient import Patient
 from database.models.Doctor import Doctor
 from database.models.User import User
 from database.models.Appointment import Appointment
-from datetime import datetime
+from datetime import datetime, date, time
+from database.query_cache import cached
+from database.queries.appointment_queries import invalidate_appointment_caches
 
 
 # -------------------------------
@@ -29,6 +31,14 @@ def get_prescriptions_for_patient(session: Session, email: str):
     )
 
 
+@cached(scope="email")
+def get_prescription_records_for_patient(session: Session, email: str):
+    """
+    The patient's prescriptions as plain records (see to_prescription_record), cached per patient.
+    """
+    return [to_prescription_record(p) for p in get_prescriptions_for_patient(session, email)]
+
+
 # -------------------------------
 # 🧠 DOCTOR QUERIES
 # -------------------------------
@@ -51,6 +61,41 @@ def get_prescriptions_for_doctor(session: Session, email: str):
     )
 
 
+def get_todays_prescriptions_for_doctor(session: Session, email: str):
+    """
+    Return the prescriptions a doctor created today, for batch export.
+    """
+    start_of_day = datetime.combine(date.today(), time.min)
+    return (
+        session.query(Prescription)
+        .join(Prescription.doctor)
+        .join(Doctor.user)
+        .filter(User.email == email)
+        .filter(Prescription.created_at >= start_of_day)
+        .options(
+            joinedload(Prescription.doctor),
+            joinedload(Prescription.patient)
+        )
+        .order_by(Prescription.created_at.asc())
+        .all()
+    )
+
+
+def to_prescription_record(prescription: Prescription):
+    """
+    Flatten a prescription into a picklable dict for the PDF renderer.
+    """
+    return {
+        "prescription_id": prescription.prescription_id,
+        "medication_name": prescription.medication_name,
+        "dosage": prescription.dosage,
+        "duration": prescription.duration,
+        "created_at": prescription.created_at.isoformat() if prescription.created_at else None,
+        "patient_name": prescription.patient.name if prescription.patient else None,
+        "doctor_name": prescription.doctor.name if prescription.doctor else None,
+    }
+
+
 # -------------------------------
 # 💊 CREATE NEW PRESCRIPTION
 # -------------------------------
@@ -79,6 +124,10 @@ def create_prescription(session: Session, appointment_id: int, doctor_id: int, m
     session.commit()
     session.refresh(new_prescription)
 
+    patient_email = appointment.patient.email if appointment.patient else None
+    get_prescription_records_for_patient.invalidate(patient_email)
+    invalidate_appointment_caches(patient_email, appointment.doctor.email if appointment.doctor else None, doctor_id)
+
     return new_prescription
 
 
@@ -128,6 +177,8 @@ def delete_prescription(session: Session, prescription_id: int):
     if not prescription:
         raise ValueError("Prescription not found")
 
+    patient_email = prescription.patient.email if prescription.patient else None
     session.delete(prescription)
     session.commit()
+    get_prescription_records_for_patient.invalidate(patient_email)
     return True
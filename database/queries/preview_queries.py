@@ -0,0 +1,107 @@
+from datetime import timedelta
+from sqlalchemy import or_, func
+from sqlalchemy.dialects.postgresql import insert
+from database.connection import SessionLocal
+from database.models.Blob import Blob
+from database.models.DocumentPreview import DocumentPreview
+from database.models.MedicalDocument import MedicalDocument
+
+# A preview still pending this long after its claim was lost with its worker and is handed out again
+PREVIEW_CLAIM_TIMEOUT = timedelta(minutes=10)
+
+
+def get_preview_for_path(file_path: str):
+    """Return the preview row for a stored file path, or None if none was generated yet."""
+    with SessionLocal() as session:
+        return (
+            session.query(DocumentPreview)
+            .join(Blob, Blob.sha256 == DocumentPreview.sha256)
+            .filter(Blob.file_path == file_path)
+            .first()
+        )
+
+
+def get_blob_hash_for_path(file_path: str):
+    with SessionLocal() as session:
+        row = session.query(Blob.sha256).filter(Blob.file_path == file_path).first()
+        return row[0] if row else None
+
+
+def get_document_text_for_path(file_path: str):
+    """Text already extracted for search from the document stored at file_path, or None."""
+    with SessionLocal() as session:
+        row = (
+            session.query(MedicalDocument.content_text)
+            .filter(MedicalDocument.file_path == file_path, MedicalDocument.content_text.isnot(None))
+            .first()
+        )
+        return row[0] if row else None
+
+
+def claim_preview(sha256: str):
+    """
+    Create a pending preview row, or take over one whose worker died (pending past
+    PREVIEW_CLAIM_TIMEOUT). Returns False when another upload of the same content already
+    produced, or is still producing, the preview, so the work is never repeated.
+    """
+    statement = insert(DocumentPreview).values(sha256=sha256, status="pending", claimed_at=func.now())
+    with SessionLocal() as session:
+        result = session.execute(
+            statement.on_conflict_do_update(
+                index_elements=[DocumentPreview.sha256],
+                set_={"claimed_at": func.now()},
+                where=(DocumentPreview.status == "pending")
+                & (func.coalesce(DocumentPreview.claimed_at, DocumentPreview.updated_at) < func.now() - PREVIEW_CLAIM_TIMEOUT),
+            )
+        )
+        session.commit()
+        return result.rowcount == 1
+
+
+def save_preview(sha256: str, status: str, text_snippet: str = None, thumbnail_path: str = None,
+                 page_count: int = None, error: str = None):
+    with SessionLocal() as session:
+        session.query(DocumentPreview).filter(DocumentPreview.sha256 == sha256).update({
+            DocumentPreview.status: status,
+            DocumentPreview.text_snippet: text_snippet,
+            DocumentPreview.thumbnail_path: thumbnail_path,
+            DocumentPreview.page_count: page_count,
+            DocumentPreview.error: error,
+        }, synchronize_session=False)
+        session.commit()
+
+
+def save_document_text(sha256: str, text: str):
+    """Store extracted text on every document with this content; Postgres refreshes their search vectors."""
+    with SessionLocal() as session:
+        session.query(MedicalDocument).filter(MedicalDocument.sha256 == sha256).update(
+            {MedicalDocument.content_text: text}, synchronize_session=False
+        )
+        session.commit()
+
+
+def save_document_text_for_id(document_id: int, text: str):
+    """Store extracted text on one document, for uploads from before content hashing that have no sha256."""
+    with SessionLocal() as session:
+        session.query(MedicalDocument).filter(MedicalDocument.document_id == document_id).update(
+            {MedicalDocument.content_text: text}, synchronize_session=False
+        )
+        session.commit()
+
+
+def get_documents_missing_text(extensions, limit: int = 100):
+    """
+    (document_id, sha256, file_path) of searchable uploads whose text was never extracted, e.g. from
+    before search existed. sha256 is None for uploads that predate content hashing.
+    """
+    with SessionLocal() as session:
+        return (
+            session.query(MedicalDocument.document_id, MedicalDocument.sha256, MedicalDocument.file_path)
+            .filter(
+                MedicalDocument.content_text.is_(None),
+                or_(*[MedicalDocument.file_path.ilike(f"%{ext}") for ext in extensions]),
+            )
+            .order_by(MedicalDocument.document_id)
+            .limit(limit)
+            .all()
+        )
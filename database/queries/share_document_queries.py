@@ -6,6 +6,13 @@ from database.models import Appointment
 from datetime import datetime
 
 from database.connection import SessionLocal
+from database.queries.paging import keyset_page
+
+SHARED_DOCUMENT_SORTS = {
+    "Shared On": SharedDocument.shared_on,
+    "Patient": Patient.name,
+    "Document": MedicalDocument.document_name,
+}
 
 def share_documents_with_doctor(appointment_id: int, patient_id: int, doctor_id: int):
     """Share all patient's documents with the selected doctor for this appointment."""
@@ -25,10 +32,10 @@ def share_documents_with_doctor(appointment_id: int, patient_id: int, doctor_id:
     db.commit()
 
 
-def get_shared_documents_for_doctor(doctor_id: int):
-    """Fetch all documents shared with a particular doctor, including appointment reference numbers."""
+def get_shared_documents_for_doctor(doctor_id: int, reference_number: str = None):
+    """Fetch documents shared with a doctor, optionally only those for matching appointment references."""
     db = SessionLocal()
-    result = (
+    query = (
         db.query(
             SharedDocument.id.label("shared_id"),
             Patient.name.label("patient_name"),
@@ -44,8 +51,80 @@ def get_shared_documents_for_doctor(doctor_id: int):
         .join(Patient, SharedDocument.patient_id == Patient.patient_id)
         .join(Appointment, SharedDocument.appointment_id == Appointment.appointment_id)  # <-- join
         .filter(SharedDocument.doctor_id == doctor_id)
+    )
+    if reference_number:
+        query = query.filter(Appointment.reference_number.ilike(f"%{reference_number.strip()}%"))
+    result = query.all()
+    db.close()
+    return result
+
+
+def get_shared_files_for_appointment(doctor_id: int, reference_number: str):
+    """(document_name, file_path) of every document shared with the doctor for one appointment."""
+    db = SessionLocal()
+    result = (
+        db.query(MedicalDocument.document_name, MedicalDocument.file_path)
+        .join(SharedDocument, SharedDocument.document_id == MedicalDocument.document_id)
+        .join(Appointment, SharedDocument.appointment_id == Appointment.appointment_id)
+        .filter(
+            SharedDocument.doctor_id == doctor_id,
+            Appointment.reference_number == reference_number,
+            MedicalDocument.file_path.isnot(None),
+        )
+        .order_by(MedicalDocument.uploaded_at)
         .all()
     )
     db.close()
     return result
 
+
+def get_shared_documents_page(doctor_id: int, reference_number: str = None, search: str = None,
+                              sort: str = "Shared On", descending: bool = True, cursor=None, page_size: int = 20):
+    """One keyset page of the documents shared with a doctor for the paged grid."""
+    db = SessionLocal()
+    query = (
+        db.query(
+            SharedDocument.id,
+            Patient.name,
+            MedicalDocument.document_name,
+            MedicalDocument.document_type,
+            MedicalDocument.category_name,
+            MedicalDocument.description,
+            MedicalDocument.file_path,
+            SharedDocument.doctor_id,
+            Appointment.reference_number,
+            SharedDocument.shared_on,
+        )
+        .join(MedicalDocument, SharedDocument.document_id == MedicalDocument.document_id)
+        .join(Patient, SharedDocument.patient_id == Patient.patient_id)
+        .join(Appointment, SharedDocument.appointment_id == Appointment.appointment_id)
+        .filter(SharedDocument.doctor_id == doctor_id)
+    )
+    if reference_number:
+        query = query.filter(Appointment.reference_number.ilike(f"%{reference_number.strip()}%"))
+    result = keyset_page(
+        query,
+        [(SHARED_DOCUMENT_SORTS[sort], descending), (SharedDocument.id, descending)],
+        cursor, page_size,
+        search=search,
+        search_columns=[Patient.name, MedicalDocument.document_name, MedicalDocument.description],
+    )
+    db.close()
+    return result
+
+
+def get_shared_references(doctor_id: int, reference_number: str = None):
+    """Distinct appointment references with documents shared with the doctor."""
+    db = SessionLocal()
+    query = (
+        db.query(Appointment.reference_number)
+        .join(SharedDocument, SharedDocument.appointment_id == Appointment.appointment_id)
+        .filter(SharedDocument.doctor_id == doctor_id)
+        .distinct()
+        .order_by(Appointment.reference_number)
+    )
+    if reference_number:
+        query = query.filter(Appointment.reference_number.ilike(f"%{reference_number.strip()}%"))
+    result = [row[0] for row in query.all()]
+    db.close()
+    return result
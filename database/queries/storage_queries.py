@@ -0,0 +1,54 @@
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import select
+from database.connection import SessionLocal
+from database.models.Blob import Blob
+from database.models.DocumentPreview import DocumentPreview
+from database.models.MediaJob import MediaJob
+from database.models.MedicalDocument import MedicalDocument
+
+# Every column that points at a file under Uploads/
+REFERENCED_PATH_COLUMNS = [
+    MedicalDocument.file_path,
+    Blob.file_path,
+    DocumentPreview.thumbnail_path,
+    MediaJob.rendition_path,
+    MediaJob.poster_path,
+]
+
+
+def iter_referenced_paths(batch_size: int = 5000):
+    """Yield every stored file path the database still references, fetched in batches."""
+    with SessionLocal() as session:
+        for column in REFERENCED_PATH_COLUMNS:
+            stmt = select(column).where(column.isnot(None)).execution_options(yield_per=batch_size)
+            for partition in session.execute(stmt).scalars().partitions():
+                yield from partition
+
+
+def purge_unreferenced_blobs(grace_seconds: int, batch_size: int = 500):
+    """
+    Delete blob rows that have had no references for longer than the grace period.
+    Their previews and media jobs go with them (ON DELETE CASCADE), which leaves the files
+    unreferenced for the sweep. Rows another transaction is re-acquiring are skipped.
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=grace_seconds)
+    purged = 0
+    with SessionLocal() as session:
+        while True:
+            dead = (
+                session.query(Blob.sha256)
+                .filter(Blob.ref_count == 0, Blob.updated_at < cutoff)
+                .limit(batch_size)
+                .with_for_update(skip_locked=True)
+                .all()
+            )
+            if not dead:
+                break
+            (
+                session.query(Blob)
+                .filter(Blob.sha256.in_([row.sha256 for row in dead]), Blob.ref_count == 0)
+                .delete(synchronize_session=False)
+            )
+            session.commit()
+            purged += len(dead)
+    return purged
@@ -0,0 +1,62 @@
+import os
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from database.models.Patient import Patient
+from database.models.StorageUsage import StorageUsage
+
+PATIENT_STORAGE_QUOTA_BYTES = int(os.getenv("PATIENT_STORAGE_QUOTA_MB", 500)) * 1024 * 1024
+
+
+def adjust_usage(session: Session, patient_id: int, bytes_delta: int, count_delta: int = 0):
+    """Apply a change to the patient's usage counter in the caller's transaction. Does not commit."""
+    if not bytes_delta and not count_delta:
+        return
+    stmt = insert(StorageUsage).values(
+        patient_id=patient_id,
+        bytes_used=max(bytes_delta, 0),
+        document_count=max(count_delta, 0),
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[StorageUsage.patient_id],
+        set_={
+            "bytes_used": func.greatest(StorageUsage.bytes_used + bytes_delta, 0),
+            "document_count": func.greatest(StorageUsage.document_count + count_delta, 0),
+            "updated_at": func.now(),
+        },
+    )
+    session.execute(stmt)
+
+
+def get_usage(session: Session, patient_id: int):
+    """Return (bytes_used, document_count) for a patient without touching the file system."""
+    row = (
+        session.query(StorageUsage.bytes_used, StorageUsage.document_count)
+        .filter(StorageUsage.patient_id == patient_id)
+        .first()
+    )
+    return (row.bytes_used, row.document_count) if row else (0, 0)
+
+
+def check_quota(session: Session, patient_id: int, incoming_bytes: int, replaced_bytes: int = 0):
+    """Return (allowed, bytes_used, quota) for storing incoming_bytes, optionally replacing an existing file."""
+    used, _ = get_usage(session, patient_id)
+    return used - replaced_bytes + incoming_bytes <= PATIENT_STORAGE_QUOTA_BYTES, used, PATIENT_STORAGE_QUOTA_BYTES
+
+
+def get_top_consumers(session: Session, limit: int = 20):
+    """Patients using the most storage, straight from the counters."""
+    return (
+        session.query(
+            Patient.patient_id,
+            Patient.name,
+            Patient.email,
+            StorageUsage.bytes_used,
+            StorageUsage.document_count,
+            StorageUsage.updated_at,
+        )
+        .join(Patient, Patient.patient_id == StorageUsage.patient_id)
+        .order_by(StorageUsage.bytes_used.desc())
+        .limit(limit)
+        .all()
+    )
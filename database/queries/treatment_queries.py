@@ -2,6 +2,20 @@ from sqlalchemy.orm import Session
 from database.models.Treatment import Treatment
 from database.models.Doctor import Doctor
 from database.models.User import User
+from database.queries.paging import keyset_page
+from database.treatment_catalog import invalidate_treatment_catalog
+from database.query_cache import cached
+
+TREATMENT_SORTS = {
+    "Name": Treatment.treatment_name,
+    "Cost": Treatment.cost,
+    "ID": Treatment.treatment_id,
+}
+
+def _invalidate_treatments(doctor_id: int):
+    get_treatments_page.invalidate(doctor_id)
+    invalidate_treatment_catalog(doctor_id)
+
 
 # --- CREATE ---
 def add_treatment(session: Session, doctor_id: int, name: str, description: str, cost: float):
@@ -14,6 +28,7 @@ def add_treatment(session: Session, doctor_id: int, name: str, description: str,
     session.add(treatment)
     session.commit()
     session.refresh(treatment)
+    _invalidate_treatments(doctor_id)
     return treatment
 
 
@@ -22,6 +37,22 @@ def get_treatments_by_doctor(session: Session, doctor_id: int):
     return session.query(Treatment).filter_by(doctor_id=doctor_id).all()
 
 
+@cached(scope="doctor_id")
+def get_treatments_page(session: Session, doctor_id: int, search: str = None, sort: str = "Name",
+                        descending: bool = False, cursor=None, page_size: int = 20):
+    """One keyset page of a doctor's treatments for the paged grid."""
+    query = session.query(
+        Treatment.treatment_id, Treatment.treatment_name, Treatment.description, Treatment.cost
+    ).filter(Treatment.doctor_id == doctor_id)
+    sort_columns = [(TREATMENT_SORTS[sort], descending), (Treatment.treatment_id, descending)]
+    if sort == "ID":
+        sort_columns = sort_columns[1:]
+    return keyset_page(
+        query, sort_columns, cursor, page_size,
+        search=search, search_columns=[Treatment.treatment_name, Treatment.description],
+    )
+
+
 # --- UPDATE ---
 def update_treatment(session: Session, treatment_id: int, doctor_id: int, name: str, description: str, cost: float):
     treatment = session.query(Treatment).filter_by(treatment_id=treatment_id, doctor_id=doctor_id).first()
@@ -32,6 +63,7 @@ def update_treatment(session: Session, treatment_id: int, doctor_id: int, name:
     treatment.cost = cost
     session.commit()
     session.refresh(treatment)
+    _invalidate_treatments(doctor_id)
     return treatment
 
 
@@ -42,3 +74,4 @@ def delete_treatments(session: Session, doctor_id: int, treatment_ids: list[int]
         Treatment.doctor_id == doctor_id
     ).delete(synchronize_session=False)
     session.commit()
+    _invalidate_treatments(doctor_id)
@@ -0,0 +1,224 @@
+# database/queries/waitlist_queries.py
+import os
+import uuid
+from datetime import datetime, timedelta, timezone
+from sqlalchemy.exc import IntegrityError
+
+from database.connection import SessionLocal
+from database.models.Appointment import Appointment
+from database.models.Doctor import Doctor
+from database.models.WaitlistEntry import WaitlistEntry
+from database.queries.outbox_queries import enqueue_event
+from database.queries.appointment_queries import (
+    appointment_event_payload,
+    invalidate_appointment_caches,
+    is_slot_conflict,
+    next_patient_appointment_no,
+)
+from utils.event_dispatcher import notify_dispatcher
+
+# How long an offered slot stays reserved for the patient before it goes to the next one
+HOLD_MINUTES = int(os.getenv("WAITLIST_HOLD_MINUTES", 30))
+OPEN_STATUSES = ("waiting", "offered")
+
+
+def _invalidate(payloads):
+    for payload in payloads:
+        invalidate_appointment_caches(payload["patient_email"], payload["doctor_email"], payload["doctor_id"])
+
+
+def join_waitlist(patient_id: int, doctor_id: int, treatment_id: int, earliest_date, latest_date):
+    """Wait for any slot with a doctor between two dates. Returns (success, message)."""
+    if latest_date < earliest_date:
+        return False, "❌ The last date must not be before the first date."
+
+    with SessionLocal() as session:
+        already_waiting = session.query(WaitlistEntry.waitlist_id).filter(
+            WaitlistEntry.patient_id == patient_id,
+            WaitlistEntry.doctor_id == doctor_id,
+            WaitlistEntry.status.in_(OPEN_STATUSES),
+            WaitlistEntry.earliest_date <= latest_date,
+            WaitlistEntry.latest_date >= earliest_date,
+        ).first()
+        if already_waiting:
+            return False, "ℹ️ You are already on this doctor's waitlist for those dates."
+
+        session.add(WaitlistEntry(
+            patient_id=patient_id,
+            doctor_id=doctor_id,
+            treatment_id=treatment_id,
+            earliest_date=earliest_date,
+            latest_date=latest_date,
+            status="waiting",
+        ))
+        session.commit()
+    return True, "✅ You are on the waitlist. We will notify you as soon as a slot frees up."
+
+
+def get_patient_waitlist(patient_id: int):
+    """
+    Open waitlist entries of a patient as tuples of (waitlist_id, doctor_id, doctor name, earliest_date,
+    latest_date, status, hold_expires_at, offered appointment_date, offered time_slot).
+    """
+    with SessionLocal() as session:
+        return (
+            session.query(
+                WaitlistEntry.waitlist_id,
+                WaitlistEntry.doctor_id,
+                Doctor.name,
+                WaitlistEntry.earliest_date,
+                WaitlistEntry.latest_date,
+                WaitlistEntry.status,
+                WaitlistEntry.hold_expires_at,
+                Appointment.appointment_date,
+                Appointment.time_slot,
+            )
+            .join(Doctor, WaitlistEntry.doctor_id == Doctor.doctor_id)
+            .outerjoin(Appointment, WaitlistEntry.offered_appointment_id == Appointment.appointment_id)
+            .filter(WaitlistEntry.patient_id == patient_id, WaitlistEntry.status.in_(OPEN_STATUSES))
+            .order_by(WaitlistEntry.created_at)
+            .all()
+        )
+
+
+# ---------- Matcher ----------
+def offer_freed_slot(doctor_id: int, slot_start: datetime, slot_end: datetime):
+    """
+    Hold a freed slot for the longest-waiting patient whose dates cover it and notify them.
+    Runs from the outbox dispatcher on cancellations. Returns the waitlist_id offered, or None.
+    """
+    if slot_start <= datetime.now():
+        return None
+
+    with SessionLocal() as session:
+        # SKIP LOCKED: a matcher in another process handling another slot moves on to the next patient
+        entry = (
+            session.query(WaitlistEntry)
+            .filter(
+                WaitlistEntry.doctor_id == doctor_id,
+                WaitlistEntry.status == "waiting",
+                WaitlistEntry.earliest_date <= slot_start.date(),
+                WaitlistEntry.latest_date >= slot_start.date(),
+            )
+            .order_by(WaitlistEntry.created_at, WaitlistEntry.waitlist_id)
+            .with_for_update(skip_locked=True)
+            .first()
+        )
+        if not entry:
+            return None
+
+        # A "held" appointment reserves the slot: the exclusion constraint keeps everyone else out
+        held = Appointment(
+            patient_id=entry.patient_id,
+            doctor_id=doctor_id,
+            treatment_id=entry.treatment_id,
+            appointment_date=slot_start.date(),
+            time_slot=f"{slot_start.strftime('%H:%M')} - {slot_end.strftime('%H:%M')}",
+            slot_start=slot_start,
+            slot_end=slot_end,
+            reference_number=str(uuid.uuid4())[:8],
+            status="held",
+            patient_appointment_no=next_patient_appointment_no(session, entry.patient_id),
+        )
+        session.add(held)
+        try:
+            session.flush()
+        except IntegrityError as e:
+            session.rollback()
+            if is_slot_conflict(e):
+                return None  # Booked directly before the matcher got to it
+            raise
+
+        entry.status = "offered"
+        entry.offered_appointment_id = held.appointment_id
+        entry.hold_expires_at = datetime.now(timezone.utc) + timedelta(minutes=HOLD_MINUTES)
+        waitlist_id = entry.waitlist_id
+        payload = appointment_event_payload(held, waitlist_id=waitlist_id, hold_minutes=HOLD_MINUTES)
+        enqueue_event(session, "waitlist_slot_offered", payload)
+        session.commit()
+
+    notify_dispatcher()
+    _invalidate([payload])
+    return waitlist_id
+
+
+def _release_hold(session, entry, status):
+    """Close an entry; if it held a slot, cancel the hold and queue the slot for the next patient."""
+    entry.status = status
+    held = session.get(Appointment, entry.offered_appointment_id) if entry.offered_appointment_id else None
+    if held is None or held.status != "held":
+        return None
+    held.status = "cancelled"
+    payload = appointment_event_payload(held)
+    enqueue_event(session, "waitlist_hold_released", payload, ["waitlist"])
+    return payload
+
+
+def confirm_waitlist_offer(waitlist_id: int, patient_id: int):
+    """Turn a held slot into a booking. Returns (appointment_id or None, message)."""
+    with SessionLocal() as session:
+        entry = (
+            session.query(WaitlistEntry)
+            .filter(WaitlistEntry.waitlist_id == waitlist_id, WaitlistEntry.patient_id == patient_id)
+            .with_for_update()
+            .first()
+        )
+        if not entry or entry.status != "offered":
+            return None, "❌ This offer is no longer available."
+        if entry.hold_expires_at <= datetime.now(timezone.utc):
+            return None, "⌛ This hold has expired and the slot was passed on."
+
+        appointment = session.get(Appointment, entry.offered_appointment_id)
+        if appointment is None or appointment.status != "held":
+            return None, "❌ This offer is no longer available."
+
+        appointment.status = "scheduled"
+        entry.status = "booked"
+        appointment_id, reference = appointment.appointment_id, appointment.reference_number
+        payload = appointment_event_payload(appointment)
+        enqueue_event(session, "appointment_booked", payload)
+        session.commit()
+
+    notify_dispatcher()
+    _invalidate([payload])
+    return appointment_id, f"✅ Appointment booked! Reference No: {reference}"
+
+
+def leave_waitlist(waitlist_id: int, patient_id: int):
+    """Leave the waitlist, declining a slot currently held for the patient."""
+    with SessionLocal() as session:
+        entry = (
+            session.query(WaitlistEntry)
+            .filter(WaitlistEntry.waitlist_id == waitlist_id, WaitlistEntry.patient_id == patient_id)
+            .with_for_update()
+            .first()
+        )
+        if not entry or entry.status not in OPEN_STATUSES:
+            return False
+        payload = _release_hold(session, entry, "left")
+        session.commit()
+
+    if payload:
+        notify_dispatcher()
+        _invalidate([payload])
+    return True
+
+
+def release_expired_holds(limit: int = 50):
+    """Pass unconfirmed offers on to the next patient. Called from the dispatcher loop."""
+    with SessionLocal() as session:
+        entries = (
+            session.query(WaitlistEntry)
+            .filter(WaitlistEntry.status == "offered", WaitlistEntry.hold_expires_at < datetime.now(timezone.utc))
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+            .all()
+        )
+        if not entries:
+            return 0
+        payloads = [payload for payload in (_release_hold(session, entry, "expired") for entry in entries) if payload]
+        session.commit()
+
+    notify_dispatcher()
+    _invalidate(payloads)
+    return len(entries)
@@ -0,0 +1,198 @@
+# database/query_cache.py
+import functools
+import inspect
+import os
+import threading
+import time
+from collections import OrderedDict
+from dotenv import load_dotenv
+from sqlalchemy.orm import Session
+
+load_dotenv()
+
+QUERY_CACHE_ENABLED = os.getenv("QUERY_CACHE_ENABLED", "1").lower() not in ("0", "false", "no")
+DEFAULT_TTL_SECONDS = int(os.getenv("QUERY_CACHE_TTL_SECONDS", 60))
+DEFAULT_MAX_ENTRIES = 1024
+
+_ALL = object()
+_lock = threading.RLock()
+_caches = {}
+# Set by database/cache_bus.py so other server processes hear about our invalidations
+_publisher = None
+
+
+class _FunctionCache:
+    """Entries of one cached query, keyed by (scope value, arguments) in LRU order."""
+
+    def __init__(self, name, ttl, max_entries):
+        self.name = name
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        # Bumped on every invalidation so a read that raced a write does not store its stale result
+        self.generations = {}
+        self.hits = 0
+        self.misses = 0
+
+    def token(self, scope_value):
+        return self.generations.get(scope_value, 0), self.generations.get(_ALL, 0)
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            self.misses += 1
+            return False, None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return True, entry[1]
+
+    def peek(self, key):
+        """True if key holds a live entry; unlike get() this does not count as a hit or miss."""
+        entry = self.entries.get(key)
+        return entry is not None and entry[0] >= time.monotonic()
+
+    def put(self, key, value, token):
+        if self.token(key[0]) != token:
+            return
+        self.entries[key] = (time.monotonic() + self.ttl, value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def invalidate(self, scope_value=_ALL):
+        if scope_value is _ALL:
+            self.entries.clear()
+        else:
+            for key in [key for key in self.entries if key[0] == scope_value]:
+                del self.entries[key]
+        self.generations[scope_value] = self.generations.get(scope_value, 0) + 1
+
+
+def _fresh(value):
+    """Shallow copy of mutable results so a page that edits its DataFrame does not edit the cache."""
+    if hasattr(value, "copy") and hasattr(value, "columns"):
+        return value.copy()
+    if isinstance(value, tuple):
+        return tuple(_fresh(v) for v in value)
+    if isinstance(value, (list, dict)):
+        return value.copy()
+    return value
+
+
+def cached(ttl: int = DEFAULT_TTL_SECONDS, scope: str = None, max_entries: int = DEFAULT_MAX_ENTRIES):
+    """
+    Cache a query function's result per (function, scope value, arguments) for ttl seconds.
+
+    scope names the parameter that says whose data it is (email, patient_id, doctor_id), so a write
+    can evict one user's entries with func.invalidate(value). A SQLAlchemy session argument is not
+    part of the key. Results must not hold objects still attached to a session.
+    """
+    def decorator(func):
+        name = f"{func.__module__}.{func.__qualname__}"
+        signature = inspect.signature(func)
+        with _lock:
+            cache = _caches.setdefault(name, _FunctionCache(name, ttl, max_entries))
+
+        def make_key(args, kwargs):
+            """(scope value, arguments) for a call, or None if the arguments cannot be hashed."""
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            arguments = tuple(
+                (param, value) for param, value in bound.arguments.items()
+                if not isinstance(value, Session)
+            )
+            key = (bound.arguments.get(scope) if scope else None, arguments)
+            try:
+                hash(key)
+            except TypeError:
+                return None
+            return key
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = make_key(args, kwargs) if QUERY_CACHE_ENABLED else None
+            if key is None:
+                return func(*args, **kwargs)
+
+            with _lock:
+                found, value = cache.get(key)
+                token = cache.token(key[0])
+            if found:
+                return _fresh(value)
+
+            value = func(*args, **kwargs)
+            # "Not found" is not remembered: the row may be created by the next request
+            if value is not None:
+                with _lock:
+                    cache.put(key, value, token)
+            return _fresh(value)
+
+        def preload(loader, calls):
+            """
+            Fill the cache for many calls with one loader invocation. calls is a list of positional
+            argument tuples; loader(missing) receives those not cached yet and returns {args: value}.
+            """
+            if not QUERY_CACHE_ENABLED:
+                return
+            pending = {}
+            with _lock:
+                for args in calls:
+                    key = make_key(args, {})
+                    if key is not None and not cache.peek(key):
+                        pending[args] = (key, cache.token(key[0]))
+            if not pending:
+                return
+            values = loader(list(pending))
+            with _lock:
+                for args, (key, token) in pending.items():
+                    if values.get(args) is not None:
+                        cache.put(key, values[args], token)
+
+        def invalidate_scope(scope_value=_ALL):
+            invalidate(name, scope_value)
+
+        wrapper.invalidate = invalidate_scope
+        wrapper.preload = preload
+        wrapper.cache_name = name
+        return wrapper
+    return decorator
+
+
+def set_publisher(publisher):
+    """Register publisher(name, scope_value, everything) to broadcast invalidations to other processes."""
+    global _publisher
+    _publisher = publisher
+
+
+def invalidate_local(name: str, scope_value=_ALL):
+    """Evict entries in this process only; used for invalidations received from other processes."""
+    with _lock:
+        cache = _caches.get(name)
+        if cache is not None:
+            cache.invalidate(scope_value)
+
+
+def invalidate(name: str, scope_value=_ALL):
+    """Evict entries of a cached function by its dotted name; all of them if no scope value is given."""
+    invalidate_local(name, scope_value)
+    if _publisher is not None:
+        try:
+            _publisher(name, None if scope_value is _ALL else scope_value, scope_value is _ALL)
+        except Exception as e:
+            print(f"[WARN] Could not publish cache invalidation for {name}: {e}")
+
+
+def clear_all():
+    """Drop every local entry, e.g. after missing invalidations from other processes."""
+    with _lock:
+        for cache in _caches.values():
+            cache.invalidate()
+
+
+def cache_stats():
+    """Hits, misses and live entries per cached function, for logging or a debug panel."""
+    with _lock:
+        return {
+            name: {"hits": cache.hits, "misses": cache.misses, "entries": len(cache.entries)}
+            for name, cache in _caches.items()
+        }
@@ -0,0 +1,53 @@
+# database/treatment_catalog.py
+from types import MappingProxyType
+from typing import NamedTuple
+
+from database.connection import SessionLocal
+from database.models.Treatment import Treatment
+from database.query_cache import cached
+
+# Invalidated by every treatment write (in every process, via the cache bus); the TTL is only a backstop
+CATALOG_TTL_SECONDS = 600
+
+
+class TreatmentRecord(NamedTuple):
+    treatment_id: int
+    doctor_id: int
+    treatment_name: str
+    description: str
+    cost: float
+
+
+_COLUMNS = (Treatment.treatment_id, Treatment.doctor_id, Treatment.treatment_name, Treatment.description, Treatment.cost)
+
+
+def _catalog(rows):
+    """Read-only {treatment_id: TreatmentRecord} in name order."""
+    records = sorted((TreatmentRecord(*row) for row in rows), key=lambda t: (t.treatment_name or "").lower())
+    return MappingProxyType({t.treatment_id: t for t in records})
+
+
+@cached(ttl=CATALOG_TTL_SECONDS, scope="doctor_id")
+def get_treatment_catalog(doctor_id: int):
+    """A doctor's treatments keyed by treatment_id."""
+    with SessionLocal() as session:
+        rows = session.query(*_COLUMNS).filter(Treatment.doctor_id == doctor_id).all()
+    return _catalog(rows)
+
+
+def preload_treatment_catalogs(doctor_ids):
+    """Load the catalogs of several doctors (e.g. everyone in a specialization) with one query."""
+    def load(missing):
+        ids = [args[0] for args in missing]
+        with SessionLocal() as session:
+            rows = session.query(*_COLUMNS).filter(Treatment.doctor_id.in_(ids)).all()
+        grouped = {doctor_id: [] for doctor_id in ids}
+        for row in rows:
+            grouped[row.doctor_id].append(row)
+        return {(doctor_id,): _catalog(doctor_rows) for doctor_id, doctor_rows in grouped.items()}
+
+    get_treatment_catalog.preload(load, [(doctor_id,) for doctor_id in doctor_ids])
+
+
+def invalidate_treatment_catalog(doctor_id: int):
+    get_treatment_catalog.invalidate(doctor_id)
@@ -1,8 +1,7 @@
 import streamlit as st
 from pages.util.menu import doctor_sidebar
 from database.connection import SessionLocal
-from database.queries.appointment_queries import get_appointments_for_doctor, cancel_appointment
-from utils.email_utils import send_cancellation_email_doctor
+from database.queries.appointment_queries import get_appointments_for_doctor, cancel_appointment_doctor
 import pandas as pd
 from st_aggrid import AgGrid, GridOptionsBuilder
 
@@ -59,10 +58,8 @@ def show_appointments():
             )
 
             if st.button("Cancel Appointment"):
-                patient_email, ref_num = cancel_appointment(cancel_appointment_id)
-                if patient_email:
-                    send_cancellation_email_doctor(patient_email, ref_num)
-                    st.success(f"Appointment cancelled and notification sent to {patient_email}")
+                if cancel_appointment_doctor(cancel_appointment_id):
+                    st.success("Appointment cancelled. The patient will be notified shortly.")
                     st.rerun()  # ✅ modern replacement for st.experimental_rerun()
                 else:
                     st.error("Failed to cancel appointment.")
\ No newline at end of file
@@ -1,14 +1,16 @@
 import streamlit as st
 from streamlit_extras.add_vertical_space import add_vertical_space
 from streamlit.components.v1 import html as st_html
-from streamlit_autorefresh import st_autorefresh
 from datetime import datetime
 from database.firebase_config import init_firebase, get_chat_ref, db
 from database.queries.patient_queries import get_patient_by_user_id
 from streamlit_webrtc import webrtc_streamer, WebRtcMode
+from utils.rerun_profiler import profiled
 
 init_firebase()
 
+CHAT_REFRESH_SECONDS = 5
+
 # ---------- Helpers ----------
 def fetch_messages(doctor_id, patient_id):
     if not patient_id:
@@ -70,13 +72,18 @@ def render_custom_webrtc():
     # set a height that fits your UI
     st_html(html, height=260, scrolling=False)
 
+@st.fragment(run_every=1)
+@profiled("call_timer")
+def render_call_timer():
+    # Ticks on its own; the WebRTC embed and the rest of the page are not re-sent every second
+    update_call_timer()
+    st.metric("Call Duration", st.session_state.get("call_duration", "00:00"))
+
 def render_call_ui(patient_name, patient_id):
     if patient_id:
         if st.session_state.get("call_active"):
             st.markdown(f"### 📞 Call with {patient_name}")
-            update_call_timer()
-            st.metric("Call Duration", st.session_state.get("call_duration", "00:00"))
-           # st_autorefresh(interval=1000, key="call_timer_refresh")
+            render_call_timer()
 
             render_custom_webrtc()
 
@@ -148,8 +155,6 @@ def send_message(patient_id):
     }
     get_chat_ref(patient_id, doctor_id).push(msg)
     st.session_state["chat_input"] = ""
-    st_autorefresh(interval=5000, key=f"chat_refresh_{patient_id}")
-    st.session_state["chat_messages"] = fetch_messages(doctor_id, patient_id)
 
 def select_chat(patient_id, patient_name):
     st.session_state["chat_data"] = {"patient_id": patient_id, "patient_name": patient_name}
@@ -165,6 +170,29 @@ def navigate_back():
     st.session_state.page = "doctor_dashboard" if role=="doctor" else "patient_dashboard" if role=="patient" else "auth"
 
 # ---------- Dashboard UI ----------
+@st.fragment(run_every=CHAT_REFRESH_SECONDS)
+@profiled("chat_transcript")
+def render_transcript(doctor_id, patient_id):
+    """Messages and the send box. Polls for new messages and reruns on send without rerunning the app."""
+    messages = fetch_messages(doctor_id, patient_id)
+    st.session_state["chat_messages"] = messages
+
+    chat_html = "<div class='chat-box'>"
+    for msg in messages:
+        sender_side = "right" if msg.get("sender_id") == doctor_id else "left"
+        safe_text = (msg.get("message") or "").replace("\n", "<br>")
+        chat_html += f"<div class='chat-bubble-{sender_side}'><div>{safe_text}</div></div>"
+    chat_html += "</div>"
+    st.markdown(chat_html, unsafe_allow_html=True)
+
+    add_vertical_space(1)
+    with st.form(key="chat_form", clear_on_submit=False):
+        msg_col, send_col = st.columns([16, 2])
+        with msg_col:
+            st.text_input("Type a message...", key="chat_input", label_visibility="collapsed")
+        with send_col:
+            st.form_submit_button("Send", key="send_btn", on_click=lambda: send_message(patient_id))
+
 def show_chat_dashboard():
     st.session_state.setdefault("selected_chat", None)
     st.session_state.setdefault("chat_data", {})
@@ -177,7 +205,6 @@ def show_chat_dashboard():
     chat_data = st.session_state.get("chat_data", {})
     patient_id = chat_data.get("patient_id")
     patient_name = chat_data.get("patient_name")
-    messages = st.session_state.get("chat_messages", []) or (fetch_messages(doctor_id, patient_id) if patient_id else [])
 
     if st.session_state.get("call_active") and patient_id:
         render_call_ui(patient_name, patient_id)
@@ -244,22 +271,7 @@ def show_chat_dashboard():
                     start_call(patient_id)
                     st.success("Call initiated...")
 
-            chat_html = "<div class='chat-box'>"
-            for msg in messages:
-                sender_side = "right" if msg.get("sender_id") == doctor_id else "left"
-                safe_text = (msg.get("message") or "").replace("\n", "<br>")
-                chat_html += f"<div class='chat-bubble-{sender_side}'><div>{safe_text}</div></div>"
-            chat_html += "</div>"
-            st.markdown(chat_html, unsafe_allow_html=True)
-
-            add_vertical_space(1)
-            with st.form(key="chat_form", clear_on_submit=False):
-                msg_col, send_col = st.columns([16, 2])
-                with msg_col:
-                    st.text_input("Type a message...", key="chat_input", label_visibility="collapsed")
-                with send_col:
-                    st.form_submit_button("Send", key="send_btn", on_click=lambda: send_message(patient_id))
-            st_autorefresh(interval=5000, key=f"chat_refresh_{patient_id}")
+            render_transcript(doctor_id, patient_id)
         else:
             st.markdown("### 💬 No chat selected")
             st.info("Select a patient from the left panel to start chatting 💬")
@@ -2,12 +2,17 @@ import streamlit as st
 import plotly.express as px
 import pandas as pd
 from datetime import datetime
-from st_aggrid import AgGrid, GridOptionsBuilder
 
 from pages.util.menu import doctor_sidebar
-from utils.time_utils import parse_time_slot_duration
+from pages.util.paged_grid import paged_grid, rows_to_frame
+from pages.util.calendar_heatmap import render_month_heatmap
+from utils.time_utils import slot_duration_hours, DEFAULT_DURATION_HOURS
 from database.queries.doctor_queries import get_doctor_by_email
-from database.queries.appointment_queries import get_appointments_for_doctor
+from database.queries.appointment_queries import (
+    get_appointments_for_doctor,
+    get_doctor_appointments_page,
+    APPOINTMENT_SORTS
+)
 #from database.queries.appointment_queries import get_department_appointment_stats
 
 def show_doctor_dashboard():
@@ -50,12 +55,14 @@ def show_doctor_dashboard():
             "Gender": appt.patient.gender if appt.patient else "N/A",
             "Treatment": appt.treatment.treatment_name if appt.treatment else "N/A",
             "Time Slot": appt.time_slot,
-            "Duration": parse_time_slot_duration(appt.time_slot),
         }
         for appt in appointments
     ]
 
     df = pd.DataFrame(appointment_data)
+    df["Duration"] = slot_duration_hours(
+        [appt.slot_start for appt in appointments], [appt.slot_end for appt in appointments]
+    )
     st.write("### Appointments Overview")
     # --- Summary Metrics ---
     total_appointments = len(df)
@@ -69,15 +76,34 @@ def show_doctor_dashboard():
 
     # --- Appointment Table ---
     st.write("### Scheduled Appointments")
-    scheduled_df = df[df["Status"] == "scheduled"]
-    if not scheduled_df.empty:
-        gb = GridOptionsBuilder.from_dataframe(scheduled_df)
-        gb.configure_default_column(groupable=True, value=True)
-        grid_options = gb.build()
-        AgGrid(scheduled_df, gridOptions=grid_options, height=200, fit_columns_on_grid_load=True)
+    if scheduled:
+        def fetch_page(search, filters, sort, descending, cursor, page_size):
+            rows, next_cursor = get_doctor_appointments_page(
+                doctor.doctor_id, "scheduled", search, sort, descending, cursor, page_size
+            )
+            page_df = rows_to_frame(rows, [
+                "Appointment ID", "Date", "Patient", "Status", "Date of Birth",
+                "Gender", "Treatment", "Time Slot", "Reference #", "Duration"
+            ])
+            page_df["Date"] = page_df["Date"].map(lambda d: d.strftime("%Y-%m-%d %H:%M"))
+            page_df["Date of Birth"] = page_df["Date of Birth"].map(lambda d: d.strftime("%Y-%m-%d") if d else "N/A")
+            page_df["Treatment"] = page_df["Treatment"].fillna("N/A")
+            # Computed in SQL from slot_start/slot_end; NULL only for slots that could not be parsed
+            page_df["Duration"] = pd.to_numeric(page_df["Duration"]).fillna(DEFAULT_DURATION_HOURS)
+            return page_df, next_cursor
+
+        paged_grid(
+            "doctor_scheduled", fetch_page, list(APPOINTMENT_SORTS), page_size=10,
+            search_placeholder="Filter by patient, treatment or reference…",
+            default_descending=False, height=320,
+        )
     else:
         st.info("No scheduled appointments.")
 
+    # --- Monthly Load ---
+    with st.expander("📅 Monthly Load", expanded=False):
+        render_month_heatmap(doctor.doctor_id, key="dashboard_heatmap")
+
     # --- Analytics Section ---
     with st.expander("📊 View Analytics", expanded=True):
         col1, col2, col3 = st.columns(3)
@@ -5,7 +5,11 @@ from datetime import datetime
 from st_aggrid import AgGrid, GridOptionsBuilder
 from pages.util.menu import doctor_sidebar
 from database.connection import SessionLocal
-from database.queries.prescription_queries import get_prescriptions_for_doctor, create_prescription, get_valid_appointments_for_doctor
+from database.queries.prescription_queries import (
+    get_prescriptions_for_doctor, create_prescription, get_valid_appointments_for_doctor,
+    get_todays_prescriptions_for_doctor, to_prescription_record
+)
+from utils.pdf_generator import export_prescriptions_zip
 from database.models.Doctor import Doctor
 
 def clear_inputs():
@@ -92,6 +96,25 @@ def show_prescriptions():
             gb.configure_default_column(groupable=True, value=True, enableRowGroup=True)
             grid_options = gb.build()
             AgGrid(df, gridOptions=grid_options, height=700, width='100%', fit_columns_on_grid_load=True)
+
+            # --- Batch export of today's prescriptions ---
+            if st.button("📦 Export Today's Prescriptions (ZIP)"):
+                todays = get_todays_prescriptions_for_doctor(session, user["email"])
+                if todays:
+                    with st.spinner(f"Rendering {len(todays)} prescription(s)..."):
+                        st.session_state["doctor_prescriptions_zip"] = export_prescriptions_zip(
+                            [to_prescription_record(p) for p in todays]
+                        )
+                else:
+                    st.info("No prescriptions created today.")
+            zip_bytes = st.session_state.pop("doctor_prescriptions_zip", None)
+            if zip_bytes:
+                st.download_button(
+                    "⬇️ Download ZIP",
+                    zip_bytes,
+                    file_name=f"prescriptions_{datetime.now().strftime('%Y%m%d')}.zip",
+                    mime="application/zip"
+                )
         else:
             st.info("No prescriptions found.")
 
@@ -2,8 +2,13 @@ import streamlit as st
 import pandas as pd
 from st_aggrid import AgGrid, GridOptionsBuilder
 from pages.util.menu import doctor_sidebar
-from database.queries.availability_queries import get_doctor_id_by_email, get_doctor_slots
-from pages.util.availability_dialog import add_availability_dialog, update_availability_dialog, delete_availability_dialog
+from datetime import date
+from database.queries.availability_queries import get_doctor_id_by_email, get_doctor_slots, get_availability_exceptions
+from pages.util.calendar_heatmap import render_month_heatmap
+from pages.util.availability_dialog import (
+    add_availability_dialog, update_availability_dialog, delete_availability_dialog,
+    add_exception_dialog, delete_exception_dialog, exception_label
+)
 
 def show_schedule():
     user = st.session_state.get("user", None)
@@ -36,3 +41,24 @@ def show_schedule():
         AgGrid(df, gridOptions=gb.build(), height=500, fit_columns_on_grid_load=True)
     else:
         st.info("No availability slots found.")
+
+    # --- Leave, holidays and extra clinics on specific dates ---
+    st.subheader("Leave & Extra Hours")
+    exceptions = get_availability_exceptions(doctor_id, date.today())
+    col1, col2 = st.columns([0.8, 0.2])
+    with col1:
+        if st.button("Add Leave / Extra Hours", type="primary"):
+            add_exception_dialog(doctor_id)
+    with col2:
+        if st.button("Delete Entries") and exceptions:
+            delete_exception_dialog(doctor_id, exceptions)
+
+    if exceptions:
+        for exception in exceptions:
+            st.markdown(f"- {exception_label(exception)}")
+    else:
+        st.caption("No upcoming leave or extra hours. Your weekly schedule applies on every date.")
+
+    # --- Bookings against availability, day by day ---
+    st.subheader("Monthly Load")
+    render_month_heatmap(doctor_id, key="schedule_heatmap")
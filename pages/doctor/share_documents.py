@@ -1,51 +1,19 @@
 import streamlit as st
-import pandas as pd
-import os
 import json
-import base64
-from io import BytesIO
-from docx import Document
-from st_aggrid import AgGrid, GridOptionsBuilder, GridUpdateMode, JsCode
+from st_aggrid import JsCode
 
 from database.connection import SessionLocal
-from database.queries.share_document_queries import get_shared_documents_for_doctor
+from database.queries.share_document_queries import (
+    get_shared_documents_page,
+    get_shared_references,
+    SHARED_DOCUMENT_SORTS
+)
 from database.queries.doctor_queries import get_doctor_by_email
-
-
-# ---------- Document Viewer ----------
-def view_attachment_dialog(file_path, document_name):
-    """Open the document in a Streamlit dialog viewer."""
-    if not os.path.exists(file_path):
-        st.error("File not found.")
-        return
-
-    ext = os.path.splitext(file_path)[1].lower()
-
-    @st.dialog(f"Viewing: {document_name}", width="large")
-    def dialog_view():
-        if ext in [".jpg", ".jpeg", ".png"]:
-            st.image(file_path, use_column_width=True)
-        elif ext == ".pdf":
-            with open(file_path, "rb") as f:
-                st.pdf(f, height=800)
-        elif ext == ".txt":
-            with open(file_path, "r", encoding="utf-8") as f:
-                content = f.read()
-            st.text_area("Text File Content", content, height=500)
-        elif ext == ".docx":
-            with open(file_path, "rb") as f:
-                document = Document(BytesIO(f.read()))
-                full_text = "\n\n".join([para.text for para in document.paragraphs])
-                st.text_area("DOCX Content", full_text, height=500)
-        elif ext in [".mp3", ".wav", ".ogg"]:
-            st.audio(file_path)
-        elif ext in [".mp4", ".webm"]:
-            st.video(file_path)
-        else:
-            st.warning(f"Unsupported file format: {ext}")
-            st.write("File path:", file_path)
-
-    dialog_view()
+from database.queries.document_queries import search_documents
+from utils.file_server import make_download_url, make_zip_url
+from pages.util.document_viewer import view_attachment_dialog
+from pages.util.document_search import search_page_number, render_search_hits
+from pages.util.paged_grid import paged_grid, rows_to_frame
 
 
 # ---------- Shared Documents Page ----------
@@ -58,48 +26,67 @@ def show_shared_documents():
         return
 
     st.header("📁 Shared Documents", divider="gray")
-    # ---------- Search by Reference Number ----------
-    search_ref = st.text_input(
+    # ---------- Search by Reference Number / Content ----------
+    ref_col, text_col = st.columns(2)
+    search_ref = ref_col.text_input(
         "🔍 Search by Reference Number",
         placeholder="Enter the appointment reference number"
-    )
+    ).strip()
+    search_text = text_col.text_input(
+        "🔎 Search document contents",
+        placeholder='e.g. hba1c, "chest x-ray"'
+    ).strip()
 
-    # ---------- Fetch Data ----------
-    db = SessionLocal()
     doctor_id = get_doctor_by_email(user["email"]).doctor_id
-    shared_records = get_shared_documents_for_doctor(doctor_id)
-    db.close()
 
-    if not shared_records:
-        st.info("No shared documents available at the moment.")
+    if search_text:
+        page = search_page_number("shared_search", f"{search_ref}|{search_text}")
+        with SessionLocal() as db:
+            hits, total = search_documents(db, search_text, doctor_id=doctor_id, reference_number=search_ref, page=page)
+        render_search_hits(hits, total, "shared_search", show_patient=True)
         return
 
-    # ---------- DataFrame Setup ----------
-    df = pd.DataFrame(shared_records, columns=[
-        "ID",
-        "Patient Name",
-        "Document Name",
-        "Document Type",
-        "Category",
-        "Description",
-        "File Path",
-        "Doctor ID",
-        "Reference Number"  # <-- new column
-    ])
+    # ---------- Fetch Data ----------
+    # The reference filter runs in SQL, so only the matching shares are loaded
+    references = get_shared_references(doctor_id, search_ref or None)
 
-    df["File Path"] = df["File Path"].apply(lambda p: p.replace("\\", "/"))
-    df["Actions"] = "👁️ View | ⬇️ Download"
-    # ---------- Filter by Reference Number ----------
-    if search_ref:
-        # Make sure to use the correct column name
-        if "Reference Number" in df.columns:
-            df_filtered = df[df["Reference Number"].str.contains(search_ref.strip(), case=False, na=False)]
-            if df_filtered.empty:
-                st.info("No document found with this reference number.")
-            else:
-                df = df_filtered
+    if not references:
+        if search_ref:
+            st.info("No document found with this reference number.")
         else:
-            st.error("Reference Number column not found in the DataFrame.")
+            st.info("No shared documents available at the moment.")
+        return
+
+    # ---------- Download All for an Appointment ----------
+    ref_col, button_col = st.columns([3, 1], vertical_alignment="bottom")
+    zip_ref = ref_col.selectbox("📦 Download all documents for reference #", references)
+    if zip_ref:
+        # The ZIP is assembled on the file server while it downloads, one file chunk at a time
+        button_col.link_button("⬇️ Download all (ZIP)", make_zip_url(doctor_id, zip_ref), use_container_width=True)
+
+    def fetch_page(search, filters, sort, descending, cursor, page_size):
+        rows, next_cursor = get_shared_documents_page(
+            doctor_id, search_ref or None, search, sort, descending, cursor, page_size
+        )
+        df = rows_to_frame(rows, [
+            "ID",
+            "Patient Name",
+            "Document Name",
+            "Document Type",
+            "Category",
+            "Description",
+            "File Path",
+            "Doctor ID",
+            "Reference Number",
+            "Shared On",
+        ])
+        df["File Path"] = df["File Path"].apply(lambda p: p.replace("\\", "/"))
+        # Short-lived signed links, made only for the rows on this page
+        df["Download URL"] = [
+            make_download_url(path, name) for path, name in zip(df["File Path"], df["Document Name"])
+        ]
+        df["Actions"] = "👁️ View | ⬇️ Download"
+        return df, next_cursor
 
     # ---------- AgGrid Renderer ----------
     button_renderer = JsCode("""
@@ -145,37 +132,33 @@ def show_shared_documents():
                     window.top.postMessage({ type: "view_file", detail: payload }, "*");
                 });
 
-                // Download button
+                // Download button: stream straight from the file server
                 downloadBtn.addEventListener('click', () => {
-                    const payload = {
-                        action: 'download',
-                        file: params.data["File Path"],
-                        name: params.data["Document Name"]
-                    };
-                    console.log("⬇️ Download clicked:", payload);
-                    window.top.postMessage({ type: "download_file", detail: payload }, "*");
+                    const a = document.createElement('a');
+                    a.href = params.data["Download URL"];
+                    a.target = "_blank";
+                    a.rel = "noopener";
+                    document.body.appendChild(a);
+                    a.click();
+                    a.remove();
                 });
             }
             getGui() { return this.eGui; }
         }
     """)
 
-    gb = GridOptionsBuilder.from_dataframe(df)
-    gb.configure_default_column(editable=False, cellStyle={'fontSize': '16px'})
-    gb.configure_column("File Path", hide=True)
-    gb.configure_column("Doctor ID", hide=True)
-    gb.configure_column("Actions", cellRenderer=button_renderer)
-    grid_options = gb.build()
+    def configure(gb):
+        gb.configure_column("File Path", hide=True)
+        gb.configure_column("Doctor ID", hide=True)
+        gb.configure_column("Download URL", hide=True)
+        gb.configure_column("Actions", cellRenderer=button_renderer)
 
     # ---------- Render Grid ----------
     try:
-        AgGrid(
-            df,
-            gridOptions=grid_options,
-            update_mode=GridUpdateMode.NO_UPDATE,
-            allow_unsafe_jscode=True,
-            fit_columns_on_grid_load=True,
-            height=440,
+        paged_grid(
+            "shared_documents", fetch_page, list(SHARED_DOCUMENT_SORTS),
+            search_placeholder="Filter by patient, document or description…",
+            configure=configure, height=440, allow_unsafe_jscode=True,
         )
     except Exception as e:
         print(f"[⚠️ AgGrid Rendering Warning] {e}")
@@ -203,15 +186,6 @@ def show_shared_documents():
                     topWindow.history.replaceState({}, '', newUrl);
                     topWindow.dispatchEvent(new Event('popstate'));
                 }
-
-                else if (e.data.type === "download_file") {
-                    console.log("⬇️ JS bridge setting param for:", detail.file);
-                    const params = new URLSearchParams(topWindow.location.search);
-                    params.set("download_file", JSON.stringify(detail));
-                    const newUrl = topWindow.location.pathname + '?' + params.toString();
-                    topWindow.history.replaceState({}, '', newUrl);
-                    topWindow.dispatchEvent(new Event('popstate'));
-                }
             });
         }
     })();
@@ -232,61 +206,3 @@ def show_shared_documents():
                 st.query_params = query
         except Exception as e:
             st.error(f"Error loading document: {e}")
-
-    # ---------- Handle "Download" ----------
-    query = st.query_params
-    js_event_download = query.get("download_file")
-
-    if js_event_download:
-        try:
-            data = json.loads(js_event_download)
-            file_path = data["file"]
-            file_name = data["name"]
-
-            if os.path.exists(file_path):
-                with open(file_path, "rb") as f:
-                    content = f.read()
-
-                import base64, mimetypes
-                b64_data = base64.b64encode(content).decode()
-
-                # ✅ Determine MIME type from extension
-                ext = os.path.splitext(file_path)[1].lower()
-                mime_types = {
-                    ".pdf": "application/pdf",
-                    ".docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-                    ".txt": "text/plain",
-                    ".jpg": "image/jpeg",
-                    ".jpeg": "image/jpeg",
-                    ".png": "image/png",
-                    ".mp3": "audio/mpeg",
-                    ".wav": "audio/wav",
-                    ".ogg": "audio/ogg",
-                    ".mp4": "video/mp4",
-                    ".webm": "video/webm",
-                }
-                mime_type = mime_types.get(ext, "application/octet-stream")
-
-                # ✅ Restrict allowed extensions
-                allowed_exts = set(mime_types.keys())
-                if ext not in allowed_exts:
-                    st.warning(f"❌ File type '{ext}' is not allowed for download.")
-                else:
-                    download_script = f"""
-                    <script>
-                        const a = document.createElement('a');
-                        a.href = "data:{mime_type};base64,{b64_data}";
-                        a.download = "{file_name}";
-                        a.click();
-                    </script>
-                    """
-                    st.components.v1.html(download_script, height=0)
-            else:
-                st.error(f"File not found: {file_path}")
-
-            del query["download_file"]
-            st.query_params = query
-
-        except Exception as e:
-            st.error(f"Error downloading document: {e}")
-
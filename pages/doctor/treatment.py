@@ -1,15 +1,15 @@
 import streamlit as st
-import pandas as pd
 from sqlalchemy import text
-from st_aggrid import AgGrid, GridOptionsBuilder
 from sqlalchemy.orm import Session
 
 from database.connection import SessionLocal
 from pages.util.menu import doctor_sidebar
+from pages.util.paged_grid import paged_grid, rows_to_frame
 from database.queries.treatment_queries import (
-    add_treatment, get_treatments_by_doctor,
-    update_treatment, delete_treatments
+    add_treatment, get_treatments_page,
+    update_treatment, delete_treatments, TREATMENT_SORTS
 )
+from database.treatment_catalog import get_treatment_catalog
 
 # --- Dialog: Add Treatment ---
 def add_treatment_dialog(doctor_id):
@@ -95,7 +95,7 @@ def show_treatments():
             {"user_id": user['uid']}
         ).scalar()
 
-        treatments = get_treatments_by_doctor(session, doctor_id)
+        treatments = list(get_treatment_catalog(doctor_id).values())
 
         col1, col2, col3 = st.columns([1.8, 0.5, 0.5])
         with col1:
@@ -109,17 +109,17 @@ def show_treatments():
                 delete_treatment_dialog(doctor_id, treatments)
 
         if treatments:
-            df = pd.DataFrame(
-                [(t.treatment_id, t.treatment_name, t.description, float(t.cost)) for t in treatments],
-                columns=["Treatment ID", "Name", "Description", "Cost (PKR)"]
+            def fetch_page(search, filters, sort, descending, cursor, page_size):
+                rows, next_cursor = get_treatments_page(session, doctor_id, search, sort, descending, cursor, page_size)
+                df = rows_to_frame(rows, ["Treatment ID", "Name", "Description", "Cost (PKR)"])
+                df["Cost (PKR)"] = df["Cost (PKR)"].astype(float)
+                return df, next_cursor
+
+            paged_grid(
+                "treatments", fetch_page, list(TREATMENT_SORTS), page_size=10,
+                search_placeholder="Search treatments…", default_descending=False,
+                configure=lambda gb: gb.configure_default_column(wrapText=True, autoHeight=True),
+                height=600,
             )
-
-            gb = GridOptionsBuilder.from_dataframe(df)
-            gb.configure_pagination(enabled=True, paginationPageSize=5)
-            gb.configure_side_bar(filters_panel=True)
-            gb.configure_default_column(editable=False, wrapText=True, autoHeight=True)
-            grid_options = gb.build()
-
-            AgGrid(df, gridOptions=grid_options, height=600, fit_columns_on_grid_load=True)
         else:
             st.info("No treatments found.")
@@ -1,14 +1,16 @@
 import streamlit as st
-from datetime import date, datetime
-from utils.email_utils import send_appointment_confirmation
+from datetime import date, datetime, timedelta
 from utils.pdf_generator import generate_admit_card
 from database.queries.appointment_queries import (
     create_appointment,
-    get_available_slots
+    get_available_slots,
+    SLOT_TAKEN_MESSAGE
 )
 from database.queries.patient_queries import get_patient_by_email
-from database.queries.doctor_queries import get_doctor_email, get_treatments_by_doctor, get_doctors
+from database.queries.doctor_queries import get_doctors, get_specialization_counts
 from database.queries.share_document_queries import share_documents_with_doctor
+from database.treatment_catalog import get_treatment_catalog, preload_treatment_catalogs
+from database.queries.waitlist_queries import join_waitlist
 
 import uuid
 
@@ -40,6 +42,21 @@ DEPARTMENT_SPECIALIZATIONS = {
     "Allergy and Immunology": ["Pediatric Allergy", "Immunodeficiency"]
 }
 
+def _waitlist_form(email, doctor_id, first_date):
+    """Let the patient wait for a cancellation when the doctor has nothing free."""
+    with st.expander("⏳ Join the waitlist", expanded=True):
+        st.caption("We hold the first slot that frees up in this range for you and notify you right away.")
+        last_date = st.date_input("Any day until", value=first_date + timedelta(days=7), min_value=first_date, key="waitlist_until")
+        catalog = get_treatment_catalog(doctor_id)
+        treatment_id = st.selectbox(
+            "Treatment", list(catalog), format_func=lambda tid: catalog[tid].treatment_name, key="waitlist_treatment"
+        ) if catalog else None
+        if st.button("Join Waitlist"):
+            patient = get_patient_by_email(email)
+            ok, message = join_waitlist(patient.patient_id, doctor_id, treatment_id, first_date, last_date)
+            (st.success if ok else st.warning)(message)
+
+
 def show_book_appointment():
     user = st.session_state.get("user", None)
     if not user or user["role"] != "patient":
@@ -57,8 +74,14 @@ def show_book_appointment():
     # --- STEP 1: Select Specialization ---
     if st.session_state.step == 1:
         st.subheader(steps[0])
-        specs = [s for dep in DEPARTMENT_SPECIALIZATIONS.values() for s in dep]
-        specialization = st.selectbox("Select Specialization", specs)
+        # Only specializations someone can actually be booked with
+        counts = get_specialization_counts()
+        specs = [s for s in dict.fromkeys(s for dep in DEPARTMENT_SPECIALIZATIONS.values() for s in dep) if counts[s]]
+        specs += sorted(s for s in counts if s and s not in specs)
+        if not specs:
+            st.info("No doctors are available for booking yet.")
+            return
+        specialization = st.selectbox("Select Specialization", specs, format_func=lambda s: f"{s} ({counts[s]})")
         if st.button("Next"):
             st.session_state.form_data["specialization"] = specialization
             st.session_state.step = 2
@@ -70,6 +93,8 @@ def show_book_appointment():
         specialization = st.session_state.form_data.get("specialization")
         doctors = get_doctors(specialization)
         doctor_map = {f"{d.name} - {d.specialization}": d.doctor_id for d in doctors}
+        # Step 4 then finds whichever doctor is picked already cached
+        preload_treatment_catalogs(doctor_map.values())
         doctor = st.selectbox("Select Doctor", list(doctor_map.keys()))
         col1, col2 = st.columns(2)
         with col1:
@@ -85,6 +110,8 @@ def show_book_appointment():
     # --- STEP 3: Select Date and Slot ---
     elif st.session_state.step == 3:
         st.subheader(steps[2])
+        if st.session_state.get("booking_error"):
+            st.error(st.session_state.pop("booking_error"))
         doctor_id = st.session_state.form_data.get("doctor_id")
         appt_date = st.date_input("Appointment Date", min_value=date.today())
         if appt_date:
@@ -99,6 +126,9 @@ def show_book_appointment():
                 ]
 
             slot = st.selectbox("Select Time Slot", slot_options)
+            if not slots:
+                st.info("No free slots on this date.")
+                _waitlist_form(user["email"], doctor_id, appt_date)
 
         col1, col2 = st.columns(2)
         with col1:
@@ -115,11 +145,10 @@ def show_book_appointment():
     elif st.session_state.step == 4:
         st.subheader(steps[3])
         doctor_id = st.session_state.form_data.get("doctor_id")
-        treatments = get_treatments_by_doctor(doctor_id)
-        treatment_map = {t.treatment_name: t.treatment_id for t in treatments}
-        treatment = st.selectbox("Select Treatment", list(treatment_map.keys()))
+        catalog = get_treatment_catalog(doctor_id)
+        treatment_id = st.selectbox("Select Treatment", list(catalog), format_func=lambda tid: catalog[tid].treatment_name)
 
-        details = next((t for t in treatments if t.treatment_name == treatment), None)
+        details = catalog.get(treatment_id)
 
         if details:
             st.write(f"**Cost:** ${details.cost}  \n**Description:** {details.description}")
@@ -132,7 +161,7 @@ def show_book_appointment():
                 st.rerun()
         with col2:
             if st.button("Next"):
-                st.session_state.form_data.update({"treatment_name": treatment, "treatment_id": treatment_map[treatment]})
+                st.session_state.form_data.update({"treatment_name": details.treatment_name if details else None, "treatment_id": treatment_id})
                 st.session_state.step = 5
                 st.rerun()
 
@@ -140,7 +169,7 @@ def show_book_appointment():
     elif st.session_state.step == 5:
         st.subheader(steps[4])
         patient = get_patient_by_email(user["email"])
-        patient_id, name, phone, dob, gender = patient.patient_id, patient.name, patient.phone_number, patient.date_of_birth, patient.gender
+        patient_id = patient.patient_id
         
         st.write(f"**Doctor:** {st.session_state.form_data['doctor_name']}  \n**Treatment:** {st.session_state.form_data['treatment_name']}  \n**Date:** {st.session_state.form_data['appointment_date']}  \n**Slot:** {st.session_state.form_data['slot']}")
         if st.button("Book Appointment"):
@@ -152,6 +181,14 @@ def show_book_appointment():
 
             appointment = create_appointment(patient_id, doctor_id, treatment_id, appointment_date, slot, ref)
             print("Created Appointment:", appointment)
+            if isinstance(appointment, tuple) and appointment[1] == SLOT_TAKEN_MESSAGE:
+                # Someone else got the slot first; go back and pick from the refreshed list
+                st.session_state.booking_error = SLOT_TAKEN_MESSAGE
+                st.session_state.step = 3
+                st.rerun()
+            if isinstance(appointment, (tuple, str)):
+                st.error(appointment[1] if isinstance(appointment, tuple) else appointment)
+                return
             # Share patient's documents with the doctor
             appointment_id = appointment.appointment_id
             print("Appointment ID:", appointment_id)
@@ -162,24 +199,9 @@ def show_book_appointment():
                 patient_id=patient_id,
                 doctor_id=doctor_id
             )
-            doctor_email = get_doctor_email(st.session_state.form_data["doctor_id"])
-            if doctor_email:
-                send_appointment_confirmation(
-                    user["email"],
-                    doctor_email,
-                    name,
-                    30,  # age placeholder
-                    gender,
-                    phone,
-                    st.session_state.form_data["doctor_name"],
-                    st.session_state.form_data["appointment_date"],
-                    st.session_state.form_data["slot"],
-                    ref,
-                )
-            else:
-                st.warning("⚠️ Could not find doctor's email for notification.")
-
+            # Confirmation emails and chat notices go out through the outbox dispatcher
             st.session_state.form_data["reference_number"] = ref
+            st.session_state.form_data["updated_at"] = appointment.updated_at
             st.success(f"Appointment booked successfully! Reference No: {ref}")
             st.session_state.step = 6
             st.rerun()
@@ -187,9 +209,13 @@ def show_book_appointment():
     # --- STEP 6: Generate Admit Card ---
     elif st.session_state.step == 6:
         st.subheader(steps[5])
-        pdf_path = generate_admit_card(st.session_state.form_data)
-        with open(pdf_path, "rb") as f:
-            st.download_button("Download Admit Card", f, file_name=pdf_path, mime="application/pdf")
+        pdf_bytes = generate_admit_card(st.session_state.form_data)
+        st.download_button(
+            "Download Admit Card",
+            pdf_bytes,
+            file_name=f"admit_card_{st.session_state.form_data['reference_number']}.pdf",
+            mime="application/pdf"
+        )
         if st.button("Finish"):
             st.session_state.step = 1
             st.session_state.form_data = {}
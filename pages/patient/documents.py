@@ -1,18 +1,23 @@
 import streamlit as st
-import pandas as pd
-import os
-from io import BytesIO
-from docx import Document
-from st_aggrid import AgGrid, GridOptionsBuilder, GridUpdateMode, JsCode
+from st_aggrid import JsCode
 import json
 
 from database.connection import SessionLocal
 from database.queries.document_queries import (
     get_patient_id_by_email,
-    fetch_documents_by_patient,
-    insert_document
+    has_documents,
+    fetch_documents_page,
+    insert_document,
+    search_documents,
+    DOCUMENT_SORTS
 )
+from database.queries.storage_usage_queries import check_quota, get_usage, PATIENT_STORAGE_QUOTA_BYTES
 from utils.document_utils import save_uploaded_file
+from utils.preview_utils import schedule_preview
+from utils.media_utils import schedule_transcode
+from pages.util.document_viewer import view_attachment_dialog
+from pages.util.document_search import search_page_number, render_search_hits
+from pages.util.paged_grid import paged_grid, rows_to_frame
 
 
 # ---------- Constants ----------
@@ -45,54 +50,24 @@ def add_record_dialog(patient_id):
                     return
 
                 db = SessionLocal()
-                file_path = save_uploaded_file(patient_id, name, file)
-                insert_document(db, patient_id, name, doc_type, category, file_path, desc)
+                # Checked against the counter before anything is written to storage
+                allowed, used, quota = check_quota(db, patient_id, file.size)
+                if not allowed:
+                    st.error(
+                        f"Storage limit reached: {used / 1024**2:.1f} MB of {quota / 1024**2:.0f} MB used. "
+                        f"This file needs {file.size / 1024**2:.1f} MB; delete older records to make room."
+                    )
+                    return
+
+                file_path, sha256, size_bytes = save_uploaded_file(file)
+                insert_document(db, patient_id, name, doc_type, category, file_path, desc, sha256, size_bytes)
+                schedule_preview(sha256, file_path)
+                schedule_transcode(sha256, file_path)
                 st.success("Record uploaded successfully!")
                 st.rerun()
     record_form()
 
 
-def view_attachment_dialog(file_path, document_name):
-    """Open the document in a Streamlit dialog viewer."""
-    if not os.path.exists(file_path):
-        st.error("File not found.")
-        return
-
-    ext = os.path.splitext(file_path)[1].lower()
-
-    @st.dialog(f"Viewing: {document_name}", width="large")
-    def dialog_view():
-        if ext in [".jpg", ".jpeg", ".png"]:
-            st.image(file_path, use_column_width=True)
-
-        elif ext == ".pdf":
-            with open(file_path, "rb") as f:
-                st.pdf(f, height=800)
-
-        elif ext == ".txt":
-            with open(file_path, "r", encoding="utf-8") as f:
-                content = f.read()
-            st.text_area("Text File Content", content, height=500)
-
-        elif ext == ".docx":
-            with open(file_path, "rb") as f:
-                document = Document(BytesIO(f.read()))
-                full_text = "\n\n".join([para.text for para in document.paragraphs])
-                st.text_area("DOCX Content", full_text, height=500)
-
-        elif ext in [".mp3", ".wav", ".ogg"]:
-            st.audio(file_path)
-
-        elif ext in [".mp4", ".webm"]:
-            st.video(file_path)
-
-        else:
-            st.warning(f"Unsupported file format: {ext}")
-            st.write("File path:", file_path)
-
-    dialog_view()
-
-
 # ---------- Main Page ----------
 def show_documents():
     user = st.session_state.get("user")
@@ -106,19 +81,25 @@ def show_documents():
 
     db = SessionLocal()
     patient_id = get_patient_id_by_email(db, user["email"])
-    records = fetch_documents_by_patient(db, patient_id)
 
-    if not records:
+    if not has_documents(db, patient_id):
         st.info("No records available")
         if st.button("Add Health Record"):
             add_record_dialog(patient_id)
         return
 
-    # ---------- DataFrame Setup ----------
-    df = pd.DataFrame(records, columns=[
-        "ID", "Name", "Type", "Description", "Uploaded At", "Category", "File Path"
-    ])
-    df["Action"] = "👁️ View"
+    # ---------- Full-text Search ----------
+    search = st.text_input(
+        "🔍 Search your records",
+        placeholder='e.g. cholesterol, knee MRI, "blood test" -2023'
+    ).strip()
+    if search:
+        page = search_page_number("record_search", search)
+        hits, total = search_documents(db, search, patient_id=patient_id, page=page)
+        render_search_hits(hits, total, "record_search")
+        st.divider()
+        st.button(label="➕ Add New Record", on_click=lambda: add_record_dialog(patient_id))
+        return
 
     # ---------- AgGrid Button Renderer ----------
     button_renderer = JsCode("""
@@ -152,20 +133,22 @@ def show_documents():
         }
     """)
 
-    gb = GridOptionsBuilder.from_dataframe(df)
-    gb.configure_default_column(editable=False, cellStyle={'fontSize': '16px'})
-    gb.configure_column("Action", cellRenderer=button_renderer)
-    grid_options = gb.build()
+    # ---------- Paged Grid (one SQL page at a time) ----------
+    def fetch_page(search, filters, sort, descending, cursor, page_size):
+        rows, next_cursor = fetch_documents_page(
+            db, patient_id, search, filters["Type"], filters["Category"], sort, descending, cursor, page_size
+        )
+        df = rows_to_frame(rows, ["ID", "Name", "Type", "Description", "Uploaded At", "Category", "File Path"])
+        df["Action"] = "👁️ View"
+        return df, next_cursor
 
-    # ---------- Render Grid ----------
     try:
-        AgGrid(
-            df,
-            gridOptions=grid_options,
-            update_mode=GridUpdateMode.NO_UPDATE,
+        paged_grid(
+            "health_records", fetch_page, list(DOCUMENT_SORTS),
+            filter_options={"Type": DOCUMENT_TYPES, "Category": PREDEFINED_CATEGORIES},
+            search_placeholder="Filter by name or description…",
+            configure=lambda gb: gb.configure_column("Action", cellRenderer=button_renderer),
             allow_unsafe_jscode=True,
-            fit_columns_on_grid_load=True,
-            height=420,
         )
     except Exception as e:
         print(f"[⚠️ AgGrid Rendering Warning] {e}")
@@ -225,4 +208,9 @@ def show_documents():
 
     # ---------- Add Record Button ----------
     st.divider()
+    used, _ = get_usage(db, patient_id)
+    st.progress(
+        min(used / PATIENT_STORAGE_QUOTA_BYTES, 1.0),
+        text=f"💾 {used / 1024**2:.1f} MB of {PATIENT_STORAGE_QUOTA_BYTES / 1024**2:.0f} MB used"
+    )
     st.button(label="➕ Add New Record", on_click=lambda: add_record_dialog(patient_id))
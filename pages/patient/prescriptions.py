@@ -5,7 +5,8 @@ import plotly.express as px
 from st_aggrid import AgGrid, GridOptionsBuilder
 from datetime import datetime, timezone
 from database.connection import SessionLocal
-from database.queries.prescription_queries import get_prescriptions_for_patient
+from database.queries.prescription_queries import get_prescription_records_for_patient
+from utils.pdf_generator import generate_prescription_pdf, export_prescriptions_zip
 
 
 def show_prescriptions():
@@ -22,7 +23,7 @@ def show_prescriptions():
 
     # --- Fetch Prescriptions ---
     with SessionLocal() as session:
-        prescriptions = get_prescriptions_for_patient(session, user["email"])
+        prescriptions = get_prescription_records_for_patient(session, user["email"])
 
         if not prescriptions:
             st.info("No prescriptions found.")
@@ -30,12 +31,12 @@ def show_prescriptions():
 
         df = pd.DataFrame([
             {
-                "Prescription ID": p.prescription_id,
-                "Medication": p.medication_name,
-                "Dosage": p.dosage,
-                "Duration (days)": p.duration,
-                "Created At": p.created_at,
-                "Doctor": p.doctor.name if p.doctor else "Unknown",
+                "Prescription ID": p["prescription_id"],
+                "Medication": p["medication_name"],
+                "Dosage": p["dosage"],
+                "Duration (days)": p["duration"],
+                "Created At": p["created_at"],
+                "Doctor": p["doctor_name"] or "Unknown",
             }
             for p in prescriptions
         ])
@@ -136,3 +137,28 @@ def show_prescriptions():
         grid_options = gb.build()
 
         AgGrid(df, gridOptions=grid_options, height=700, fit_columns_on_grid_load=True)
+
+        # --- Printable Prescriptions ---
+        st.divider()
+        records = {p["prescription_id"]: p for p in prescriptions}
+        cols = st.columns([2, 1, 1])
+        with cols[0]:
+            selected_id = st.selectbox(
+                "Select Prescription",
+                list(records.keys()),
+                format_func=lambda pid: f"#{pid} - {records[pid]['medication_name']}"
+            )
+        with cols[1]:
+            st.download_button(
+                "⬇️ Download PDF",
+                generate_prescription_pdf(records[selected_id]),
+                file_name=f"prescription_{selected_id}.pdf",
+                mime="application/pdf"
+            )
+        with cols[2]:
+            if st.button("📦 Export All (ZIP)"):
+                with st.spinner("Rendering prescriptions..."):
+                    st.session_state["prescriptions_zip"] = export_prescriptions_zip(list(records.values()))
+            zip_bytes = st.session_state.pop("prescriptions_zip", None)
+            if zip_bytes:
+                st.download_button("⬇️ Download ZIP", zip_bytes, file_name="prescriptions.zip", mime="application/zip")
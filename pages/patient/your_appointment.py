@@ -1,28 +1,44 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-from datetime import datetime
+from datetime import datetime, date
 from database.connection import SessionLocal
 from database.queries.appointment_queries import (
-    get_patient_appointments,
+    get_patient_appointments_page,
+    get_patient_appointment_summary,
+    get_upcoming_appointments,
+    APPOINTMENT_SORTS,
+    APPOINTMENT_STATUSES,
     cancel_appointment,
     reschedule_appointment,
     get_available_slots
 )
+from database.queries.patient_queries import get_patient_by_email
+from database.queries.share_document_queries import share_documents_with_doctor
+from database.queries.waitlist_queries import get_patient_waitlist, confirm_waitlist_offer, leave_waitlist
 from notifications import trigger_notification
-from st_aggrid import AgGrid, GridOptionsBuilder, JsCode, GridUpdateMode
+from st_aggrid import JsCode
+from pages.util.paged_grid import paged_grid, rows_to_frame
 import json
 
-def render_aggrid_with_chat_button(df):
-    # Ensure IDs exist
-    if "Doctor ID" not in df.columns:
-        df["Doctor ID"] = df["doctor_id"]
-    if "Patient ID" not in df.columns:
-        df["Patient ID"] = df["patient_id"]
-    if "Doctor Name" not in df.columns:
-        df["Doctor Name"] = df["doctor_name"]
 
-    df["Action"] = "💬 Chat"
+def _fetch_appointments_page(email):
+    def fetch_page(search, filters, sort, descending, cursor, page_size):
+        rows, next_cursor = get_patient_appointments_page(
+            email, search, filters["Status"], sort, descending, cursor, page_size
+        )
+        df = rows_to_frame(rows, [
+            "Appointment ID", "Appointment Date", "Time Slot", "Doctor Name", "Doctor ID", "Patient ID",
+            "Status", "Reference #", "Treatment Name", "Doctor Email", "appointment_id"
+        ])
+        df["Day"] = df["Appointment Date"].map(lambda d: d.strftime("%A"))
+        df["Appointment Date"] = df["Appointment Date"].map(lambda d: d.strftime("%Y-%m-%d %H:%M"))
+        df["Action"] = "💬 Chat"
+        return df.drop(columns=["appointment_id"]), next_cursor
+    return fetch_page
+
+
+def render_aggrid_with_chat_button(email):
 
     # --- Define a custom JavaScript cell renderer ---
     chat_button_renderer = JsCode("""
@@ -55,20 +71,16 @@ def render_aggrid_with_chat_button(df):
         }
     """)
 
-    gb = GridOptionsBuilder.from_dataframe(df)
-    gb.configure_default_column(editable=False, cellStyle={'fontSize': '16px'})
-    gb.configure_column("Doctor ID", hide=True)
-    gb.configure_column("Patient ID", hide=True)
-    gb.configure_column("Action", cellRenderer=chat_button_renderer)
-    grid_options = gb.build()
-
-    AgGrid(
-        df,
-        gridOptions=grid_options,
-        update_mode=GridUpdateMode.NO_UPDATE,
-        allow_unsafe_jscode=True,
-        fit_columns_on_grid_load=True,
-        height=420,
+    def configure(gb):
+        gb.configure_column("Doctor ID", hide=True)
+        gb.configure_column("Patient ID", hide=True)
+        gb.configure_column("Action", cellRenderer=chat_button_renderer)
+
+    paged_grid(
+        "patient_appointments", _fetch_appointments_page(email), list(APPOINTMENT_SORTS),
+        filter_options={"Status": APPOINTMENT_STATUSES},
+        search_placeholder="Filter by doctor, treatment or reference…",
+        configure=configure, allow_unsafe_jscode=True,
     )
 
     # --- JS → Streamlit bridge (handles button click) ---
@@ -122,6 +134,71 @@ def render_aggrid_with_chat_button(df):
             st.error(f"Error opening chat: {e}")
 
 
+def reschedule_dialog(email, patient_id):
+    @st.dialog("Reschedule Appointment")
+    def form():
+        upcoming = {row[0]: row for row in get_upcoming_appointments(email)}
+        if not upcoming:
+            st.info("You have no upcoming appointments to reschedule.")
+            return
+        appointment_id = st.selectbox(
+            "Appointment", list(upcoming),
+            format_func=lambda a: f"{upcoming[a][5]} · {upcoming[a][2]} · {upcoming[a][3].strftime('%Y-%m-%d')} {upcoming[a][4]}"
+        )
+        doctor_id = upcoming[appointment_id][1]
+        new_date = st.date_input("New Date", min_value=date.today())
+        slots = get_available_slots(doctor_id, new_date)
+        if not slots:
+            st.info("No free slots on this date.")
+            return
+        new_slot = st.selectbox("New Time Slot", slots)
+
+        if st.button("Reschedule"):
+            success, message, alternatives = reschedule_appointment(appointment_id, patient_id, new_date, new_slot)
+            if success:
+                st.toast(message)
+                st.rerun()
+            st.error(message)
+            if alternatives:
+                st.caption("Still free that day: " + ", ".join(alternatives))
+
+    form()
+
+
+def render_waitlist(patient):
+    """Open waitlist entries, with confirm/decline for slots currently held for the patient."""
+    entries = get_patient_waitlist(patient.patient_id) if patient else []
+    if not entries:
+        return
+
+    st.write("### ⏳ Waitlist")
+    for waitlist_id, doctor_id, doctor_name, earliest, latest, status, expires_at, offered_date, offered_slot in entries:
+        with st.container(border=True):
+            if status == "offered":
+                st.success(
+                    f"🎉 A slot with **{doctor_name}** opened up: {offered_date.strftime('%Y-%m-%d')} {offered_slot}. "
+                    f"Held for you until {expires_at.astimezone().strftime('%H:%M')}."
+                )
+                cols = st.columns(2)
+                if cols[0].button("✅ Confirm", key=f"waitlist_confirm_{waitlist_id}"):
+                    appointment_id, message = confirm_waitlist_offer(waitlist_id, patient.patient_id)
+                    if appointment_id:
+                        share_documents_with_doctor(
+                            appointment_id=appointment_id, patient_id=patient.patient_id, doctor_id=doctor_id
+                        )
+                    st.toast(message)
+                    st.rerun()
+                if cols[1].button("❌ Decline", key=f"waitlist_decline_{waitlist_id}"):
+                    leave_waitlist(waitlist_id, patient.patient_id)
+                    st.rerun()
+            else:
+                cols = st.columns([4, 1])
+                cols[0].write(f"Waiting for **{doctor_name}**, {earliest.strftime('%Y-%m-%d')} – {latest.strftime('%Y-%m-%d')}")
+                if cols[1].button("Leave", key=f"waitlist_leave_{waitlist_id}"):
+                    leave_waitlist(waitlist_id, patient.patient_id)
+                    st.rerun()
+
+
 def show_your_appointments():
     user = st.session_state.get("user", None)
     if not user or user["role"] != "patient":
@@ -129,28 +206,30 @@ def show_your_appointments():
         return
 
     st.header("Your Appointments", divider="gray")
+    patient = get_patient_by_email(user["email"])
+    if patient and st.button("🔁 Reschedule an Appointment"):
+        reschedule_dialog(user["email"], patient.patient_id)
+    render_waitlist(patient)
 
     db = SessionLocal()
     try:
-        appointments = get_patient_appointments(user["email"])
-        if appointments.empty:
+        status_counts, doctor_counts = get_patient_appointment_summary(user["email"])
+        if status_counts.empty:
             st.info("No appointments found.")
             return
 
         cols = st.columns(4)
         with cols[0]:
             st.plotly_chart(
-                px.pie(appointments, names="Status", title="Appointment Status"),
+                px.pie(status_counts, names="Status", values="Count", title="Appointment Status"),
                 use_container_width=True
             )
 
         with cols[3]:
-            df_counts = appointments["Doctor Name"].value_counts().reset_index()
-            df_counts.columns = ["Doctor", "Count"]
-            st.plotly_chart(px.bar(df_counts, x="Doctor", y="Count", title="Appointments by Doctor"), use_container_width=True)
+            st.plotly_chart(px.bar(doctor_counts, x="Doctor", y="Count", title="Appointments by Doctor"), use_container_width=True)
 
-        # ✅ Renders the grid with chat button
-        render_aggrid_with_chat_button(appointments)
+        # ✅ Renders the grid with chat button, one SQL page at a time
+        render_aggrid_with_chat_button(user["email"])
 
     finally:
         db.close()
@@ -1,18 +1,18 @@
 import streamlit as st
-from datetime import time
+from datetime import date, time
 from database.queries.availability_queries import (
     add_doctor_availability,
     update_doctor_availability,
-    delete_doctor_availability
+    delete_doctor_availability,
+    add_availability_exception,
+    delete_availability_exceptions
 )
+from utils.availability_engine import DAYS_OF_WEEK
 
 def add_availability_dialog(doctor_id):
     @st.dialog("Add Availability Slot")
     def form():
-        days = st.multiselect(
-            "Select Days",
-            ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
-        )
+        days = st.multiselect("Select Days", DAYS_OF_WEEK)
         start_time = st.time_input("Start Time", value=time(9, 0))
         end_time = st.time_input("End Time", value=time(17, 0))
 
@@ -37,11 +37,7 @@ def update_availability_dialog(doctor_id, slots):
         selected = st.selectbox("Select Slot", options=list(slot_map.keys()))
         s_id, day, s_time, e_time = slot_map[selected]
 
-        days = st.multiselect(
-            "Select Days",
-            ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"],
-            default=[day]
-        )
+        days = st.multiselect("Select Days", DAYS_OF_WEEK, default=[day])
         start_time = st.time_input("Start Time", value=s_time)
         end_time = st.time_input("End Time", value=e_time)
 
@@ -68,3 +64,50 @@ def delete_availability_dialog(doctor_id, slots):
             st.rerun()
 
     form()
+
+
+def add_exception_dialog(doctor_id):
+    @st.dialog("Leave / Extra Hours")
+    def form():
+        kind = st.radio("Type", ["block", "add"], horizontal=True,
+                        format_func=lambda k: "🚫 Block (leave, holiday)" if k == "block" else "➕ Extra clinic hours")
+        dates = st.date_input("Dates", value=(date.today(), date.today()), min_value=date.today())
+        whole_day = kind == "block" and st.checkbox("Whole day", value=True)
+        start_time = end_time = None
+        if not whole_day:
+            start_time = st.time_input("Start Time", value=time(9, 0))
+            end_time = st.time_input("End Time", value=time(13, 0))
+        reason = st.text_input("Reason (optional)")
+
+        if st.button("Save"):
+            if len(dates) != 2:
+                st.error("Select a start and an end date.")
+                return
+            success, msg = add_availability_exception(doctor_id, dates[0], dates[1], kind, start_time, end_time, reason or None)
+            st.success(msg) if success else st.error(msg)
+            if success:
+                st.rerun()
+
+    form()
+
+
+def delete_exception_dialog(doctor_id, exceptions):
+    @st.dialog("Delete Leave / Extra Hours")
+    def form():
+        labels = {exception_label(e): e[0] for e in exceptions}
+        selected = st.multiselect("Select Entries", list(labels.keys()))
+
+        if selected and st.button("Confirm Delete"):
+            success, msg = delete_availability_exceptions(doctor_id, [labels[s] for s in selected])
+            st.success(msg) if success else st.error(msg)
+            st.rerun()
+
+    form()
+
+
+def exception_label(exception):
+    exception_id, start, end, kind, s_time, e_time, reason = exception
+    dates = f"{start:%d %b %Y}" if start == end else f"{start:%d %b} – {end:%d %b %Y}"
+    hours = "whole day" if s_time is None else f"{s_time:%I:%M %p} - {e_time:%I:%M %p}"
+    label = f"{'🚫 Blocked' if kind == 'block' else '➕ Extra'}: {dates}, {hours}"
+    return f"{label} ({reason})" if reason else label
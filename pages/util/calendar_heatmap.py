@@ -0,0 +1,61 @@
+import calendar
+from datetime import date
+
+import plotly.graph_objects as go
+import streamlit as st
+
+from database.queries.availability_queries import get_month_calendar
+
+
+def render_month_heatmap(doctor_id, key="month_heatmap"):
+    """Calendar grid of one month: each day coloured by the share of its bookable slots taken."""
+    today = date.today()
+    col1, col2 = st.columns(2)
+    year = col1.selectbox("Year", list(range(today.year - 1, today.year + 2)), index=1, key=f"{key}_year")
+    month = col2.selectbox(
+        "Month", list(range(1, 13)), index=today.month - 1,
+        format_func=lambda m: calendar.month_name[m], key=f"{key}_month"
+    )
+
+    days = {day.day: (slots, booked) for day, slots, booked in get_month_calendar(doctor_id, year, month)}
+    load, labels = [], []
+    # monthcalendar gives Monday-first weeks with 0 for days outside the month
+    for week in calendar.monthcalendar(year, month):
+        load.append([])
+        labels.append([])
+        for day in week:
+            slots, booked = days.get(day, (0, 0))
+            if not day:
+                load[-1].append(None)
+                labels[-1].append("")
+            elif slots:
+                load[-1].append(min(booked / slots, 1.0))
+                labels[-1].append(f"{day}<br>{booked}/{slots}")
+            else:
+                load[-1].append(1.0 if booked else None)
+                labels[-1].append(f"{day}<br>off" if not booked else f"{day}<br>{booked}/0")
+
+    total_slots = sum(slots for slots, _ in days.values())
+    total_booked = sum(booked for _, booked in days.values())
+    cols = st.columns(3)
+    cols[0].metric("Bookable Slots", total_slots)
+    cols[1].metric("Booked", total_booked)
+    cols[2].metric("Free", max(total_slots - total_booked, 0))
+
+    fig = go.Figure(go.Heatmap(
+        z=load,
+        x=[calendar.day_abbr[i] for i in range(7)],
+        y=[f"Week {i + 1}" for i in range(len(load))],
+        text=labels,
+        texttemplate="%{text}",
+        hovertemplate="%{text}<extra></extra>",
+        colorscale="YlOrRd",
+        zmin=0,
+        zmax=1,
+        xgap=3,
+        ygap=3,
+        colorbar=dict(title="Booked", tickformat=".0%"),
+    ))
+    fig.update_yaxes(autorange="reversed")
+    fig.update_layout(title=f"{calendar.month_name[month]} {year}", height=360, margin=dict(t=40, b=10))
+    st.plotly_chart(fig, use_container_width=True)
@@ -0,0 +1,47 @@
+import math
+import streamlit as st
+
+from database.queries.document_queries import SEARCH_PAGE_SIZE
+from pages.util.document_viewer import view_attachment_dialog
+
+
+def search_page_number(key, query):
+    """Current results page for a search box; starts over whenever the query text changes."""
+    if st.session_state.get(f"{key}_query") != query:
+        st.session_state[f"{key}_query"] = query
+        st.session_state[f"{key}_page"] = 1
+    return st.session_state.get(f"{key}_page", 1)
+
+
+def render_search_hits(hits, total, key, show_patient=False):
+    """List ranked search hits with their highlighted snippets, a View button each and pagination."""
+    if not total:
+        st.info("No documents match your search.")
+        return
+
+    page = st.session_state.get(f"{key}_page", 1)
+    pages = math.ceil(total / SEARCH_PAGE_SIZE)
+    st.caption(f"{total} matching document{'s' if total != 1 else ''} · page {page} of {pages}")
+
+    for hit in hits:
+        with st.container(border=True):
+            cols = st.columns([5, 1])
+            with cols[0]:
+                title = f"**{hit.document_name}** · {hit.document_type or '-'} · {hit.category_name or '-'}"
+                if show_patient:
+                    title += f" · {hit.patient_name} · Ref #{hit.reference_number}"
+                st.markdown(title)
+                if hit.snippet:
+                    st.markdown(hit.snippet.replace("\n", " "))
+                st.caption(f"Uploaded {hit.uploaded_at:%Y-%m-%d}" if hit.uploaded_at else "")
+            with cols[1]:
+                if st.button("👁️ View", key=f"{key}_view_{hit.document_id}_{hit.reference_number}"):
+                    view_attachment_dialog(hit.file_path, hit.document_name)
+
+    prev_col, _, next_col = st.columns([1, 4, 1])
+    if prev_col.button("⬅️ Previous", key=f"{key}_prev", disabled=page <= 1):
+        st.session_state[f"{key}_page"] = page - 1
+        st.rerun()
+    if next_col.button("Next ➡️", key=f"{key}_next", disabled=page >= pages):
+        st.session_state[f"{key}_page"] = page + 1
+        st.rerun()
@@ -0,0 +1,126 @@
+import streamlit as st
+import os
+
+from database.queries.preview_queries import get_preview_for_path, get_blob_hash_for_path, get_document_text_for_path
+from database.queries.media_queries import get_media_job_for_path
+from utils.preview_utils import schedule_preview, extract_document_text
+from utils.media_utils import schedule_transcode, VIDEO_EXTS, AUDIO_EXTS
+from utils.blob_store import get_blob_store
+from utils.file_server import make_view_url
+from utils.rerun_profiler import profiled
+
+# Presigned links must outlive a dialog that stays open while the user reads or plays media
+VIEW_URL_TTL = 3600
+
+
+def _show(render, key, **kwargs):
+    """Hand a stored file to st.image/st.audio/st.video: a presigned URL when available, else a local path."""
+    store = get_blob_store()
+    url = store.presigned_url(key, ttl=VIEW_URL_TTL)
+    if url:
+        return render(url, **kwargs)
+    with store.local_copy(key) as path:
+        return render(path, **kwargs)
+
+
+def _render_preview(preview):
+    """Show the precomputed thumbnail and/or text snippet."""
+    if preview.thumbnail_path:
+        caption = f"Page 1 of {preview.page_count}" if preview.page_count else None
+        _show(st.image, preview.thumbnail_path, caption=caption, use_column_width=True)
+    if preview.text_snippet:
+        st.text_area("Preview", preview.text_snippet, height=300)
+
+
+def _render_media(file_path, ext):
+    """Play the low-bitrate rendition when it is ready, with the original one click away."""
+    job = get_media_job_for_path(file_path)
+    if job is None or job.status == "queued":
+        # A queued job is only re-submitted once its claim has gone stale
+        schedule_transcode(job.sha256 if job else get_blob_hash_for_path(file_path), file_path)
+
+    ready = job is not None and job.status == "done" and job.rendition_path
+    if not ready:
+        if job is not None and job.status == "queued":
+            st.caption("A lighter streaming version is being prepared; playing the original.")
+        _render_full(file_path, ext)
+        return
+
+    if ext in VIDEO_EXTS:
+        if job.poster_path:
+            _show(st.image, job.poster_path, use_column_width=True)
+        _show(st.video, job.rendition_path)
+    else:
+        if job.waveform:
+            st.area_chart(job.waveform, height=120)
+        _show(st.audio, job.rendition_path)
+
+    if st.button("▶️ Play original quality"):
+        _render_full(file_path, ext)
+
+
+def _render_full(file_path, ext):
+    # PDF and text go to the browser by URL, so the file never passes through this process
+    if ext in [".jpg", ".jpeg", ".png"]:
+        _show(st.image, file_path, use_column_width=True)
+
+    elif ext == ".pdf":
+        st.pdf(make_view_url(file_path, VIEW_URL_TTL), height=800)
+
+    elif ext == ".txt":
+        st.components.v1.iframe(make_view_url(file_path, VIEW_URL_TTL), height=500, scrolling=True)
+
+    elif ext == ".docx":
+        # Browsers cannot show DOCX; reuse the text extracted for search before downloading the file
+        full_text = get_document_text_for_path(file_path)
+        if full_text is None:
+            with get_blob_store().local_copy(file_path) as path:
+                full_text = extract_document_text(path)
+        st.text_area("DOCX Content", full_text, height=500)
+
+    elif ext in [".mp3", ".wav", ".ogg"]:
+        _show(st.audio, file_path)
+
+    elif ext in [".mp4", ".webm"]:
+        _show(st.video, file_path)
+
+    else:
+        st.warning(f"Unsupported file format: {ext}")
+        st.write("File path:", file_path)
+
+
+def view_attachment_dialog(file_path, document_name):
+    """Open the document in a Streamlit dialog, showing the small preview before the full file."""
+    if not get_blob_store().exists(file_path):
+        st.error("File not found.")
+        return
+
+    ext = os.path.splitext(file_path)[1].lower()
+    preview = get_preview_for_path(file_path)
+    if preview is None or preview.status == "pending":
+        # Documents uploaded before previews existed get one generated on first view, and a
+        # preview whose worker died is re-queued once its claim has gone stale
+        schedule_preview(get_blob_hash_for_path(file_path), file_path)
+
+    has_preview = (
+        preview is not None
+        and preview.status == "ready"
+        and (preview.thumbnail_path or preview.text_snippet)
+    )
+
+    # st.dialog runs as a fragment: buttons inside it rerun only the dialog body, not the page behind it
+    @st.dialog(f"Viewing: {document_name}", width="large")
+    @profiled("document_viewer")
+    def dialog_view():
+        if ext in VIDEO_EXTS | AUDIO_EXTS:
+            _render_media(file_path, ext)
+            return
+        if has_preview:
+            _render_preview(preview)
+            # The dialog reruns on its own, so only the full file is fetched on this click
+            if not st.button("📄 Open full document"):
+                return
+            st.divider()
+        _render_full(file_path, ext)
+
+    dialog_view()
@@ -0,0 +1,82 @@
+import pandas as pd
+import streamlit as st
+from st_aggrid import AgGrid, GridOptionsBuilder, GridUpdateMode
+from utils.rerun_profiler import profiled
+
+DEFAULT_PAGE_SIZE = 20
+
+
+def _state(key):
+    """Per-grid paging state: the cursor of every page visited so far, so Previous is a pop."""
+    return st.session_state.setdefault(f"{key}_paging", {"signature": None, "cursors": [None]})
+
+
+def paged_grid(key, fetch_page, sort_options, filter_options=None, page_size=DEFAULT_PAGE_SIZE,
+               search_placeholder="Filter…", default_descending=True, configure=None, height=420, **aggrid_kwargs):
+    """
+    AgGrid backed by SQL paging. Search, filter and sort controls are rendered by Streamlit and handed
+    to fetch_page, which runs the query; the browser only ever receives the rows of the current page.
+
+    fetch_page(search, filters, sort, descending, cursor, page_size) -> (DataFrame, next_cursor)
+    sort_options: labels the user can sort by (the first is the default).
+    filter_options: {label: [choices]} shown as select boxes; "All" means no filter.
+    configure(gb) lets the caller add column renderers before the grid options are built.
+    The grid and its controls form a fragment: paging, searching and sorting rerun only the grid.
+    """
+    _grid_fragment(key, fetch_page, sort_options, filter_options or {}, page_size, search_placeholder,
+                   default_descending, configure, height, aggrid_kwargs)
+
+
+@st.fragment
+@profiled("paged_grid")
+def _grid_fragment(key, fetch_page, sort_options, filter_options, page_size, search_placeholder,
+                   default_descending, configure, height, aggrid_kwargs):
+    cols = st.columns([3] + [2] * len(filter_options) + [2, 1])
+    search = cols[0].text_input("Search", key=f"{key}_search", placeholder=search_placeholder,
+                                label_visibility="collapsed").strip()
+    filters = {}
+    for col, (label, choices) in zip(cols[1:], filter_options.items()):
+        choice = col.selectbox(label, ["All"] + list(choices), key=f"{key}_filter_{label}", label_visibility="collapsed")
+        filters[label] = None if choice == "All" else choice
+    sort = cols[-2].selectbox("Sort by", sort_options, key=f"{key}_sort", label_visibility="collapsed")
+    descending = cols[-1].toggle("Desc", key=f"{key}_desc", value=default_descending)
+
+    # Any change to search/filter/sort restarts from the first page
+    state = _state(key)
+    signature = (search, tuple(sorted(filters.items())), sort, descending)
+    if state["signature"] != signature:
+        state.update(signature=signature, cursors=[None])
+
+    df, next_cursor = fetch_page(search, filters, sort, descending, state["cursors"][-1], page_size)
+
+    if df.empty:
+        st.info("No matching rows.")
+    else:
+        gb = GridOptionsBuilder.from_dataframe(df)
+        gb.configure_default_column(editable=False, sortable=False, cellStyle={"fontSize": "16px"})
+        if configure:
+            configure(gb)
+        # aggrid_kwargs is kept for the fragment's reruns, so overrides are merged rather than popped
+        options = {"update_mode": GridUpdateMode.NO_UPDATE, "fit_columns_on_grid_load": True, **aggrid_kwargs}
+        AgGrid(
+            df,
+            gridOptions=gb.build(),
+            height=height,
+            key=f"{key}_grid",
+            **options,
+        )
+
+    page_number = len(state["cursors"])
+    prev_col, info_col, next_col = st.columns([1, 4, 1])
+    info_col.caption(f"Page {page_number}")
+    if prev_col.button("⬅️ Previous", key=f"{key}_prev", disabled=page_number == 1):
+        state["cursors"].pop()
+        st.rerun(scope="fragment")
+    if next_col.button("Next ➡️", key=f"{key}_next", disabled=next_cursor is None):
+        state["cursors"].append(next_cursor)
+        st.rerun(scope="fragment")
+
+
+def rows_to_frame(rows, columns):
+    """DataFrame from query rows with display column names, keeping the columns even when empty."""
+    return pd.DataFrame([tuple(row) for row in rows], columns=columns)
@@ -0,0 +1,6 @@
+# tests/conftest.py
+import os
+import sys
+
+# The app is run from the repository root and imports its packages from there
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
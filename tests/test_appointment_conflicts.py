@@ -0,0 +1,119 @@
+# tests/test_appointment_conflicts.py
+"""Overlap checks of create_appointment. Needs a Postgres DATABASE_URL; skipped otherwise."""
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+import pytest
+
+try:
+    from database.connection import SessionLocal
+except (ImportError, RuntimeError) as e:
+    pytest.skip(f"database not available: {e}", allow_module_level=True)
+
+from database.create_tables import create_tables
+from database.models.Appointment import Appointment
+from database.models.Doctor import Doctor
+from database.models.Patient import Patient
+from database.models.Treatment import Treatment
+from database.models.User import User, UserRole
+from database.queries.appointment_queries import SLOT_TAKEN_MESSAGE, cancel_appointment, create_appointment
+
+PREFIX = "test-conflict-"
+PATIENTS = 8
+DAY = datetime.combine(date.today() + timedelta(days=60), datetime.min.time())
+
+
+def _cleanup(session):
+    # Doctors, patients, treatments and their appointments cascade from the users
+    session.query(User).filter(User.user_id.like(f"{PREFIX}%")).delete(synchronize_session=False)
+    session.commit()
+
+
+@pytest.fixture(scope="module")
+def parties():
+    """(doctor_id, treatment_id, [patient_id, ...]) created for this module and removed after it."""
+    create_tables()
+    with SessionLocal() as session:
+        _cleanup(session)
+        run = uuid.uuid4().hex[:8]
+
+        def user(kind, role):
+            user_id = f"{PREFIX}{kind}-{run}"
+            session.add(User(
+                user_id=user_id, name=f"Test {kind}", email=f"{user_id}@test.invalid",
+                password_hash="-", role=role, is_verified=True,
+            ))
+            return user_id
+
+        doctor_user = user("doctor", UserRole.doctor)
+        doctor = Doctor(
+            user_id=doctor_user, name="Test Doctor", email=f"{doctor_user}@test.invalid", license_number=doctor_user,
+        )
+        patients = []
+        for i in range(PATIENTS):
+            patient_user = user(f"patient{i}", UserRole.patient)
+            patients.append(Patient(user_id=patient_user, name=f"Test Patient {i}", email=f"{patient_user}@test.invalid"))
+        session.add_all([doctor, *patients])
+        session.flush()
+        treatment = Treatment(doctor_id=doctor.doctor_id, treatment_name="Consultation", cost=Decimal("10.00"))
+        session.add(treatment)
+        session.commit()
+        ids = doctor.doctor_id, treatment.treatment_id, [patient.patient_id for patient in patients]
+
+    yield ids
+
+    with SessionLocal() as session:
+        _cleanup(session)
+
+
+@pytest.fixture
+def book(parties):
+    """book(patient index, "HH:MM - HH:MM") on the test day; the day is cleared after each test."""
+    doctor_id, treatment_id, patient_ids = parties
+
+    def _book(patient, time_slot):
+        return create_appointment(
+            patient_ids[patient], doctor_id, treatment_id, DAY, time_slot, reference_number=uuid.uuid4().hex[:12],
+        )
+
+    yield _book
+
+    with SessionLocal() as session:
+        session.query(Appointment).filter(Appointment.doctor_id == doctor_id).delete(synchronize_session=False)
+        session.commit()
+
+
+def test_overlapping_insert_is_rejected(book):
+    assert isinstance(book(0, "10:00 - 10:30"), Appointment)
+    assert book(1, "10:00 - 10:30") == (None, SLOT_TAKEN_MESSAGE)
+    assert book(1, "10:15 - 10:45") == (None, SLOT_TAKEN_MESSAGE)
+    assert book(1, "09:00 - 12:00") == (None, SLOT_TAKEN_MESSAGE)
+
+
+def test_adjacent_slots_do_not_overlap(book):
+    assert isinstance(book(0, "10:00 - 10:30"), Appointment)
+    assert isinstance(book(1, "10:30 - 11:00"), Appointment)
+    assert isinstance(book(1, "09:30 - 10:00"), Appointment)
+
+
+def test_cancelled_appointment_does_not_block_rebooking(book, parties):
+    _, _, patient_ids = parties
+    first = book(0, "14:00 - 14:30")
+    assert cancel_appointment(first.appointment_id, patient_ids[0])
+    assert isinstance(book(1, "14:00 - 14:30"), Appointment)
+    # The rebooked slot is live again
+    assert book(0, "14:00 - 14:30") == (None, SLOT_TAKEN_MESSAGE)
+
+
+def test_invalid_slot_is_rejected(book):
+    assert book(0, "10:30 - 10:00") == (None, "❌ Invalid time slot.")
+
+
+def test_concurrent_bookings_of_one_slot_have_one_winner(book):
+    # One patient each, so only the slot is contended and not the patient's appointment numbers
+    with ThreadPoolExecutor(max_workers=PATIENTS) as pool:
+        results = list(pool.map(lambda i: book(i, "16:00 - 16:30"), range(PATIENTS)))
+    assert sum(isinstance(result, Appointment) for result in results) == 1
+    assert results.count((None, SLOT_TAKEN_MESSAGE)) == PATIENTS - 1
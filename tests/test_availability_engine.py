@@ -0,0 +1,106 @@
+# tests/test_availability_engine.py
+from datetime import date, time
+
+import pytest
+
+from utils.availability_engine import build_calendar, merge_intervals, subtract_intervals
+
+MONDAY = date(2026, 3, 2)
+WEEKLY = {
+    "Monday": [(time(9), time(12)), (time(13), time(17))],
+    "Tuesday": [(time(9), time(17))],
+}
+
+
+# ---------- merge_intervals ----------
+def test_merge_overlapping_and_touching():
+    merged = merge_intervals([(time(11), time(13)), (time(9), time(12)), (time(13), time(14))])
+    assert merged == [(time(9), time(14))]
+
+
+def test_merge_keeps_gaps():
+    assert merge_intervals([(time(13), time(14)), (time(9), time(10))]) == [(time(9), time(10)), (time(13), time(14))]
+
+
+def test_merge_contained_interval():
+    assert merge_intervals([(time(9), time(17)), (time(10), time(11))]) == [(time(9), time(17))]
+
+
+@pytest.mark.parametrize("start, end", [(time(10), time(10)), (time(11), time(10))])
+def test_merge_rejects_empty_or_inverted(start, end):
+    with pytest.raises(ValueError):
+        merge_intervals([(start, end)])
+
+
+# ---------- subtract_intervals ----------
+def test_subtract_splits_interval():
+    assert subtract_intervals([(time(9), time(17))], [(time(12), time(13))]) == [(time(9), time(12)), (time(13), time(17))]
+
+
+def test_subtract_cuts_at_both_edges():
+    remaining = subtract_intervals([(time(9), time(17))], [(time(8), time(10)), (time(16), time(18))])
+    assert remaining == [(time(10), time(16))]
+
+
+def test_subtract_across_several_intervals():
+    remaining = subtract_intervals([(time(9), time(12)), (time(13), time(17))], [(time(11), time(14))])
+    assert remaining == [(time(9), time(11)), (time(14), time(17))]
+
+
+def test_subtract_everything_and_nothing():
+    assert subtract_intervals([(time(9), time(12))], [(time(8), time(13))]) == []
+    assert subtract_intervals([(time(9), time(12))], [(time(13), time(14))]) == [(time(9), time(12))]
+
+
+# ---------- build_calendar ----------
+def test_weekly_pattern_only():
+    calendar = build_calendar(WEEKLY, [], MONDAY, date(2026, 3, 8))
+    assert calendar == {
+        MONDAY: [(time(9), time(12)), (time(13), time(17))],
+        date(2026, 3, 3): [(time(9), time(17))],
+    }
+
+
+def test_whole_day_block_removes_the_day():
+    exceptions = [(MONDAY, MONDAY, "block", None, None)]
+    calendar = build_calendar(WEEKLY, exceptions, MONDAY, date(2026, 3, 3))
+    assert MONDAY not in calendar
+    assert calendar[date(2026, 3, 3)] == [(time(9), time(17))]
+
+
+def test_partial_block():
+    exceptions = [(date(2026, 3, 3), date(2026, 3, 3), "block", time(12), time(14))]
+    calendar = build_calendar(WEEKLY, exceptions, date(2026, 3, 3), date(2026, 3, 3))
+    assert calendar == {date(2026, 3, 3): [(time(9), time(12)), (time(14), time(17))]}
+
+
+def test_block_then_add_opens_extra_clinic_during_leave():
+    exceptions = [
+        (date(2026, 3, 2), date(2026, 3, 6), "block", None, None),
+        (date(2026, 3, 3), date(2026, 3, 3), "add", time(10), time(12)),
+    ]
+    calendar = build_calendar(WEEKLY, exceptions, MONDAY, date(2026, 3, 8))
+    assert calendar == {date(2026, 3, 3): [(time(10), time(12))]}
+
+
+def test_add_on_a_day_off_and_merge_with_weekly_hours():
+    exceptions = [
+        (date(2026, 3, 7), date(2026, 3, 7), "add", time(9), time(11)),  # Saturday
+        (MONDAY, MONDAY, "add", time(12), time(13)),  # fills the lunch gap
+    ]
+    calendar = build_calendar(WEEKLY, exceptions, MONDAY, date(2026, 3, 8))
+    assert calendar[date(2026, 3, 7)] == [(time(9), time(11))]
+    assert calendar[MONDAY] == [(time(9), time(17))]
+
+
+def test_window_clips_exceptions_at_the_edges():
+    # Leave from the previous Friday to Wednesday, viewed Tuesday..Thursday
+    exceptions = [(date(2026, 2, 27), date(2026, 3, 4), "block", None, None)]
+    weekly = {day: [(time(9), time(17))] for day in ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday")}
+    calendar = build_calendar(weekly, exceptions, date(2026, 3, 3), date(2026, 3, 5))
+    assert calendar == {date(2026, 3, 5): [(time(9), time(17))]}
+
+
+def test_exception_outside_window_is_ignored():
+    exceptions = [(date(2026, 4, 1), date(2026, 4, 30), "block", None, None)]
+    assert build_calendar(WEEKLY, exceptions, MONDAY, MONDAY) == {MONDAY: WEEKLY["Monday"]}
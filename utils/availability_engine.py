@@ -0,0 +1,148 @@
+# utils/availability_engine.py
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+DAYS_OF_WEEK = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+SLOT_MINUTES = 30
+
+
+def merge_intervals(intervals):
+    """
+    Sort (start, end) pairs and merge the ones that overlap or touch, so 09:00-12:00 and
+    11:00-13:00 become 09:00-13:00. Raises ValueError for an empty or inverted interval.
+    """
+    merged = []
+    for start, end in sorted(intervals):
+        if start >= end:
+            raise ValueError(f"Invalid time range {start}-{end}: start must be before end.")
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def normalize_schedule(intervals_by_day):
+    """{day: [(start, end), ...]} -> the same with every day's intervals merged; empty days dropped."""
+    return {day: merge_intervals(intervals) for day, intervals in intervals_by_day.items() if intervals}
+
+
+def schedule_from_rows(rows):
+    """Group stored (availability_id, day, start, end) rows into {day: [(start, end), ...]}, unmerged."""
+    schedule = defaultdict(list)
+    for _, day, start, end in rows:
+        schedule[day].append((start, end))
+    return schedule
+
+
+def diff_schedule(stored_rows, desired):
+    """
+    Smallest set of row changes that turns the stored rows into the desired normalized schedule.
+
+    stored_rows: (availability_id, day, start, end) as currently in the database (possibly overlapping).
+    desired: {day: merged [(start, end), ...]}.
+    Returns (inserts, updates, deletes): inserts are (day, start, end), updates are
+    (availability_id, start, end) for rows that are reused on the same day, deletes are ids.
+    """
+    stored_by_day = defaultdict(list)
+    for availability_id, day, start, end in stored_rows:
+        stored_by_day[day].append((availability_id, start, end))
+
+    inserts, updates, deletes = [], [], []
+    for day in set(stored_by_day) | set(desired):
+        wanted = list(desired.get(day, []))
+        leftovers = []
+        # Rows that already match an interval exactly stay untouched
+        for availability_id, start, end in sorted(stored_by_day.get(day, []), key=lambda r: (r[1], r[2])):
+            if (start, end) in wanted:
+                wanted.remove((start, end))
+            else:
+                leftovers.append(availability_id)
+        # Reuse the remaining rows for the remaining intervals before inserting or deleting anything
+        for availability_id, (start, end) in zip(leftovers, wanted):
+            updates.append((availability_id, start, end))
+        inserts.extend((day, start, end) for start, end in wanted[len(leftovers):])
+        deletes.extend(leftovers[len(wanted):])
+    return inserts, updates, deletes
+
+
+def add_intervals(schedule, days, start, end):
+    """Copy of schedule with (start, end) added to each of days."""
+    result = {day: list(intervals) for day, intervals in schedule.items()}
+    for day in days:
+        result.setdefault(day, []).append((start, end))
+    return result
+
+
+def overlaps(schedule, days, start, end):
+    """Days on which (start, end) overlaps an interval already in the schedule."""
+    return [day for day in days if any(s < end and start < e for s, e in schedule.get(day, []))]
+
+
+# ---------- Date-specific exceptions ----------
+def subtract_intervals(intervals, removed):
+    """Parts of the merged intervals not covered by any of the removed intervals."""
+    removed = merge_intervals(removed)
+    result = []
+    for start, end in intervals:
+        cursor = start
+        for cut_start, cut_end in removed:
+            if cut_end <= cursor or cut_start >= end:
+                continue
+            if cut_start > cursor:
+                result.append((cursor, cut_start))
+            cursor = max(cursor, cut_end)
+            if cursor >= end:
+                break
+        if cursor < end:
+            result.append((cursor, end))
+    return result
+
+
+def build_calendar(weekly, exceptions, start_date, end_date):
+    """
+    Concrete availability of one doctor for every date in [start_date, end_date].
+
+    weekly: normalized {day name: [(start, end), ...]}.
+    exceptions: (start_date, end_date, kind, start_time, end_time) rows; "block" without times
+    clears the whole day. Blocks are applied before adds, so an extra clinic inside a leave
+    period still opens. Returns {date: merged [(start, end), ...]} for dates with any hours.
+    """
+    blocked, whole_day, added = defaultdict(list), set(), defaultdict(list)
+    for first, last, kind, start, end in exceptions:
+        day = max(first, start_date)
+        last = min(last, end_date)
+        while day <= last:
+            if kind == "add":
+                added[day].append((start, end))
+            elif start is None:
+                whole_day.add(day)
+            else:
+                blocked[day].append((start, end))
+            day += timedelta(days=1)
+
+    calendar = {}
+    day = start_date
+    while day <= end_date:
+        intervals = [] if day in whole_day else weekly.get(DAYS_OF_WEEK[day.weekday()], [])
+        if day in blocked and intervals:
+            intervals = subtract_intervals(intervals, blocked[day])
+        if day in added:
+            intervals = merge_intervals(list(intervals) + added[day])
+        if intervals:
+            calendar[day] = intervals
+        day += timedelta(days=1)
+    return calendar
+
+
+def split_into_slots(day, intervals, minutes=SLOT_MINUTES):
+    """Back-to-back (start, end) datetimes of bookable slots inside a day's merged intervals."""
+    length = timedelta(minutes=minutes)
+    slots = []
+    for interval_start, interval_end in intervals:
+        start, end = datetime.combine(day, interval_start), datetime.combine(day, interval_end)
+        while start + length <= end:
+            slots.append((start, start + length))
+            start += length
+    return slots
@@ -0,0 +1,280 @@
+# utils/blob_store.py
+import mimetypes
+import os
+import shutil
+import tempfile
+import threading
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from urllib.parse import quote
+from dotenv import load_dotenv
+
+load_dotenv()
+
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "local").lower()
+LOCAL_STORAGE_ROOT = os.getenv("LOCAL_STORAGE_ROOT", ".")
+S3_BUCKET = os.getenv("S3_BUCKET")
+S3_ENDPOINT_URL = os.getenv("S3_ENDPOINT_URL")  # set for MinIO or other S3-compatible services
+S3_REGION = os.getenv("S3_REGION")
+
+MULTIPART_THRESHOLD = 8 * 1024 * 1024
+MULTIPART_CHUNK_SIZE = 8 * 1024 * 1024
+READ_CHUNK_SIZE = 256 * 1024
+
+_store = None
+_store_lock = threading.Lock()
+
+
+class BlobStore(ABC):
+    """
+    Where uploaded files live. Keys are the stored file_path values (e.g. "Uploads/blobs/ab/cd/<sha>.pdf"),
+    so existing rows stay valid whichever backend is configured.
+    """
+
+    @abstractmethod
+    def put_file(self, local_path, key):
+        """Move a finished local file into the store under key."""
+
+    @abstractmethod
+    def exists(self, key):
+        ...
+
+    @abstractmethod
+    def stat(self, key):
+        """Return (size_bytes, modified_timestamp) or None if the object does not exist."""
+
+    @abstractmethod
+    def find(self, prefix):
+        """Return the first key starting with prefix, or None."""
+
+    @abstractmethod
+    def touch(self, key):
+        """Refresh the modification time so the storage GC treats the object as fresh."""
+
+    @abstractmethod
+    def delete(self, key):
+        ...
+
+    @abstractmethod
+    def iter_objects(self, prefix):
+        """Yield (key, size_bytes, modified_timestamp) for every object under prefix."""
+
+    @abstractmethod
+    def iter_range(self, key, start=0, end=None, chunk_size=READ_CHUNK_SIZE):
+        """Yield the bytes of key from start to end (inclusive) in chunks."""
+
+    @abstractmethod
+    def presigned_url(self, key, file_name=None, ttl=600):
+        """A URL the browser can fetch directly, or None if the backend cannot issue one."""
+
+    @abstractmethod
+    def local_copy(self, key):
+        """Context manager yielding a path on local disk holding the object, for libraries that need a real file."""
+
+    def read_bytes(self, key):
+        return b"".join(self.iter_range(key))
+
+
+# ---------- Local disk ----------
+class LocalBlobStore(BlobStore):
+    def __init__(self, root=LOCAL_STORAGE_ROOT):
+        self.root = os.path.realpath(root)
+
+    def _path(self, key):
+        path = os.path.realpath(os.path.join(self.root, key.replace("\\", "/")))
+        if os.path.commonpath([self.root, path]) != self.root:
+            raise ValueError(f"Key escapes the storage root: {key}")
+        return path
+
+    def put_file(self, local_path, key):
+        path = self._path(key)
+        if os.path.realpath(local_path) == path:
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # os.replace is atomic within a filesystem; fall back to a copy across devices
+        try:
+            os.replace(local_path, path)
+        except OSError:
+            shutil.move(local_path, path)
+
+    def exists(self, key):
+        return os.path.isfile(self._path(key))
+
+    def stat(self, key):
+        try:
+            st = os.stat(self._path(key))
+        except FileNotFoundError:
+            return None
+        return st.st_size, st.st_mtime
+
+    def find(self, prefix):
+        path = self._path(prefix)
+        directory, name_prefix = os.path.dirname(path), os.path.basename(path)
+        if not os.path.isdir(directory):
+            return None
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.name.startswith(name_prefix) and entry.is_file():
+                    return os.path.relpath(entry.path, self.root)
+        return None
+
+    def touch(self, key):
+        os.utime(self._path(key))
+
+    def delete(self, key):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def iter_objects(self, prefix):
+        # Streamed with os.scandir so huge trees are never listed into memory
+        stack = [self._path(prefix)]
+        while stack:
+            try:
+                with os.scandir(stack.pop()) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        elif entry.is_file(follow_symlinks=False):
+                            st = entry.stat(follow_symlinks=False)
+                            yield os.path.relpath(entry.path, self.root), st.st_size, st.st_mtime
+            except FileNotFoundError:
+                continue
+
+    def iter_range(self, key, start=0, end=None, chunk_size=READ_CHUNK_SIZE):
+        with open(self._path(key), "rb") as f:
+            f.seek(start)
+            remaining = None if end is None else end - start + 1
+            while remaining is None or remaining > 0:
+                chunk = f.read(chunk_size if remaining is None else min(chunk_size, remaining))
+                if not chunk:
+                    break
+                if remaining is not None:
+                    remaining -= len(chunk)
+                yield chunk
+
+    def presigned_url(self, key, file_name=None, ttl=600):
+        # Served by utils/file_server.py instead
+        return None
+
+    @contextmanager
+    def local_copy(self, key):
+        yield self._path(key)
+
+
+# ---------- S3-compatible ----------
+class S3BlobStore(BlobStore):
+    def __init__(self, bucket=S3_BUCKET, endpoint_url=S3_ENDPOINT_URL, region_name=S3_REGION, client=None):
+        import boto3
+        from boto3.s3.transfer import TransferConfig
+
+        if not bucket:
+            raise RuntimeError("S3_BUCKET is not set")
+        self.bucket = bucket
+        # Credentials come from the usual AWS_* environment variables / instance profile
+        self.client = client or boto3.client("s3", endpoint_url=endpoint_url, region_name=region_name)
+        self.transfer_config = TransferConfig(
+            multipart_threshold=MULTIPART_THRESHOLD,
+            multipart_chunksize=MULTIPART_CHUNK_SIZE,
+            max_concurrency=4,
+        )
+
+    @staticmethod
+    def _key(key):
+        return key.replace("\\", "/").lstrip("/")
+
+    def _is_missing(self, error):
+        return error.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound")
+
+    @staticmethod
+    def _content_type(key):
+        return mimetypes.guess_type(key)[0] or "application/octet-stream"
+
+    def put_file(self, local_path, key):
+        # upload_file switches to a parallel multipart upload above MULTIPART_THRESHOLD
+        self.client.upload_file(
+            local_path, self.bucket, self._key(key),
+            ExtraArgs={"ContentType": self._content_type(key)}, Config=self.transfer_config,
+        )
+        os.remove(local_path)
+
+    def exists(self, key):
+        return self.stat(key) is not None
+
+    def stat(self, key):
+        from botocore.exceptions import ClientError
+        try:
+            head = self.client.head_object(Bucket=self.bucket, Key=self._key(key))
+        except ClientError as e:
+            if self._is_missing(e):
+                return None
+            raise
+        return head["ContentLength"], head["LastModified"].timestamp()
+
+    def find(self, prefix):
+        response = self.client.list_objects_v2(Bucket=self.bucket, Prefix=self._key(prefix), MaxKeys=1)
+        contents = response.get("Contents")
+        return contents[0]["Key"] if contents else None
+
+    def touch(self, key):
+        # S3 has no utime; an in-place copy with replaced metadata bumps LastModified.
+        # REPLACE drops whatever is not passed again, so carry the original type and metadata over.
+        key = self._key(key)
+        head = self.client.head_object(Bucket=self.bucket, Key=key)
+        self.client.copy_object(
+            Bucket=self.bucket, Key=key,
+            CopySource={"Bucket": self.bucket, "Key": key},
+            MetadataDirective="REPLACE",
+            ContentType=head.get("ContentType") or self._content_type(key),
+            Metadata=head.get("Metadata", {}),
+        )
+
+    def delete(self, key):
+        self.client.delete_object(Bucket=self.bucket, Key=self._key(key))
+
+    def iter_objects(self, prefix):
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self._key(prefix).rstrip("/") + "/"):
+            for obj in page.get("Contents", []):
+                yield obj["Key"], obj["Size"], obj["LastModified"].timestamp()
+
+    def iter_range(self, key, start=0, end=None, chunk_size=READ_CHUNK_SIZE):
+        byte_range = f"bytes={start}-{'' if end is None else end}"
+        response = self.client.get_object(Bucket=self.bucket, Key=self._key(key), Range=byte_range)
+        yield from response["Body"].iter_chunks(chunk_size)
+
+    def presigned_url(self, key, file_name=None, ttl=600):
+        params = {"Bucket": self.bucket, "Key": self._key(key)}
+        if file_name:
+            params["ResponseContentDisposition"] = f"attachment; filename*=UTF-8''{quote(file_name)}"
+        else:
+            # Shown inline; objects uploaded without a type would otherwise download as octet-stream
+            params["ResponseContentType"] = self._content_type(key)
+        return self.client.generate_presigned_url("get_object", Params=params, ExpiresIn=ttl)
+
+    @contextmanager
+    def local_copy(self, key):
+        suffix = os.path.splitext(key)[1]
+        fd, path = tempfile.mkstemp(suffix=suffix)
+        os.close(fd)
+        try:
+            self.client.download_file(self.bucket, self._key(key), path, Config=self.transfer_config)
+            yield path
+        finally:
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def get_blob_store() -> BlobStore:
+    """Return the process-wide store selected by STORAGE_BACKEND ("local" or "s3")."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            if STORAGE_BACKEND == "s3":
+                _store = S3BlobStore()
+            elif STORAGE_BACKEND == "local":
+                _store = LocalBlobStore()
+            else:
+                raise RuntimeError(f"Unknown STORAGE_BACKEND: {STORAGE_BACKEND}")
+    return _store
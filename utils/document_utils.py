@@ -1,14 +1,79 @@
 # services/document_utils.py
+import hashlib
 import os
-from datetime import datetime
+import tempfile
+
+from utils.blob_store import get_blob_store
 
 UPLOAD_DIR = "Uploads"
+BLOB_DIR = os.path.join(UPLOAD_DIR, "blobs")
+TMP_DIR = os.path.join(UPLOAD_DIR, "tmp")
+CHUNK_SIZE = 1024 * 1024
+
+# Extensions that may be served back to the browser, with their MIME types
+MIME_TYPES = {
+    ".pdf": "application/pdf",
+    ".docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    ".txt": "text/plain",
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".png": "image/png",
+    ".mp3": "audio/mpeg",
+    ".wav": "audio/wav",
+    ".ogg": "audio/ogg",
+    ".mp4": "video/mp4",
+    ".webm": "video/webm",
+}
+
+def blob_path(sha256, ext):
+    """Content-addressed location of a blob, fanned out over two directory levels."""
+    return os.path.join(BLOB_DIR, sha256[:2], sha256[2:4], f"{sha256}.{ext}")
+
+def find_blob(sha256):
+    """Return the stored key for a hash if the content already exists in the blob store."""
+    return get_blob_store().find(blob_path(sha256, "").replace("\\", "/"))
+
+def save_uploaded_file(uploaded_file):
+    """
+    Stream an uploaded file to content-addressed storage in fixed-size chunks.
+    The hash is computed while spooling to a local temp file, which is then handed to the blob store.
+    Returns (file_path, sha256, size_bytes); identical content is stored only once.
+    """
+    ext = uploaded_file.name.rsplit(".", 1)[-1].lower()
+    os.makedirs(TMP_DIR, exist_ok=True)
+
+    digest = hashlib.sha256()
+    size = 0
+    fd, tmp_path = tempfile.mkstemp(dir=TMP_DIR, suffix=".part")
+    try:
+        uploaded_file.seek(0)
+        with os.fdopen(fd, "wb") as out:
+            for chunk in iter(lambda: uploaded_file.read(CHUNK_SIZE), b""):
+                digest.update(chunk)
+                out.write(chunk)
+                size += len(chunk)
+        sha256 = digest.hexdigest()
+
+        store = get_blob_store()
+        existing = find_blob(sha256)
+        if existing:
+            # Duplicate upload: keep the stored copy and refresh its mtime for the GC grace period
+            store.touch(existing)
+            os.remove(tmp_path)
+            return existing, sha256, size
+
+        file_path = blob_path(sha256, ext).replace("\\", "/")
+        store.put_file(tmp_path, file_path)
+        return file_path, sha256, size
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
 
-def save_uploaded_file(patient_id, document_name, uploaded_file):
-    """Save uploaded file to the Uploads directory and return the file path."""
-    ext = uploaded_file.name.split(".")[-1]
-    file_path = os.path.join(UPLOAD_DIR, str(patient_id), f"{document_name}_{datetime.now().strftime('%Y%m%d%H%M%S')}.{ext}")
-    os.makedirs(os.path.dirname(file_path), exist_ok=True)
-    with open(file_path, "wb") as f:
-        f.write(uploaded_file.getbuffer())
-    return file_path
+def resolve_upload_path(file_path):
+    """Return the absolute path of a stored file, or None if it points outside Uploads/."""
+    root = os.path.realpath(UPLOAD_DIR)
+    path = os.path.realpath(file_path.replace("\\", "/"))
+    if os.path.commonpath([root, path]) != root:
+        return None
+    return path
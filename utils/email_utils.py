@@ -600,4 +600,78 @@ Contact: support@smarthealthhub.com
     with smtplib.SMTP(os.getenv("SMTP_HOST", "smtp.gmail.com"), int(os.getenv("SMTP_PORT", 587))) as server:
         server.starttls()
         server.login(os.getenv("SMTP_USER"), os.getenv("SMTP_PASSWORD"))
-        server.sendmail(os.getenv("SMTP_USER"), patient_email, msg.as_string())
\ No newline at end of file
+        server.sendmail(os.getenv("SMTP_USER"), patient_email, msg.as_string())
+
+def send_waitlist_offer_email(patient_email, doctor_name, appointment_date, time_slot, hold_minutes):
+    """Tell a waitlisted patient that a slot is being held for them."""
+    plain_text = f"""Dear Patient,
+
+A slot with {doctor_name} has opened up on {appointment_date.strftime('%Y-%m-%d')} at {time_slot}.
+It is held for you for {hold_minutes} minutes. Confirm it under "Your Appointments" in Smart Health Hub, otherwise it will be offered to the next patient on the waitlist.
+
+Best regards,
+Smart Health Hub Team
+Contact: support@smarthealthhub.com
+"""
+    html_content = f"""<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>A Slot Opened Up</title>
+</head>
+<body style="margin: 0; padding: 0; font-family: Arial, Helvetica, sans-serif; color: #333333; background-color: #F4F4F4;">
+    <table width="100%" cellpadding="0" cellspacing="0" style="background-color: #F4F4F4; padding: 20px;">
+        <tr>
+            <td align="center">
+                <table width="600" cellpadding="0" cellspacing="0" style="background-color: #FFFFFF; border-radius: 8px; overflow: hidden; box-shadow: 0 2px 4px rgba(0,0,0,0.1);">
+                    <tr>
+                        <td style="background-color: #3d3693; padding: 20px; text-align: center;">
+                            <h1 style="color: #FFFFFF; font-size: 24px; margin: 10px 0;">A Slot Opened Up</h1>
+                        </td>
+                    </tr>
+                    <tr>
+                        <td style="padding: 30px;">
+                            <p style="font-size: 16px; line-height: 1.5;">
+                                Dear Patient,
+                            </p>
+                            <p style="font-size: 16px; line-height: 1.5;">
+                                A slot with <strong>{doctor_name}</strong> has opened up on {appointment_date.strftime('%Y-%m-%d')} at {time_slot}.
+                            </p>
+                            <p style="font-size: 16px; line-height: 1.5;">
+                                It is held for you for <strong>{hold_minutes} minutes</strong>. Confirm it under "Your Appointments",
+                                otherwise it will be offered to the next patient on the waitlist.
+                            </p>
+                        </td>
+                    </tr>
+                    <tr>
+                        <td style="background-color: #F4F4F4; padding: 20px; text-align: center; font-size: 14px; color: #666666;">
+                            <p style="margin: 0;">Smart Health Hub</p>
+                            <p style="margin: 5px 0;">Islamabad, Pakistan</p>
+                            <p style="margin: 5px 0;"><a href="mailto:support@smarthealthhub.com" style="color: #3d3693; text-decoration: none;">support@smarthealthhub.com</a></p>
+                        </td>
+                    </tr>
+                </table>
+            </td>
+        </tr>
+    </table>
+</body>
+</html>
+"""
+    msg = MIMEMultipart("alternative")
+    msg["Subject"] = "A Slot Opened Up"
+    msg["From"] = os.getenv("SMTP_USER")
+    msg["To"] = patient_email
+    msg.attach(MIMEText(plain_text, "plain"))
+    msg.attach(MIMEText(html_content, "html"))
+
+    try:
+        with smtplib.SMTP(os.getenv("SMTP_HOST", "smtp.gmail.com"), int(os.getenv("SMTP_PORT", 587))) as server:
+            server.starttls()
+            server.login(os.getenv("SMTP_USER"), os.getenv("SMTP_PASSWORD"))
+            server.sendmail(os.getenv("SMTP_USER"), patient_email, msg.as_string())
+    except Exception as e:
+        print(f"[WARN] Could not send waitlist offer to {patient_email}: {e}")
+        return False
+
+    return True
@@ -0,0 +1,209 @@
+# utils/event_dispatcher.py
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, date
+
+from database.queries.outbox_queries import claim_pending_events, record_dispatch_result
+from utils.email_utils import (
+    send_appointment_confirmation,
+    send_cancellation_email,
+    send_cancellation_email_doctor,
+    send_reschedule_email,
+    send_waitlist_offer_email,
+)
+
+# Shared by every dispatch so email and chat deliveries run side by side
+_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="outbox")
+_wakeup = threading.Event()
+_start_lock = threading.Lock()
+_dispatcher_thread = None
+
+
+def _as_date(value):
+    """Payload dates travel as ISO strings; the email templates expect date objects."""
+    if isinstance(value, (datetime, date)):
+        return value
+    return datetime.fromisoformat(value)
+
+
+def _age_from_dob(dob):
+    if not dob:
+        return "N/A"
+    dob = _as_date(dob)
+    today = date.today()
+    return today.year - dob.year - ((today.month, today.day) < (dob.month, dob.day))
+
+
+# ---------- Channel handlers ----------
+def _send_email(event_type, p):
+    if event_type == "appointment_booked":
+        return send_appointment_confirmation(
+            p.get("patient_email"),
+            p.get("doctor_email"),
+            p.get("patient_name"),
+            _age_from_dob(p.get("patient_dob")),
+            p.get("patient_gender"),
+            p.get("patient_phone"),
+            p.get("doctor_name"),
+            _as_date(p["appointment_date"]),
+            p["time_slot"],
+            p["reference_number"],
+        )
+    if event_type == "appointment_cancelled":
+        if p.get("cancelled_by") == "doctor":
+            return send_cancellation_email_doctor(p["patient_email"], p["reference_number"])
+        return send_cancellation_email(p["doctor_email"], p["appointment_id"])
+    if event_type == "appointment_rescheduled":
+        return send_reschedule_email(
+            p["doctor_email"],
+            p["appointment_id"],
+            _as_date(p["appointment_date"]),
+            p["time_slot"],
+        )
+    if event_type == "waitlist_slot_offered":
+        return send_waitlist_offer_email(
+            p["patient_email"],
+            p.get("doctor_name"),
+            _as_date(p["appointment_date"]),
+            p["time_slot"],
+            p.get("hold_minutes"),
+        )
+    return True
+
+
+def _notification_text(event_type, p):
+    """Return (recipient uid, title, body) for the short chat notices."""
+    ref = p.get("reference_number")
+    when = f"{str(p.get('appointment_date', ''))[:10]} {p.get('time_slot', '')}".strip()
+    if event_type == "appointment_booked":
+        return p.get("doctor_uid"), "New appointment", f"{p.get('patient_name')} booked {when} (Ref {ref})."
+    if event_type == "appointment_cancelled":
+        if p.get("cancelled_by") == "doctor":
+            return p.get("patient_uid"), "Appointment cancelled", f"Your appointment {ref} was cancelled by the doctor."
+        return p.get("doctor_uid"), "Appointment cancelled", f"{p.get('patient_name')} cancelled appointment {ref}."
+    if event_type == "appointment_rescheduled":
+        return p.get("doctor_uid"), "Appointment rescheduled", f"Appointment {ref} moved to {when}."
+    if event_type == "waitlist_slot_offered":
+        return (
+            p.get("patient_uid"), "A slot opened up",
+            f"{when} with {p.get('doctor_name')} is held for you for {p.get('hold_minutes')} minutes. "
+            "Confirm it under Your Appointments.",
+        )
+    return None, None, None
+
+
+def _send_chat(event_type, p):
+    _, _, body = _notification_text(event_type, p)
+    if not body or not p.get("patient_uid") or not p.get("doctor_uid"):
+        return True
+
+    from database.firebase_config import init_firebase, get_chat_ref
+    init_firebase()
+    get_chat_ref(p["patient_uid"], p["doctor_uid"]).push({
+        "sender_id": "system",
+        "receiver_id": "",
+        "message": f"ℹ️ {body}",
+        "send_time": datetime.utcnow().isoformat(),
+        "status": "sent",
+    })
+    return True
+
+
+def _match_waitlist(event_type, p):
+    """Offer a slot freed by a cancellation, a move or an unclaimed hold to the next waiting patient."""
+    if event_type == "appointment_rescheduled":
+        start, end = p.get("freed_slot_start"), p.get("freed_slot_end")
+    elif event_type in ("appointment_cancelled", "waitlist_hold_released"):
+        start, end = p.get("slot_start"), p.get("slot_end")
+    else:
+        return True
+    if not start or not end:
+        return True
+    from database.queries.waitlist_queries import offer_freed_slot
+    offer_freed_slot(p["doctor_id"], _as_date(start), _as_date(end))
+    return True
+
+
+CHANNEL_HANDLERS = {
+    "email": _send_email,
+    "chat": _send_chat,
+    "waitlist": _match_waitlist,
+}
+
+
+# ---------- Dispatching ----------
+def _deliver(event_type, channel, payload):
+    handler = CHANNEL_HANDLERS.get(channel)
+    # Unknown channels, such as "push" on events queued by older releases, count as delivered
+    if handler is None:
+        return channel, None
+    try:
+        result = handler(event_type, payload)
+        # Senders return False on failure and True/None on success
+        return channel, None if result is not False else f"{channel} sender reported failure"
+    except Exception as e:
+        return channel, f"{channel}: {e}"
+
+
+def dispatch_pending(limit: int = 20):
+    """Deliver one batch of outbox events. Returns the number of events processed."""
+    events = claim_pending_events(limit)
+    if not events:
+        return 0
+
+    futures = {
+        event["event_id"]: [
+            _executor.submit(_deliver, event["event_type"], channel, event["payload"])
+            for channel in event["pending_channels"]
+        ]
+        for event in events
+    }
+
+    for event_id, channel_futures in futures.items():
+        failed, errors = [], []
+        for future in channel_futures:
+            channel, error = future.result()
+            if error:
+                failed.append(channel)
+                errors.append(error)
+        record_dispatch_result(event_id, failed, "; ".join(errors) or None)
+
+    return len(events)
+
+
+def notify_dispatcher():
+    """Wake the dispatcher right after a commit that enqueued events."""
+    _wakeup.set()
+
+
+def _release_expired_holds():
+    # Imported here: the waitlist queries themselves import this module
+    from database.queries.waitlist_queries import release_expired_holds
+    release_expired_holds()
+
+
+def _run(poll_interval):
+    while True:
+        _wakeup.wait(poll_interval)
+        _wakeup.clear()
+        try:
+            # Unconfirmed waitlist holds are released into the outbox like cancellations
+            _release_expired_holds()
+            # Drain everything that is ready before sleeping again
+            while dispatch_pending():
+                pass
+        except Exception as e:
+            print(f"[WARN] Outbox dispatcher error: {e}")
+
+
+def start_dispatcher(poll_interval: float = 10.0):
+    """Start the background dispatcher thread once per process."""
+    global _dispatcher_thread
+    with _start_lock:
+        if _dispatcher_thread is None or not _dispatcher_thread.is_alive():
+            _dispatcher_thread = threading.Thread(
+                target=_run, args=(poll_interval,), name="outbox-dispatcher", daemon=True
+            )
+            _dispatcher_thread.start()
+            _wakeup.set()
+    return _dispatcher_thread
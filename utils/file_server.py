@@ -0,0 +1,292 @@
+# utils/file_server.py
+import base64
+import hashlib
+import hmac
+import json
+import os
+import re
+import secrets
+import threading
+import time
+import zipfile
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import quote
+from dotenv import load_dotenv
+
+from database.queries.share_document_queries import get_shared_files_for_appointment
+from utils.blob_store import get_blob_store
+from utils.document_utils import MIME_TYPES, resolve_upload_path
+
+load_dotenv()
+
+FILE_SERVER_HOST = os.getenv("FILE_SERVER_HOST", "0.0.0.0")
+FILE_SERVER_PORT = int(os.getenv("FILE_SERVER_PORT", 8502))
+FILE_SERVER_PUBLIC_URL = os.getenv("FILE_SERVER_PUBLIC_URL")
+_CONFIGURED_KEY = os.getenv("DOWNLOAD_SIGNING_KEY") or os.getenv("ENCRYPTED_COOKIE_KEY")
+# Never a known constant: without a configured key each process signs with its own random key,
+# so its links only validate against the server this process runs itself
+SIGNING_KEY = (_CONFIGURED_KEY or secrets.token_hex(32)).encode()
+if not _CONFIGURED_KEY:
+    print("[WARN] DOWNLOAD_SIGNING_KEY is not set; using a random per-process key for download links")
+
+DOWNLOAD_TOKEN_TTL = 600  # seconds
+CHUNK_SIZE = 256 * 1024
+# Formats that are already compressed are stored as-is; deflating them only burns CPU
+DEFLATE_EXTS = {".txt"}
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+_server = None
+_server_started = False
+_server_lock = threading.Lock()
+# Where this process's links point; switched to the real port if the server falls back to a free one
+_public_url = (FILE_SERVER_PUBLIC_URL or f"http://localhost:{FILE_SERVER_PORT}").rstrip("/")
+
+
+# ---------- Signed tokens ----------
+def _b64encode(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+def _b64decode(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+def sign_token(claims: dict, ttl: int = DOWNLOAD_TOKEN_TTL) -> str:
+    """Return a URL-safe token carrying the claims and an expiry, signed with HMAC-SHA256."""
+    body = _b64encode(json.dumps({**claims, "exp": int(time.time()) + ttl}, separators=(",", ":")).encode())
+    signature = _b64encode(hmac.new(SIGNING_KEY, body.encode(), hashlib.sha256).digest())
+    return f"{body}.{signature}"
+
+def verify_token(token: str):
+    """Return the claims of a valid, unexpired token, otherwise None."""
+    try:
+        body, signature = token.split(".", 1)
+        expected = _b64encode(hmac.new(SIGNING_KEY, body.encode(), hashlib.sha256).digest())
+        if not hmac.compare_digest(signature, expected):
+            return None
+        claims = json.loads(_b64decode(body))
+    except (ValueError, json.JSONDecodeError):
+        return None
+    if claims.get("exp", 0) < time.time():
+        return None
+    return claims
+
+def make_download_url(file_path: str, file_name: str, ttl: int = DOWNLOAD_TOKEN_TTL) -> str:
+    """
+    Build a short-lived link that streams the stored file as an attachment. Object stores hand out
+    presigned URLs so the bytes go straight from the bucket to the browser.
+    """
+    ext = os.path.splitext(file_path)[1].lower()
+    presigned = get_blob_store().presigned_url(file_path, f"{file_name}{ext}", ttl)
+    if presigned:
+        return presigned
+    token = sign_token({"path": file_path.replace("\\", "/"), "name": f"{file_name}{ext}"}, ttl)
+    return f"{_public_url}/download/{token}"
+
+def make_view_url(file_path: str, ttl: int = DOWNLOAD_TOKEN_TTL) -> str:
+    """Short-lived link the browser displays inline, e.g. in its PDF viewer or a text frame."""
+    presigned = get_blob_store().presigned_url(file_path, ttl=ttl)
+    if presigned:
+        return presigned
+    key = file_path.replace("\\", "/")
+    token = sign_token({"path": key, "name": os.path.basename(key), "inline": True}, ttl)
+    return f"{_public_url}/download/{token}"
+
+def make_zip_url(doctor_id: int, reference_number: str, ttl: int = DOWNLOAD_TOKEN_TTL) -> str:
+    """Link that streams every document shared with the doctor for one appointment as a single ZIP."""
+    token = sign_token({"zip": True, "doctor_id": doctor_id, "ref": reference_number}, ttl)
+    return f"{_public_url}/zip/{token}"
+
+
+# ---------- Streaming ZIP ----------
+class _SocketWriter:
+    """
+    Write-only, unseekable file object over the response socket. zipfile detects the missing
+    tell()/seek() and falls back to data descriptors, so nothing is buffered beyond one chunk.
+    """
+
+    def __init__(self, wfile):
+        self.wfile = wfile
+        self.buffer = bytearray()
+
+    def write(self, data):
+        self.buffer += data
+        if len(self.buffer) >= CHUNK_SIZE:
+            self.flush()
+        return len(data)
+
+    def flush(self):
+        if self.buffer:
+            self.wfile.write(self.buffer)
+            self.buffer.clear()
+
+
+def _archive_names(files):
+    """Yield (archive_name, file_path) with readable, unique names."""
+    seen = {}
+    for document_name, file_path in files:
+        ext = os.path.splitext(file_path)[1].lower()
+        base = re.sub(r"[^\w\- .]", "_", document_name or "document").strip() or "document"
+        count = seen.get(base.lower() + ext, 0)
+        seen[base.lower() + ext] = count + 1
+        yield (f"{base} ({count + 1}){ext}" if count else f"{base}{ext}"), file_path
+
+
+def stream_zip(wfile, files):
+    """Write a ZIP of the stored files to wfile, reading each one from the blob store in chunks."""
+    store = get_blob_store()
+    writer = _SocketWriter(wfile)
+    with zipfile.ZipFile(writer, "w") as zf:
+        for name, file_path in _archive_names(files):
+            if store.stat(file_path) is None:
+                print(f"[WARN] Skipping missing file in ZIP export: {file_path}")
+                continue
+            info = zipfile.ZipInfo(name, date_time=time.localtime()[:6])
+            ext = os.path.splitext(name)[1]
+            info.compress_type = zipfile.ZIP_DEFLATED if ext in DEFLATE_EXTS else zipfile.ZIP_STORED
+            # force_zip64 because the size is unknown when the local header is written
+            with zf.open(info, "w", force_zip64=True) as entry:
+                for chunk in store.iter_range(file_path, chunk_size=CHUNK_SIZE):
+                    entry.write(chunk)
+    writer.flush()
+
+
+# ---------- HTTP handler ----------
+class DownloadHandler(BaseHTTPRequestHandler):
+    server_version = "SmartHealthHubFiles/1.0"
+
+    def do_HEAD(self):
+        self._serve(send_body=False)
+
+    def do_GET(self):
+        self._serve(send_body=True)
+
+    def log_message(self, format, *args):
+        # Request lines would leak tokens into the logs
+        pass
+
+    def _serve(self, send_body):
+        if self.path.startswith("/zip/"):
+            return self._serve_zip(send_body)
+        if not self.path.startswith("/download/"):
+            return self.send_error(404)
+
+        claims = verify_token(self.path[len("/download/"):].split("?", 1)[0])
+        if not claims or "path" not in claims:
+            return self.send_error(403, "Link expired or invalid")
+
+        key = claims["path"]
+        ext = os.path.splitext(key)[1].lower()
+        store = get_blob_store()
+        stat = store.stat(key) if resolve_upload_path(key) and ext in MIME_TYPES else None
+        if stat is None:
+            return self.send_error(404)
+
+        size = stat[0]
+        start, end = 0, size - 1
+        status = 200
+
+        range_header = self.headers.get("Range")
+        if range_header:
+            match = _RANGE_RE.match(range_header.strip())
+            if not match or (not match.group(1) and not match.group(2)):
+                return self._range_not_satisfiable(size)
+            if match.group(1):
+                start = int(match.group(1))
+                end = min(int(match.group(2)), size - 1) if match.group(2) else size - 1
+            else:
+                # Suffix range: the last N bytes
+                start = max(size - int(match.group(2)), 0)
+            if start > end or start >= size:
+                return self._range_not_satisfiable(size)
+            status = 206
+
+        length = end - start + 1
+        inline = claims.get("inline")
+        self.send_response(status)
+        self.send_header("Content-Type", MIME_TYPES[ext] + ("; charset=utf-8" if ext == ".txt" else ""))
+        self.send_header("Content-Length", str(length))
+        self.send_header("Accept-Ranges", "bytes")
+        disposition = "inline" if inline else "attachment"
+        self.send_header("Content-Disposition", f"{disposition}; filename*=UTF-8''{quote(claims['name'])}")
+        self.send_header("Cache-Control", "private, no-store")
+        if inline:
+            # The PDF viewer fetches from the app's origin; the signed token is the credential either way
+            self.send_header("Access-Control-Allow-Origin", "*")
+            self.send_header("X-Content-Type-Options", "nosniff")
+        if status == 206:
+            self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        self.end_headers()
+
+        if not send_body:
+            return
+
+        try:
+            for chunk in store.iter_range(key, start, end, CHUNK_SIZE):
+                self.wfile.write(chunk)
+        except (BrokenPipeError, ConnectionResetError):
+            # Client cancelled the download or is seeking elsewhere
+            pass
+
+    def _serve_zip(self, send_body):
+        claims = verify_token(self.path[len("/zip/"):].split("?", 1)[0])
+        if not claims or not claims.get("zip"):
+            return self.send_error(403, "Link expired or invalid")
+
+        files = get_shared_files_for_appointment(claims["doctor_id"], claims["ref"])
+        if not files:
+            return self.send_error(404)
+
+        # The archive length is unknown up front, so the body is terminated by closing the connection
+        archive_name = f"shared_documents_{claims['ref']}.zip"
+        self.send_response(200)
+        self.send_header("Content-Type", "application/zip")
+        self.send_header("Content-Disposition", f"attachment; filename*=UTF-8''{quote(archive_name)}")
+        self.send_header("Cache-Control", "private, no-store")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        if not send_body:
+            return
+        try:
+            stream_zip(self.wfile, files)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def _range_not_satisfiable(self, size):
+        self.send_response(416)
+        self.send_header("Content-Range", f"bytes */{size}")
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+
+def _bind(port):
+    server = ThreadingHTTPServer((FILE_SERVER_HOST, port), DownloadHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="file-server", daemon=True).start()
+    return server
+
+
+def start_file_server():
+    """
+    Start the download server in a daemon thread once per process. When another worker already
+    holds the port, links signed with the shared key are served by that worker; with a per-process
+    key this process listens on a free port of its own instead.
+    """
+    global _server, _server_started, _public_url
+    with _server_lock:
+        if _server_started:
+            return _server
+        _server_started = True
+        try:
+            _server = _bind(FILE_SERVER_PORT)
+        except OSError as e:
+            if _CONFIGURED_KEY:
+                print(f"[WARN] File server port {FILE_SERVER_PORT} is in use ({e}); reusing the server already listening there")
+                return None
+            _server = _bind(0)
+            if FILE_SERVER_PUBLIC_URL:
+                print("[WARN] Set DOWNLOAD_SIGNING_KEY: links to FILE_SERVER_PUBLIC_URL may reach a worker with a different key")
+            else:
+                _public_url = f"http://localhost:{_server.server_address[1]}"
+        print(f"File server listening on {FILE_SERVER_HOST}:{_server.server_address[1]}")
+    return _server
@@ -0,0 +1,212 @@
+# utils/media_utils.py
+import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+import av
+import numpy as np
+
+from database.queries.media_queries import claim_media_job, finish_media_job
+from utils.blob_store import get_blob_store
+from utils.document_utils import UPLOAD_DIR, TMP_DIR
+
+RENDITION_DIR = os.path.join(UPLOAD_DIR, "renditions")
+VIDEO_EXTS = {".mp4", ".webm"}
+AUDIO_EXTS = {".mp3", ".wav", ".ogg"}
+
+VIDEO_MAX_WIDTH = 640
+VIDEO_BIT_RATE = 600_000
+VIDEO_AUDIO_BIT_RATE = 96_000
+AUDIO_BIT_RATE = 64_000
+POSTER_AT_SECONDS = 1.0
+WAVEFORM_RATE = 8000
+WAVEFORM_WINDOW = WAVEFORM_RATE // 10  # one peak per 100 ms
+WAVEFORM_POINTS = 200
+
+_media_pool = None
+_media_pool_lock = threading.Lock()
+
+
+def rendition_paths(sha256, kind):
+    base = f"{RENDITION_DIR}/{sha256[:2]}/{sha256}".replace("\\", "/")
+    if kind == "video":
+        return f"{base}.mp4", f"{base}_poster.jpg"
+    return f"{base}.m4a", None
+
+
+def _scaled_size(width, height):
+    if width <= VIDEO_MAX_WIDTH:
+        return width - width % 2, height - height % 2
+    scaled_height = int(round(height * VIDEO_MAX_WIDTH / width / 2)) * 2
+    return VIDEO_MAX_WIDTH, scaled_height
+
+
+def _summarize_waveform(peaks):
+    """Reduce per-window peaks to a fixed number of points normalised to 0..1."""
+    if not peaks:
+        return []
+    peaks = np.asarray(peaks, dtype=np.float32)
+    groups = np.array_split(peaks, min(WAVEFORM_POINTS, len(peaks)))
+    summary = np.array([g.max() for g in groups])
+    top = summary.max()
+    if top > 0:
+        summary = summary / top
+    return [round(float(v), 3) for v in summary]
+
+
+def _tmp_file(suffix):
+    os.makedirs(TMP_DIR, exist_ok=True)
+    fd, path = tempfile.mkstemp(dir=TMP_DIR, suffix=suffix)
+    os.close(fd)
+    return path
+
+
+def transcode_video(src, sha256):
+    """Write a low-bitrate H.264/AAC MP4 and a poster frame. Runs in a worker process."""
+    store = get_blob_store()
+    rendition, poster = rendition_paths(sha256, "video")
+    with store.local_copy(src) as local_src:
+        tmp_rendition, tmp_poster = _tmp_file(".mp4"), _tmp_file(".jpg")
+        poster_saved = _transcode_video_file(local_src, tmp_rendition, tmp_poster)
+
+    store.put_file(tmp_rendition, rendition)
+    if poster_saved:
+        store.put_file(tmp_poster, poster)
+    else:
+        os.remove(tmp_poster)
+    return {"rendition_path": rendition, "poster_path": poster if poster_saved else None, "waveform": None}
+
+
+def _transcode_video_file(src, tmp_rendition, poster):
+    with av.open(src) as source, av.open(tmp_rendition, "w", format="mp4") as output:
+        in_video = source.streams.video[0]
+        in_audio = source.streams.audio[0] if source.streams.audio else None
+
+        width, height = _scaled_size(in_video.codec_context.width, in_video.codec_context.height)
+        out_video = output.add_stream("libx264", rate=in_video.average_rate or 30, options={"preset": "veryfast"})
+        out_video.width, out_video.height = width, height
+        out_video.pix_fmt = "yuv420p"
+        out_video.bit_rate = VIDEO_BIT_RATE
+
+        out_audio, resampler = None, None
+        if in_audio is not None:
+            out_audio = output.add_stream("aac", rate=44100)
+            out_audio.bit_rate = VIDEO_AUDIO_BIT_RATE
+            resampler = av.AudioResampler(format="fltp", layout="stereo", rate=44100)
+
+        poster_saved = False
+        streams = [s for s in (in_video, in_audio) if s is not None]
+        for packet in source.demux(*streams):
+            for frame in packet.decode():
+                if packet.stream.type == "video":
+                    if not poster_saved and (frame.time is None or frame.time >= POSTER_AT_SECONDS):
+                        image = frame.to_image()
+                        image.thumbnail((width, height))
+                        image.save(poster, "JPEG", quality=80)
+                        poster_saved = True
+                    # reformat keeps pts/time_base, so variable frame rate input stays in sync
+                    for out_packet in out_video.encode(frame.reformat(width=width, height=height, format="yuv420p")):
+                        output.mux(out_packet)
+                else:
+                    for resampled in resampler.resample(frame):
+                        for out_packet in out_audio.encode(resampled):
+                            output.mux(out_packet)
+
+        # Flush encoders
+        if resampler is not None:
+            for resampled in resampler.resample(None):
+                for out_packet in out_audio.encode(resampled):
+                    output.mux(out_packet)
+            for out_packet in out_audio.encode(None):
+                output.mux(out_packet)
+        for out_packet in out_video.encode(None):
+            output.mux(out_packet)
+
+    return poster_saved
+
+
+def transcode_audio(src, sha256):
+    """Write a low-bitrate AAC rendition and a waveform summary. Runs in a worker process."""
+    store = get_blob_store()
+    rendition, _ = rendition_paths(sha256, "audio")
+    with store.local_copy(src) as local_src:
+        tmp_rendition = _tmp_file(".m4a")
+        waveform = _transcode_audio_file(local_src, tmp_rendition)
+
+    store.put_file(tmp_rendition, rendition)
+    return {"rendition_path": rendition, "poster_path": None, "waveform": waveform}
+
+
+def _transcode_audio_file(src, tmp_rendition):
+    peaks = []
+    pending = np.zeros(0, dtype=np.float32)
+
+    with av.open(src) as source, av.open(tmp_rendition, "w", format="mp4") as output:
+        in_audio = source.streams.audio[0]
+        out_audio = output.add_stream("aac", rate=44100)
+        out_audio.bit_rate = AUDIO_BIT_RATE
+        out_audio.codec_context.layout = "mono"
+        encode_resampler = av.AudioResampler(format="fltp", layout="mono", rate=44100)
+        wave_resampler = av.AudioResampler(format="flt", layout="mono", rate=WAVEFORM_RATE)
+
+        def collect(frames):
+            nonlocal pending
+            for wave_frame in frames:
+                pending = np.concatenate([pending, np.abs(wave_frame.to_ndarray().reshape(-1))])
+            full = len(pending) // WAVEFORM_WINDOW * WAVEFORM_WINDOW
+            if full:
+                peaks.extend(pending[:full].reshape(-1, WAVEFORM_WINDOW).max(axis=1).tolist())
+                pending = pending[full:]
+
+        def encode(frames):
+            for resampled in frames:
+                for out_packet in out_audio.encode(resampled):
+                    output.mux(out_packet)
+
+        for frame in source.decode(in_audio):
+            collect(wave_resampler.resample(frame))
+            encode(encode_resampler.resample(frame))
+
+        collect(wave_resampler.resample(None))
+        encode(encode_resampler.resample(None))
+        encode([None])
+
+    if len(pending):
+        peaks.append(float(pending.max()))
+    return _summarize_waveform(peaks)
+
+
+def _get_media_pool():
+    global _media_pool
+    # Uploads from several sessions can arrive at once; only one of them may create the pool
+    with _media_pool_lock:
+        if _media_pool is None:
+            _media_pool = ProcessPoolExecutor(max_workers=int(os.getenv("MEDIA_WORKERS", 2)))
+    return _media_pool
+
+
+def _record_result(sha256, future):
+    try:
+        result = future.result()
+        finish_media_job(sha256, "done", **result)
+    except Exception as e:
+        print(f"[WARN] Transcoding failed for {sha256}: {e}")
+        finish_media_job(sha256, "failed", error=str(e))
+
+
+def schedule_transcode(sha256, file_path):
+    """
+    Queue a rendition for an uploaded audio/video blob unless its content was already transcoded
+    or is being transcoded. A job left queued by a dead worker is submitted again.
+    """
+    ext = os.path.splitext(file_path)[1].lower()
+    if not sha256 or ext not in VIDEO_EXTS | AUDIO_EXTS:
+        return
+    kind = "video" if ext in VIDEO_EXTS else "audio"
+    try:
+        if claim_media_job(sha256, kind):
+            worker = transcode_video if kind == "video" else transcode_audio
+            future = _get_media_pool().submit(worker, file_path, sha256)
+            future.add_done_callback(lambda f: _record_result(sha256, f))
+    except Exception as e:
+        print(f"[WARN] Could not schedule transcoding for {file_path}: {e}")
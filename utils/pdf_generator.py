@@ -1,25 +1,155 @@
 from reportlab.lib.pagesizes import letter
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Table, TableStyle, Spacer
 from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from io import BytesIO
 import os
+import threading
+import zipfile
+from xml.sax.saxutils import escape
 
-def generate_admit_card(data):
-    file_name = f"admit_card_{data['reference_number']}.pdf"
-    doc = SimpleDocTemplate(file_name, pagesize=letter)
-    styles = getSampleStyleSheet()
+# Number of rendered admit cards kept in memory per process
+ADMIT_CARD_CACHE_SIZE = 256
+
+
+@lru_cache(maxsize=None)
+def get_styles():
+    """Build the reportlab style sheet once per process."""
+    return getSampleStyleSheet()
+
+
+@lru_cache(maxsize=ADMIT_CARD_CACHE_SIZE)
+def _render_admit_card(reference_number, updated_at, doctor_name, treatment_name, appointment_date, slot):
+    # updated_at is part of the cache key so an edited appointment renders a fresh card
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=letter)
+    styles = get_styles()
     elements = [
         Paragraph("<b>Admit Card</b>", styles["Title"]),
         Spacer(1, 12),
-        Paragraph(f"Reference No: {data['reference_number']}", styles["Normal"]),
+        Paragraph(f"Reference No: {reference_number}", styles["Normal"]),
         Spacer(1, 12),
         Table([
             ["Field", "Details"],
-            ["Doctor", data["doctor_name"]],
-            ["Treatment", data["treatment_name"]],
-            ["Date", str(data["appointment_date"])],
-            ["Time Slot", data["slot"]]
+            ["Doctor", doctor_name],
+            ["Treatment", treatment_name],
+            ["Date", str(appointment_date)],
+            ["Time Slot", slot]
         ], style=[('GRID', (0,0), (-1,-1), 1, colors.grey)])
     ]
     doc.build(elements)
-    return file_name
+    return buffer.getvalue()
+
+
+def generate_admit_card(data):
+    """Return the admit card PDF as bytes, reusing the cached render when nothing changed."""
+    return _render_admit_card(
+        data["reference_number"],
+        data.get("updated_at"),
+        data["doctor_name"],
+        data["treatment_name"],
+        data["appointment_date"],
+        data["slot"],
+    )
+
+
+# ---------- Prescriptions ----------
+PRESCRIPTION_CACHE_SIZE = 512
+# Batches smaller than this render inline; spinning up worker processes costs more
+POOL_MIN_BATCH = 4
+_render_pool = None
+_render_pool_lock = threading.Lock()
+
+
+@lru_cache(maxsize=None)
+def get_prescription_styles():
+    """Paragraph styles for prescriptions, derived from the shared sheet once per process."""
+    styles = get_styles()
+    return {
+        "title": styles["Title"],
+        "heading": styles["Heading3"],
+        "normal": styles["Normal"],
+        "small": ParagraphStyle("PrescriptionSmall", parent=styles["Normal"], fontName="Helvetica", fontSize=8, textColor=colors.grey),
+    }
+
+
+@lru_cache(maxsize=None)
+def get_prescription_table_style():
+    return TableStyle([
+        ("GRID", (0, 0), (-1, -1), 0.5, colors.grey),
+        ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#3d3693")),
+        ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
+        ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+        ("FONTNAME", (0, 1), (-1, -1), "Helvetica"),
+        ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+    ])
+
+
+@lru_cache(maxsize=PRESCRIPTION_CACHE_SIZE)
+def _render_prescription(prescription_id, created_at, patient_name, doctor_name, medication_name, dosage, duration):
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=letter, title=f"Prescription {prescription_id}")
+    styles = get_prescription_styles()
+    elements = [
+        Paragraph("<b>Smart Health Hub - Prescription</b>", styles["title"]),
+        Spacer(1, 12),
+        Paragraph(f"Prescription No: {prescription_id}", styles["normal"]),
+        Paragraph(f"Date: {str(created_at)[:10]}", styles["normal"]),
+        Spacer(1, 12),
+        Paragraph(f"Patient: {escape(patient_name)}", styles["heading"]),
+        Paragraph(f"Prescribed by: Dr. {escape(doctor_name)}", styles["normal"]),
+        Spacer(1, 12),
+        Table(
+            [["Medication", "Dosage", "Duration"], [medication_name, dosage, duration or "-"]],
+            colWidths=[220, 140, 120],
+            style=get_prescription_table_style()
+        ),
+        Spacer(1, 24),
+        Paragraph("This prescription was generated electronically by Smart Health Hub.", styles["small"]),
+    ]
+    doc.build(elements)
+    return buffer.getvalue()
+
+
+def generate_prescription_pdf(data):
+    """Render one prescription record (a plain dict) to PDF bytes."""
+    return _render_prescription(
+        data["prescription_id"],
+        data.get("created_at"),
+        data.get("patient_name") or "N/A",
+        data.get("doctor_name") or "N/A",
+        data["medication_name"],
+        data["dosage"],
+        data.get("duration"),
+    )
+
+
+def _get_render_pool():
+    global _render_pool
+    with _render_pool_lock:
+        if _render_pool is None:
+            _render_pool = ProcessPoolExecutor(max_workers=min(4, os.cpu_count() or 1))
+    return _render_pool
+
+
+def export_prescriptions_zip(prescriptions):
+    """
+    Render a batch of prescription dicts in worker processes and write them into a ZIP.
+    Returns the archive as bytes, like generate_prescription_pdf: st.download_button does not
+    accept temporary file objects, and a cached handle would be left at EOF after the first read.
+    """
+    archive = BytesIO()
+    if len(prescriptions) < POOL_MIN_BATCH:
+        pdfs = map(generate_prescription_pdf, prescriptions)
+    else:
+        pdfs = _get_render_pool().map(generate_prescription_pdf, prescriptions, chunksize=8)
+
+    with zipfile.ZipFile(archive, "w", compression=zipfile.ZIP_STORED) as zf:
+        # Results are written as they come back from the pool, in input order
+        for data, pdf in zip(prescriptions, pdfs):
+            name = f"prescription_{data['prescription_id']}_{str(data.get('created_at'))[:10]}.pdf"
+            zf.writestr(name, pdf)
+
+    return archive.getvalue()
@@ -0,0 +1,177 @@
+# utils/preview_utils.py
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from docx import Document
+from PIL import Image
+import pypdfium2 as pdfium
+
+from database.queries.preview_queries import (
+    claim_preview, save_preview, save_document_text, save_document_text_for_id, get_documents_missing_text
+)
+from utils.blob_store import get_blob_store
+from utils.document_utils import UPLOAD_DIR, TMP_DIR
+
+PREVIEW_DIR = os.path.join(UPLOAD_DIR, "previews")
+SNIPPET_CHARS = 3000
+# Enough for long reports while staying far below the 1 MB tsvector limit
+SEARCH_TEXT_CHARS = 200_000
+TEXT_EXTS = {".pdf", ".docx", ".txt"}
+THUMBNAIL_SIZE = (900, 1200)
+IMAGE_EXTS = {".jpg", ".jpeg", ".png"}
+
+# Previews are generated off the request thread; two workers keep upload bursts from hogging the CPU
+_preview_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="preview")
+# PDFium is not thread-safe: every pypdfium2 call in the process goes through this lock
+_pdfium_lock = threading.RLock()
+
+
+def extract_document_text(file_path, max_chars=None):
+    """Extract plain text from a PDF, DOCX or TXT file. Returns "" for other formats."""
+    ext = os.path.splitext(file_path)[1].lower()
+    parts, total = [], 0
+
+    if ext == ".txt":
+        with open(file_path, "r", encoding="utf-8", errors="replace") as f:
+            return f.read(max_chars) if max_chars else f.read()
+
+    if ext == ".docx":
+        for para in Document(file_path).paragraphs:
+            parts.append(para.text)
+            total += len(para.text)
+            if max_chars and total >= max_chars:
+                break
+
+    elif ext == ".pdf":
+        with _pdfium_lock:
+            pdf = pdfium.PdfDocument(file_path)
+            try:
+                for page in pdf:
+                    text = page.get_textpage().get_text_range()
+                    parts.append(text)
+                    total += len(text)
+                    if max_chars and total >= max_chars:
+                        break
+            finally:
+                pdf.close()
+
+    text = "\n\n".join(parts)
+    return text[:max_chars] if max_chars else text
+
+
+def thumbnail_path_for(sha256):
+    return f"{PREVIEW_DIR}/{sha256[:2]}/{sha256}.jpg".replace("\\", "/")
+
+
+def _save_thumbnail(image, sha256):
+    key = thumbnail_path_for(sha256)
+    os.makedirs(TMP_DIR, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=TMP_DIR, suffix=".jpg")
+    os.close(fd)
+    image = image.convert("RGB")
+    image.thumbnail(THUMBNAIL_SIZE)
+    image.save(tmp_path, "JPEG", quality=80, optimize=True)
+    get_blob_store().put_file(tmp_path, key)
+    return key
+
+
+def build_preview(sha256, file_path):
+    """Generate the snippet/raster/thumbnail for one blob and store the result."""
+    ext = os.path.splitext(file_path)[1].lower()
+    snippet, thumbnail, page_count, text = None, None, None, None
+    try:
+        with get_blob_store().local_copy(file_path) as local_path:
+            if ext in IMAGE_EXTS:
+                with Image.open(local_path) as image:
+                    # draft() lets JPEG decode at reduced size instead of full resolution
+                    image.draft("RGB", THUMBNAIL_SIZE)
+                    thumbnail = _save_thumbnail(image, sha256)
+
+            elif ext == ".pdf":
+                with _pdfium_lock:
+                    pdf = pdfium.PdfDocument(local_path)
+                    try:
+                        page_count = len(pdf)
+                        first_page = pdf[0].render(scale=1.5).to_pil() if page_count else None
+                    finally:
+                        pdf.close()
+                if first_page is not None:
+                    thumbnail = _save_thumbnail(first_page, sha256)
+                text = extract_document_text(local_path, SEARCH_TEXT_CHARS)
+
+            elif ext in (".docx", ".txt"):
+                text = extract_document_text(local_path, SEARCH_TEXT_CHARS)
+
+        if text is not None:
+            # Postgres text columns reject NUL bytes, which some PDFs produce
+            text = text.replace("\x00", "")
+            snippet = text[:SNIPPET_CHARS]
+            save_document_text(sha256, text)
+
+        save_preview(sha256, "ready", snippet, thumbnail, page_count)
+    except Exception as e:
+        print(f"[WARN] Preview generation failed for {file_path}: {e}")
+        save_preview(sha256, "failed", error=str(e))
+
+
+def schedule_preview(sha256, file_path):
+    """Queue preview generation for a blob unless one exists or is being built by a live worker."""
+    if not sha256:
+        return
+    try:
+        if claim_preview(sha256):
+            _preview_executor.submit(build_preview, sha256, file_path)
+    except Exception as e:
+        print(f"[WARN] Could not schedule preview for {file_path}: {e}")
+
+
+def _index_document_text(document_id, sha256, file_path):
+    # Text goes to every document sharing the content; legacy rows without a hash are keyed by id
+    def save(text):
+        if sha256:
+            save_document_text(sha256, text)
+        else:
+            save_document_text_for_id(document_id, text)
+
+    try:
+        with get_blob_store().local_copy(file_path) as local_path:
+            text = extract_document_text(local_path, SEARCH_TEXT_CHARS).replace("\x00", "")
+        save(text)
+    except Exception as e:
+        print(f"[WARN] Text extraction failed for {file_path}: {e}")
+        # Empty text marks the document as processed so it is not retried on every start
+        save("")
+
+
+def _run_search_backfill(batch_size):
+    seen = set()
+    while True:
+        rows = get_documents_missing_text(TEXT_EXTS, batch_size)
+        # Rows that come back after being processed could not be saved; stop instead of spinning
+        rows = [row for row in rows if row.document_id not in seen]
+        if not rows:
+            return
+        seen.update(row.document_id for row in rows)
+        # One job per content hash: saving it fills in every duplicate in the batch
+        jobs = {row.sha256 or f"id:{row.document_id}": row for row in rows}
+        futures = [
+            _preview_executor.submit(_index_document_text, row.document_id, row.sha256, row.file_path)
+            for row in jobs.values()
+        ]
+        # Finish the batch before fetching the next one, which would otherwise return the same rows
+        for future in futures:
+            future.result()
+
+
+def schedule_search_backfill(batch_size=100):
+    """Extract text for documents uploaded before search existed, batch after batch, on the preview workers."""
+    def run():
+        try:
+            _run_search_backfill(batch_size)
+        except Exception as e:
+            print(f"[WARN] Search backfill stopped: {e}")
+
+    thread = threading.Thread(target=run, name="search-backfill", daemon=True)
+    thread.start()
+    return thread
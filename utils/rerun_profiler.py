@@ -0,0 +1,84 @@
+# utils/rerun_profiler.py
+import functools
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Set PROFILE_RERUNS=1 to log server CPU time and bytes sent for every full rerun and fragment run
+PROFILE_RERUNS = os.getenv("PROFILE_RERUNS", "0").lower() in ("1", "true", "yes")
+
+_stats = {}
+_stats_lock = threading.Lock()
+
+
+def _script_run_ctx():
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+    except ImportError:
+        return None
+    return get_script_run_ctx()
+
+
+def _record(label, cpu_ms, wall_ms, sent_bytes):
+    with _stats_lock:
+        stats = _stats.setdefault(label, {"runs": 0, "cpu_ms": 0.0, "wall_ms": 0.0, "bytes": 0})
+        stats["runs"] += 1
+        stats["cpu_ms"] += cpu_ms
+        stats["wall_ms"] += wall_ms
+        stats["bytes"] += sent_bytes
+        runs = stats["runs"]
+        avg_cpu, avg_bytes = stats["cpu_ms"] / runs, stats["bytes"] / runs
+    print(
+        f"[PROFILE] {label}: {cpu_ms:.1f} ms CPU, {wall_ms:.1f} ms wall, {sent_bytes / 1024:.1f} KB sent "
+        f"(avg over {runs} runs: {avg_cpu:.1f} ms CPU, {avg_bytes / 1024:.1f} KB)"
+    )
+
+
+def get_rerun_stats():
+    """Totals per label since the process started: runs, cpu_ms, wall_ms and bytes."""
+    with _stats_lock:
+        return {label: dict(stats) for label, stats in _stats.items()}
+
+
+@contextmanager
+def measure_rerun(label):
+    """
+    Measure one script run (or fragment run) on the server: CPU time of the script thread and the
+    size of every message Streamlit sends to the browser while the block executes.
+    Does nothing unless PROFILE_RERUNS is set.
+    """
+    ctx = _script_run_ctx() if PROFILE_RERUNS else None
+    if ctx is None:
+        yield
+        return
+
+    sent = [0]
+    original_enqueue = ctx._enqueue
+
+    def counting_enqueue(msg):
+        sent[0] += msg.ByteSize()
+        return original_enqueue(msg)
+
+    ctx._enqueue = counting_enqueue
+    cpu_start, wall_start = time.thread_time(), time.perf_counter()
+    try:
+        yield
+    finally:
+        # st.rerun()/st.stop() leave through here as exceptions, so they are measured too
+        ctx._enqueue = original_enqueue
+        _record(label, (time.thread_time() - cpu_start) * 1000, (time.perf_counter() - wall_start) * 1000, sent[0])
+
+
+def profiled(label):
+    """Decorator form of measure_rerun, applied under @st.fragment so each fragment run is measured."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with measure_rerun(label):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
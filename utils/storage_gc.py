@@ -0,0 +1,139 @@
+# utils/storage_gc.py
+import argparse
+import os
+import threading
+import time
+
+from database.queries.storage_queries import iter_referenced_paths, purge_unreferenced_blobs
+from utils.blob_store import get_blob_store
+from utils.document_utils import UPLOAD_DIR, TMP_DIR
+
+# Files younger than this are never collected: an upload writes its blob (or touches an
+# existing one) before the row that references it is committed.
+DEFAULT_GRACE_SECONDS = int(os.getenv("STORAGE_GC_GRACE_SECONDS", 24 * 3600))
+DEFAULT_INTERVAL_SECONDS = int(os.getenv("STORAGE_GC_INTERVAL_SECONDS", 6 * 3600))
+# Admit cards used to be written to the working directory before they were rendered in memory
+LEGACY_ADMIT_CARD_PREFIX = "admit_card_"
+
+_gc_thread = None
+_start_lock = threading.Lock()
+
+
+def _normalize(path):
+    return os.path.normcase(os.path.abspath(path.replace("\\", "/")))
+
+
+def _local_files(directory, name_filter=None):
+    """Yield (path, size, mtime) for files directly in a local directory."""
+    if not os.path.isdir(directory):
+        return
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.is_file(follow_symlinks=False) and (name_filter is None or name_filter(entry.name)):
+                st = entry.stat(follow_symlinks=False)
+                yield entry.path, st.st_size, st.st_mtime
+
+
+def _is_legacy_admit_card(name):
+    return name.startswith(LEGACY_ADMIT_CARD_PREFIX) and name.endswith(".pdf")
+
+
+class _LocalFiles:
+    """Minimal store-like view over the working directory for files that never lived in the blob store."""
+
+    def stat(self, path):
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return st.st_size, st.st_mtime
+
+    def delete(self, path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def _remove_if_stale(store, key, cutoff, dry_run):
+    """Delete one orphan and return its size, or None if it was touched meanwhile or is gone."""
+    # Re-stat right before deleting: a duplicate upload may have just refreshed the mtime
+    stat = store.stat(key)
+    if stat is None or stat[1] >= cutoff:
+        return None
+    if not dry_run:
+        store.delete(key)
+    return stat[0]
+
+
+def collect_garbage(grace_seconds: int = DEFAULT_GRACE_SECONDS, dry_run: bool = False):
+    """
+    Mark-and-sweep over Uploads/: load every path the database references, stream the
+    blob store listing and delete unreferenced objects older than the grace period.
+    Returns a summary dict with the number of files removed and bytes reclaimed.
+    """
+    started = time.monotonic()
+    cutoff = time.time() - grace_seconds
+    report = {"blobs_purged": 0, "files_scanned": 0, "files_deleted": 0, "bytes_reclaimed": 0, "dry_run": dry_run}
+
+    # Dead blob rows first, so the files they pointed to are unreferenced by the time we mark
+    if not dry_run:
+        report["blobs_purged"] = purge_unreferenced_blobs(grace_seconds)
+
+    # Mark
+    referenced = {_normalize(path) for path in iter_referenced_paths()}
+
+    # Sweep
+    def sweep(store, objects):
+        for key, _size, mtime in objects:
+            report["files_scanned"] += 1
+            if mtime >= cutoff or _normalize(key) in referenced:
+                continue
+            reclaimed = _remove_if_stale(store, key, cutoff, dry_run)
+            if reclaimed is not None:
+                report["files_deleted"] += 1
+                report["bytes_reclaimed"] += reclaimed
+
+    store = get_blob_store()
+    tmp_prefix = _normalize(TMP_DIR) + os.sep
+    sweep(store, (obj for obj in store.iter_objects(UPLOAD_DIR) if not _normalize(obj[0]).startswith(tmp_prefix)))
+    # Upload spool files are always local, even when blobs live in an object store
+    local = _LocalFiles()
+    sweep(local, _local_files(TMP_DIR))
+    sweep(local, _local_files(".", _is_legacy_admit_card))
+
+    print(
+        f"[GC] {'Would reclaim' if dry_run else 'Reclaimed'} {report['bytes_reclaimed'] / (1024 * 1024):.1f} MB "
+        f"from {report['files_deleted']} of {report['files_scanned']} files "
+        f"({report['blobs_purged']} dead blobs) in {time.monotonic() - started:.1f}s"
+    )
+    return report
+
+
+def _run(interval_seconds, grace_seconds):
+    while True:
+        try:
+            collect_garbage(grace_seconds)
+        except Exception as e:
+            print(f"[WARN] Storage GC failed: {e}")
+        time.sleep(interval_seconds)
+
+
+def start_storage_gc(interval_seconds: int = DEFAULT_INTERVAL_SECONDS, grace_seconds: int = DEFAULT_GRACE_SECONDS):
+    """Run the collector periodically in a daemon thread, once per process."""
+    global _gc_thread
+    with _start_lock:
+        if _gc_thread is None or not _gc_thread.is_alive():
+            _gc_thread = threading.Thread(
+                target=_run, args=(interval_seconds, grace_seconds), name="storage-gc", daemon=True
+            )
+            _gc_thread.start()
+    return _gc_thread
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Delete uploaded files no longer referenced by the database.")
+    parser.add_argument("--grace-hours", type=float, default=DEFAULT_GRACE_SECONDS / 3600)
+    parser.add_argument("--dry-run", action="store_true", help="Only report what would be deleted")
+    args = parser.parse_args()
+    collect_garbage(int(args.grace_hours * 3600), dry_run=args.dry_run)
@@ -0,0 +1,24 @@
+# utils/storage_report.py
+import argparse
+
+from database.connection import SessionLocal
+from database.queries.storage_usage_queries import get_top_consumers, PATIENT_STORAGE_QUOTA_BYTES
+
+
+def print_top_consumers(limit=20):
+    """Print the patients using the most storage, read from the usage counters (no file system scan)."""
+    with SessionLocal() as session:
+        rows = get_top_consumers(session, limit)
+
+    print(f"{'Patient':<30} {'Email':<35} {'Docs':>6} {'MB':>10} {'Quota':>7}")
+    for row in rows:
+        print(
+            f"{row.name[:30]:<30} {row.email[:35]:<35} {row.document_count:>6} "
+            f"{row.bytes_used / 1024**2:>10.1f} {row.bytes_used / PATIENT_STORAGE_QUOTA_BYTES:>7.0%}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Report the patients using the most document storage.")
+    parser.add_argument("--limit", type=int, default=20)
+    print_top_consumers(parser.parse_args().limit)
@@ -1,12 +1,50 @@
-import datetime
+# utils/time_utils.py
+import re
+from datetime import datetime, date, time
 
-def parse_time_slot_duration(time_slot):
+import pandas as pd
+
+# Slots are stored as "09:00 - 09:30"; older rows may carry a prefix such as the weekday
+SLOT_PATTERN = re.compile(r"(\d{1,2}):(\d{2})\s*-\s*(\d{1,2}):(\d{2})")
+DEFAULT_DURATION_HOURS = 1.0
+
+
+def parse_time_slot(time_slot):
+    """"09:00 - 09:30" -> (time(9, 0), time(9, 30)), or None if it is not a valid same-day range."""
+    match = SLOT_PATTERN.search(time_slot or "")
+    if not match:
+        return None
     try:
-        time_part = time_slot.split(" ")[1]
-        start_str, end_str = time_part.split(" - ")
-        start_time = datetime.strptime(start_str, "%H:%M")
-        end_time = datetime.strptime(end_str, "%H:%M")
-        duration_hours = (end_time - start_time).total_seconds() / 3600
-        return duration_hours if duration_hours > 0 else 1.0
-    except (ValueError, IndexError):
-        return 1.0
\ No newline at end of file
+        start = time(int(match.group(1)), int(match.group(2)))
+        end = time(int(match.group(3)), int(match.group(4)))
+    except ValueError:
+        return None
+    return (start, end) if start < end else None
+
+
+def slot_bounds(appointment_date, time_slot):
+    """slot_start/slot_end datetimes of a slot on the appointment's day, or (None, None)."""
+    parsed = parse_time_slot(time_slot)
+    if parsed is None:
+        return None, None
+    day = appointment_date.date() if isinstance(appointment_date, datetime) else appointment_date
+    if not isinstance(day, date):
+        return None, None
+    return datetime.combine(day, parsed[0]), datetime.combine(day, parsed[1])
+
+
+def parse_time_slot_duration(time_slot):
+    """Length of a slot string in hours; DEFAULT_DURATION_HOURS if it cannot be parsed."""
+    parsed = parse_time_slot(time_slot)
+    if parsed is None:
+        return DEFAULT_DURATION_HOURS
+    start, end = (datetime.combine(date.min, t) for t in parsed)
+    return (end - start).total_seconds() / 3600
+
+
+def slot_duration_hours(starts, ends):
+    """Durations in hours for whole columns of slot_start/slot_end values at once."""
+    starts = pd.to_datetime(pd.Series(list(starts), dtype="object"))
+    ends = pd.to_datetime(pd.Series(list(ends), dtype="object"))
+    hours = (ends - starts).dt.total_seconds() / 3600
+    return hours.where(hours > 0, DEFAULT_DURATION_HOURS)